@@ -0,0 +1,271 @@
+"""
+Load test and latency benchmark for the AI service.
+
+Runs the FastAPI app in-process (httpx ASGITransport, no network) with the
+service modules replaced by the deterministic stand-ins in benchmarks/mocks.py
+and drives scripted practice
+sessions: an initial message, N response turns with real-time feedback after
+each one, then a comprehensive report. Results are written as JSON so runs can
+be compared.
+
+Usage (from the ai-service directory):
+
+    python benchmarks/load_test.py --sessions 200 --concurrency 50 --turns 8
+    python benchmarks/load_test.py --baseline benchmarks/results/previous.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(SERVICE_DIR, "benchmarks", "results")
+
+_USER_LINES = [
+    "I just got back from a hiking trip and it was amazing.",
+    "Honestly I get a bit nervous meeting new people.",
+    "What do you usually do on weekends?",
+    "I've been trying to cook more, last night I made pasta from scratch.",
+    "Work has been busy but I'm learning a lot.",
+    "Do you have any favourite books or films?",
+    "I'd love to travel to Japan one day.",
+    "Sorry, I'm not sure what to say next.",
+]
+
+
+class Recorder:
+    """Per-endpoint latency samples and error counts"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client, endpoint: str, path: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload)
+        except Exception:
+            self.errors[endpoint] += 1
+            return None
+        self.samples[endpoint].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+            return None
+        return response.json()
+
+    def summary(self) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint in sorted(set(self.samples) | set(self.errors)):
+            values = np.array(self.samples.get(endpoint) or [0.0]) * 1000
+            endpoints[endpoint] = {
+                "count": len(self.samples.get(endpoint, [])),
+                "errors": self.errors.get(endpoint, 0),
+                "mean_ms": round(float(values.mean()), 2),
+                "p50_ms": round(float(np.percentile(values, 50)), 2),
+                "p95_ms": round(float(np.percentile(values, 95)), 2),
+                "p99_ms": round(float(np.percentile(values, 99)), 2),
+                "max_ms": round(float(values.max()), 2),
+            }
+        return endpoints
+
+
+async def run_session(client, recorder: Recorder, index: int, turns: int, think_time: float) -> None:
+    """One scripted practice session"""
+    personalities = ["bench-outgoing", "bench-thoughtful", "bench-professional"]
+    session_id = f"bench-{index}"
+    personality_id = personalities[index % len(personalities)]
+    messages: List[Dict[str, Any]] = []
+
+    opener = await recorder.call(client, "initial_message", "/api/conversation/initial-message", {
+        "session_id": session_id,
+        "personality_id": personality_id,
+        "scenario_id": "bench-coffee",
+        "user_profile": {"experience_level": "beginner"},
+    })
+    if opener is None:
+        return
+    messages.append({"sender": "AI", "content": opener["content"]})
+
+    for turn in range(turns):
+        if think_time:
+            await asyncio.sleep(think_time)
+        user_message = _USER_LINES[(index + turn) % len(_USER_LINES)]
+        reply = await recorder.call(client, "response", "/api/conversation/response", {
+            "session_id": session_id,
+            "personality_id": personality_id,
+            "scenario_id": "bench-coffee",
+            "user_message": user_message,
+        })
+        if reply is None:
+            return
+        messages.append({"sender": "USER", "content": user_message})
+        messages.append({"sender": "AI", "content": reply["content"]})
+
+        await recorder.call(client, "real_time_feedback", "/api/feedback/real-time", {
+            "session_id": session_id,
+            "messages": messages,
+        })
+
+    await recorder.call(client, "comprehensive_feedback", "/api/feedback/comprehensive", {
+        "session_id": session_id,
+        "messages": messages,
+    })
+
+
+async def run_sessions(client, recorder: Recorder, first: int, count: int, concurrency: int,
+                       turns: int, think_time: float) -> None:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int) -> None:
+        async with slots:
+            await run_session(client, recorder, index, turns, think_time)
+
+    await asyncio.gather(*(bounded(first + i) for i in range(count)))
+
+
+async def benchmark(args) -> Dict[str, Any]:
+    import httpx
+
+    from benchmarks import mocks
+    from models.mock_model import MockModel
+
+    model = MockModel(
+        os.getenv("OPENAI_MODEL", "gpt-4"),
+        call_latency=args.model_latency_ms / 1000,
+        item_latency=args.item_latency_ms / 1000,
+    )
+    # main imports the service modules at import time, so the stand-ins go first
+    mocks.install(model)
+    import main
+
+    await main.startup_event()
+
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            if args.warmup:
+                await run_sessions(client, Recorder(), -args.warmup, args.warmup, args.concurrency, 1, 0)
+
+            recorder = Recorder()
+            started = time.perf_counter()
+            await run_sessions(
+                client, recorder, 0, args.sessions, args.concurrency, args.turns, args.think_ms / 1000
+            )
+            duration = time.perf_counter() - started
+
+            # Retained memory per session, measured in a separate pass so
+            # tracing does not distort the latency numbers above
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            await run_sessions(
+                client, Recorder(), args.sessions, args.memory_sessions, args.concurrency, args.turns, 0
+            )
+            gc.collect()
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+            server = {
+                "cache": (await client.get("/api/cache/stats")).json(),
+                "real_time_feedback": (await client.get("/api/feedback/real-time/stats")).json(),
+                "database": (await client.get("/api/database/stats")).json(),
+                "batching": main.model_scheduler.stats(),
+            }
+    finally:
+        await main.shutdown_event()
+
+    requests = sum(len(v) for v in recorder.samples.values())
+    return {
+        "started_at": datetime.now().isoformat(),
+        "config": {
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "turns": args.turns,
+            "think_ms": args.think_ms,
+            "model_latency_ms": args.model_latency_ms,
+            "item_latency_ms": args.item_latency_ms,
+            "python": platform.python_version(),
+        },
+        "duration_s": round(duration, 3),
+        "requests": requests,
+        "errors": sum(recorder.errors.values()),
+        "throughput_rps": round(requests / duration, 2) if duration else 0.0,
+        "sessions_per_s": round(args.sessions / duration, 2) if duration else 0.0,
+        "endpoints": recorder.summary(),
+        "memory": {
+            "sessions_measured": args.memory_sessions,
+            "retained_bytes": retained,
+            "bytes_per_session": round(retained / args.memory_sessions) if args.memory_sessions else 0,
+        },
+        "model": {"calls": model.calls, "items": model.items},
+        "server": server,
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print throughput, p95 and memory changes against a previous run"""
+    def change(new: float, old: float) -> str:
+        return f"{new:>10.2f}  (was {old:.2f}, {100 * (new - old) / old:+.1f}%)" if old else f"{new:>10.2f}"
+
+    print(f"{'throughput_rps':<28}{change(result['throughput_rps'], baseline.get('throughput_rps', 0))}")
+    for endpoint, stats in result["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(endpoint, {})
+        print(f"{endpoint + ' p95_ms':<28}{change(stats['p95_ms'], old.get('p95_ms', 0))}")
+    print(f"{'bytes_per_session':<28}{change(result['memory']['bytes_per_session'], baseline.get('memory', {}).get('bytes_per_session', 0))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI service load test")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between turns")
+    parser.add_argument("--model-latency-ms", type=float, default=50.0, help="mock model cost per call")
+    parser.add_argument("--item-latency-ms", type=float, default=2.0, help="mock model cost per batched item")
+    parser.add_argument("--warmup", type=int, default=5, help="sessions run before measuring")
+    parser.add_argument("--memory-sessions", type=int, default=20)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="previous result file to compare against")
+    args = parser.parse_args()
+
+    # Everything the service persists goes to a throwaway directory
+    workdir = tempfile.mkdtemp(prefix="aigf-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ["DB_ALLOW_SQLITE_FALLBACK"] = "true"
+    os.environ.setdefault("ASSESSMENT_QUEUE_PATH", os.path.join(workdir, "assessment_jobs.db"))
+    os.environ.pop("REDIS_URL", None)
+    sys.path.insert(0, SERVICE_DIR)
+
+    result = asyncio.run(benchmark(args))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2, default=str)
+
+    print(json.dumps({k: result[k] for k in ("duration_s", "requests", "errors", "throughput_rps")}, indent=2))
+    for endpoint, stats in result["endpoints"].items():
+        print(f"{endpoint:<24} p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  p99 {stats['p99_ms']:>8.2f} ms")
+    print(f"memory per session: {result['memory']['bytes_per_session']} bytes")
+    print(f"saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Deterministic stand-ins used by the load test.
+
+main.py imports its services, the model manager, the logger and the database
+manager from modules that ship with the deployed service image. ``install``
+registers stand-ins for those modules before main is imported, so requests
+take the production path (endpoint, model router, batch scheduler, service
+call) and only the service bodies are replaced: each model-backed call costs
+one MockModel call. Personalities come from a small built-in catalogue.
+"""
+
+import logging
+import sys
+import types
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from models.mock_model import MockModel
+
+PERSONALITIES = {
+    "bench-outgoing": {
+        "id": "bench-outgoing",
+        "name": "bench-outgoing",
+        "display_name": "Riley",
+        "base_type": "EXTROVERT",
+        "traits": {"warmth": 0.9, "humor": 0.7, "directness": 0.6},
+        "communication_style": {"tone": "playful", "pace": "fast"},
+        "background": {"age": 26, "interests": ["hiking", "live music", "cooking"]},
+        "system_prompt": "You are Riley, an upbeat and curious conversation partner.",
+        "conversation_starters": ["Hey! What's been the best part of your week?"],
+    },
+    "bench-thoughtful": {
+        "id": "bench-thoughtful",
+        "name": "bench-thoughtful",
+        "display_name": "Avery",
+        "base_type": "INTROVERT",
+        "traits": {"warmth": 0.8, "humor": 0.4, "directness": 0.5},
+        "communication_style": {"tone": "calm", "pace": "relaxed"},
+        "background": {"age": 29, "interests": ["books", "photography", "tea"]},
+        "system_prompt": "You are Avery, a calm and thoughtful listener.",
+        "conversation_starters": ["Hi, it's nice to meet you. How are you feeling today?"],
+    },
+    "bench-professional": {
+        "id": "bench-professional",
+        "name": "bench-professional",
+        "display_name": "Morgan",
+        "base_type": "PROFESSIONAL",
+        "traits": {"warmth": 0.6, "humor": 0.3, "directness": 0.9},
+        "communication_style": {"tone": "polished", "pace": "measured"},
+        "background": {"age": 34, "interests": ["networking", "public speaking"]},
+        "system_prompt": "You are Morgan, a polished professional mentor.",
+        "conversation_starters": ["Good to meet you. What are you working on these days?"],
+    },
+}
+
+SCENARIOS = {
+    "bench-coffee": {"id": "bench-coffee", "title": "Coffee shop first date", "difficulty_level": 1},
+}
+
+# The model every stand-in service calls; set by install()
+_model: Optional[MockModel] = None
+
+
+async def _generate(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return await _model.generate({"messages": messages})
+
+
+class PersonalityService:
+    async def load_personalities(self) -> None:
+        pass
+
+    async def get_personality(self, personality_id: str) -> Optional[Dict[str, Any]]:
+        return PERSONALITIES.get(personality_id)
+
+    async def get_scenario(self, scenario_id: str) -> Optional[Dict[str, Any]]:
+        return SCENARIOS.get(scenario_id)
+
+    async def get_all_personalities(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": p["id"], "name": p["name"], "display_name": p["display_name"]}
+            for p in PERSONALITIES.values()
+        ]
+
+    async def create_personality(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        personality = {**config, "id": config["name"]}
+        PERSONALITIES[personality["id"]] = personality
+        return personality
+
+    async def update_personality(self, personality_id: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if personality_id not in PERSONALITIES:
+            return None
+        PERSONALITIES[personality_id] = {**PERSONALITIES[personality_id], **config}
+        return PERSONALITIES[personality_id]
+
+
+class ConversationService:
+    async def generate_initial_message(self, personality, scenario=None, user_profile=None,
+                                       session_id=None) -> Dict[str, Any]:
+        return await _generate([{"sender": "SYSTEM", "content": personality["id"]}])
+
+    async def generate_response(self, user_message, conversation_history, personality, scenario=None,
+                                session_id=None) -> Dict[str, Any]:
+        return await _generate(list(conversation_history) + [{"sender": "USER", "content": user_message}])
+
+    async def stream_initial_message(self, personality, scenario=None, user_profile=None,
+                                     session_id=None) -> AsyncIterator[Dict[str, Any]]:
+        async for chunk in _model.stream({"messages": [{"sender": "SYSTEM", "content": personality["id"]}]}):
+            yield chunk
+
+    async def stream_response(self, user_message, conversation_history, personality, scenario=None,
+                              session_id=None) -> AsyncIterator[Dict[str, Any]]:
+        messages = list(conversation_history) + [{"sender": "USER", "content": user_message}]
+        async for chunk in _model.stream({"messages": messages}):
+            yield chunk
+
+    async def analyze_conversation_flow(self, conversation_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+        user_messages = [m for m in conversation_history if m.get("sender") == "USER"]
+        return {
+            "message_count": len(conversation_history),
+            "user_message_count": len(user_messages),
+            "questions_asked": sum("?" in m.get("content", "") for m in user_messages),
+        }
+
+
+class FeedbackService:
+    async def generate_real_time_feedback(self, session_id, messages, session_type) -> Dict[str, Any]:
+        reply = await _generate(messages)
+        return {"session_id": session_id, "tips": [reply["content"]], "confidence": reply["confidence"]}
+
+    async def generate_comprehensive_feedback(self, session_id, messages, session_type,
+                                              difficulty_level) -> Dict[str, Any]:
+        reply = await _generate(messages)
+        return {
+            "session_id": session_id,
+            "summary": reply["content"],
+            "strengths": ["asked follow-up questions"],
+            "areas_to_work_on": ["share more about yourself"],
+            "confidence_metrics": {"overall": reply["confidence"]},
+            "message_count": len(messages),
+        }
+
+
+class AssessmentService:
+    async def analyze_skills(self, user_id, assessment_type, conversation_data,
+                             session_context=None) -> Dict[str, Any]:
+        reply = await _generate(conversation_data)
+        return {"user_id": user_id, "assessment_type": assessment_type, "overall_score": 100 * reply["confidence"]}
+
+    async def conduct_baseline_assessment(self, user_id: str) -> Dict[str, Any]:
+        reply = await _generate([{"sender": "SYSTEM", "content": user_id}])
+        return {"user_id": user_id, "baseline_score": 100 * reply["confidence"]}
+
+
+class AIModelManager:
+    async def initialize(self) -> None:
+        pass
+
+    async def cleanup(self) -> None:
+        pass
+
+    async def get_models_status(self) -> Dict[str, Any]:
+        return {"models": [{"name": _model.name, "status": "ready"}]}
+
+    async def optimize_model_selection(self) -> None:
+        pass
+
+
+class DatabaseManager:
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+
+_MODULES = {
+    "services.personality_service": {"PersonalityService": PersonalityService},
+    "services.conversation_service": {"ConversationService": ConversationService},
+    "services.feedback_service": {"FeedbackService": FeedbackService},
+    "services.assessment_service": {"AssessmentService": AssessmentService},
+    "models.ai_models": {"AIModelManager": AIModelManager},
+    "utils.logger": {"get_logger": logging.getLogger},
+    "utils.database": {"DatabaseManager": DatabaseManager},
+}
+
+
+def install(model: MockModel) -> None:
+    """Register the stand-in modules; call before importing main"""
+    global _model
+    _model = model
+    for name, attributes in _MODULES.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
@@ -3,10 +3,11 @@ AIGFNetwork AI Service
 Handles AI personality management, conversation generation, and real-time feedback.
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
 import asyncio
 import uvicorn
 from datetime import datetime
@@ -18,9 +19,29 @@ from services.personality_service import PersonalityService
 from services.conversation_service import ConversationService
 from services.feedback_service import FeedbackService
 from services.assessment_service import AssessmentService
+from services.flow_analyzer import FlowState, IncrementalFlowAnalyzer
+from services.feedback_engine import RealTimeFeedbackEngine
+from services.report_jobs import ComprehensiveReportJobs, ReportQueueFull
+from services.prompt_budget import PromptBudget
+from services.opener_pool import OpenerPool
+from services.context_manager import CompactedContext, ContextManager
+from services.batch_assessment import ConcurrentAssessor
+from services.personality_cache import PersonalityCache
 from models.ai_models import AIModelManager
+from models.batch_scheduler import BatchScheduler, service_call
+from models.router import ModelRouter
 from utils.logger import get_logger
 from utils.database import DatabaseManager
+from utils.streaming import (
+    NDJSON_MEDIA_TYPE, SSE_HEADERS, DuplexStreamingResponse, iter_ndjson, ndjson_line,
+    relay_conversation_stream, replay_as_stream
+)
+from utils.redis_client import get_redis, close_redis
+from utils.session_store import SessionStore, StaleSessionVersion, history_digest
+from utils.job_queue import PersistentJobQueue
+from utils.db_pool import DatabasePool, create_pool
+from utils.write_behind import WriteBehindBuffer
+from utils.metrics import metrics_middleware, metrics_response, stage_timer, timed_stream
 
 # Initialize logging
 logger = get_logger(__name__)
@@ -41,13 +62,119 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics, labelled by route template
+app.middleware("http")(metrics_middleware)
+
 # Initialize services
 personality_service = PersonalityService()
 conversation_service = ConversationService()
 feedback_service = FeedbackService()
 assessment_service = AssessmentService()
 ai_model_manager = AIModelManager()
+model_scheduler = BatchScheduler()
+model_router = ModelRouter(scheduler=model_scheduler)
+# Conversation, feedback and assessment calls are batched per routed model
+# when the service method has a batch entry point, and run directly otherwise
+for _model_name in model_router.models:
+    model_scheduler.register_service_calls(_model_name)
+
+async def _model_call(request_type: str, fn, *args, **kwargs) -> Any:
+    """Run a model-backed service call; routed with failover only if ``fn`` takes a model"""
+    return await model_router.submit(request_type, service_call(fn, *args, **kwargs))
 db_manager = DatabaseManager()
+# Created and opened on startup; stays None when the database is unavailable
+db_pool: Optional[DatabasePool] = None
+# Messages and analytics are written behind the request path in batches
+write_buffer = WriteBehindBuffer()
+
+async def _load_session_history(session_id: str) -> List[Dict[str, Any]]:
+    """Stored chat messages of a session, oldest first, in the session store's shape"""
+    if db_pool is None:
+        return []
+    rows = await db_pool.fetch(
+        "SELECT message_type, content, timestamp FROM chat_messages "
+        f"WHERE session_id = {db_pool.placeholder(1)} ORDER BY timestamp",
+        session_id
+    )
+    return [
+        {
+            "content": row["content"],
+            "sender": row["message_type"].upper(),
+            "timestamp": row["timestamp"].isoformat() if isinstance(row["timestamp"], datetime) else row["timestamp"]
+        }
+        for row in rows
+        if row["message_type"] in ("user", "ai")
+    ]
+
+# Sessions lost from the cache and Redis are rebuilt from the database
+session_store = SessionStore(redis=get_redis(), loader=_load_session_history)
+personality_cache = PersonalityCache(personality_service, redis=get_redis())
+prompt_budget = PromptBudget()
+opener_pool = OpenerPool(conversation_service, personality_cache, dispatch=_model_call)
+
+def _drop_derived(kind: str, key: Optional[str]) -> None:
+    """Forget prompt counts and pooled openers of a personality or scenario changed on any worker"""
+    if kind == "personality":
+        prompt_budget.invalidate(personality_id=key)
+        opener_pool.invalidate(personality_id=key)
+    elif kind == "scenario":
+        prompt_budget.invalidate(scenario_id=key)
+        opener_pool.invalidate(scenario_id=key)
+
+personality_cache.on_invalidate(_drop_derived)
+context_manager = ContextManager()
+feedback_engine = RealTimeFeedbackEngine(feedback_service, dispatch=_model_call)
+
+async def _persist_report(job) -> None:
+    """Store a finished comprehensive report as session analytics"""
+    if not job.user_id:
+        return
+    report = job.result or {}
+    await write_buffer.write("session_analytics", {
+        "session_id": job.session_id,
+        "user_id": job.user_id,
+        "analysis_data": report,
+        "confidence_metrics": report.get("confidence_metrics", {}),
+        "conversation_quality": report.get("conversation_quality", {}),
+        "improvement_suggestions": report.get("improvement_suggestions", []),
+        "strengths_identified": report.get("strengths", []),
+        "areas_to_work_on": report.get("areas_to_work_on", []),
+        "ai_performance_metrics": report.get("ai_performance_metrics", {}),
+        "generated_at": datetime.now()
+    })
+
+# The report is the one place the full-transcript flow analysis still runs
+report_jobs = ComprehensiveReportJobs(
+    feedback_service,
+    dispatch=_model_call,
+    analyze_flow=conversation_service.analyze_conversation_flow,
+    on_complete=_persist_report
+)
+
+async def _analyze_skills(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await _model_call("assessment", assessment_service.analyze_skills, **payload)
+
+# Batch items are scored by the same analyze_skills call as single requests,
+# a bounded number at a time
+batch_assessor = ConcurrentAssessor(_analyze_skills)
+
+async def _run_baseline_assessment(payload: Dict[str, Any]) -> Any:
+    with stage_timer("assessment"):
+        return await _model_call(
+            "assessment", assessment_service.conduct_baseline_assessment, payload["user_id"]
+        )
+
+# Baseline assessments run on their own bounded, persisted queue so signup
+# spikes cannot flood the event loop that serves conversations
+assessment_queue = PersistentJobQueue(
+    path=os.getenv("ASSESSMENT_QUEUE_PATH", "data/assessment_jobs.db"),
+    queue="baseline_assessment",
+    handler=_run_baseline_assessment,
+    workers=int(os.getenv("ASSESSMENT_WORKERS", "2")),
+    max_attempts=int(os.getenv("ASSESSMENT_MAX_ATTEMPTS", "3")),
+    job_timeout_seconds=float(os.getenv("ASSESSMENT_JOB_TIMEOUT", "300"))
+)
+flow_analyzer = IncrementalFlowAnalyzer()
 
 # Pydantic models
 class PersonalityType(str, Enum):
@@ -63,9 +190,12 @@ class PersonalityType(str, Enum):
 class MessageRequest(BaseModel):
     session_id: str
     user_message: str
-    conversation_history: List[Dict[str, Any]]
     personality_id: str
     scenario_id: Optional[str] = None
+    # Number of messages the client has seen; the server keeps the history itself
+    version: Optional[int] = None
+    # Deprecated: full transcript from older clients, replaces the stored history when sent
+    conversation_history: Optional[List[Dict[str, Any]]] = None
 
 class InitialMessageRequest(BaseModel):
     session_id: str
@@ -78,6 +208,7 @@ class FeedbackRequest(BaseModel):
     messages: List[Dict[str, Any]]
     session_type: str = "PRACTICE"
     difficulty_level: int = 1
+    user_id: Optional[str] = None
 
 class AssessmentRequest(BaseModel):
     user_id: str
@@ -95,6 +226,11 @@ class PersonalityConfig(BaseModel):
     system_prompt: str
     conversation_starters: List[str]
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return metrics_response()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -106,6 +242,139 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Response payload builders shared by the JSON and streaming endpoints
+def _initial_message_payload(initial_message: Dict[str, Any], personality: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "content": initial_message["content"],
+        "sentiment": initial_message.get("sentiment", "neutral"),
+        "confidence": initial_message.get("confidence", 0.8),
+        "topics": initial_message.get("topics", []),
+        "personality_context": {
+            "name": personality["display_name"],
+            "type": personality["base_type"],
+            "traits": personality["traits"]
+        }
+    }
+
+def _response_payload(response: Dict[str, Any], flow_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "content": response["content"],
+        "sentiment": response.get("sentiment", "neutral"),
+        "confidence": response.get("confidence", 0.8),
+        "topics": response.get("topics", []),
+        "emotions": response.get("emotions", []),
+        "conversation_flow": flow_analysis,
+        "personality_adaptation": response.get("personality_adaptation", {})
+    }
+
+async def _load_personality_and_scenario(
+    personality_id: str, scenario_id: Optional[str]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], int]:
+    with stage_timer("personality_lookup"):
+        personality = await personality_cache.get_personality(personality_id)
+    if not personality:
+        raise HTTPException(status_code=404, detail="Personality not found")
+    
+    scenario = None
+    if scenario_id:
+        with stage_timer("scenario_lookup"):
+            scenario = await personality_cache.get_scenario(scenario_id)
+    
+    # Tokens the service's personality/scenario prompt takes, counted once per pair
+    return personality, scenario, prompt_budget.reserved_tokens(personality, scenario, personality_id=personality_id)
+
+# Session history helpers
+def _message(sender: str, content: str) -> Dict[str, Any]:
+    return {"content": content, "sender": sender, "timestamp": datetime.now().isoformat()}
+
+async def _resolve_history(request: MessageRequest) -> Tuple[List[Dict[str, Any]], int]:
+    """Return the conversation history for a turn and the version it corresponds to"""
+    with stage_timer("session_store"):
+        state = await session_store.get(request.session_id)
+        if request.conversation_history is not None:
+            if state.digest != history_digest(request.conversation_history):
+                state = await session_store.replace(request.session_id, request.conversation_history)
+            return request.conversation_history, state.version
+        
+        if request.version is not None and request.version > state.version:
+            # The client has seen messages this store lost (LRU eviction or
+            # Redis expiry): rebuild from the database rather than reject
+            recovered = await session_store.recover(request.session_id)
+            if recovered is None:
+                logger.warning(
+                    f"Session {request.session_id} history unavailable, continuing without it"
+                )
+            else:
+                state = recovered
+                history = state.history
+                # The current message may already be stored ahead of the reply
+                if history and history[-1]["sender"] == "USER" and history[-1]["content"] == request.user_message:
+                    state = await session_store.replace(request.session_id, history[:-1])
+            return list(state.history), state.version
+    
+    if request.version is not None and request.version < state.version:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Stale session version", "version": state.version}
+        )
+    return list(state.history), state.version
+
+def _compact_history(
+    session_id: str, history: List[Dict[str, Any]], prompt_tokens: int
+) -> CompactedContext:
+    """Fit the history next to the personality prompt within the conversation model's budget"""
+    try:
+        model = model_router.serving_model("conversation", conversation_service.generate_response)
+    except KeyError:
+        model = None
+    with stage_timer("context"):
+        return context_manager.compact(
+            session_id, history, model=model, reserved_tokens=prompt_tokens
+        )
+
+async def _record_turn(
+    session_id: str,
+    personality_id: str,
+    version: int,
+    user_entry: Dict[str, Any],
+    reply: str,
+    flow_state: FlowState
+) -> int:
+    """Append the user message and AI reply to the stored history, flow state and database"""
+    ai_entry = _message("AI", reply)
+    try:
+        with stage_timer("session_store"):
+            state = await session_store.append(
+                session_id,
+                [user_entry, ai_entry],
+                expected_version=version
+            )
+    except StaleSessionVersion as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Stale session version", "version": e.current}
+        )
+    flow_analyzer.commit_turn(session_id, flow_state, ai_entry)
+    
+    for entry in (user_entry, ai_entry):
+        await write_buffer.write("chat_messages", {
+            "session_id": session_id,
+            "message_type": entry["sender"].lower(),
+            "content": entry["content"],
+            "ai_personality_id": personality_id,
+            "timestamp": datetime.fromisoformat(entry["timestamp"]),
+            "message_metadata": {"version": state.version}
+        })
+    return state.version
+
+def _require_stream_method(name: str) -> None:
+    """Streaming generation needs a conversation service that implements ``name``"""
+    if not hasattr(conversation_service, name):
+        raise HTTPException(
+            status_code=501,
+            detail="Streaming generation is not supported by this conversation service"
+        )
+
 # AI Conversation Endpoints
 @app.post("/api/conversation/initial-message")
 async def generate_initial_message(request: InitialMessageRequest):
@@ -113,35 +382,87 @@ async def generate_initial_message(request: InitialMessageRequest):
     try:
         logger.info(f"Generating initial message for session {request.session_id}")
         
-        personality = await personality_service.get_personality(request.personality_id)
-        if not personality:
-            raise HTTPException(status_code=404, detail="Personality not found")
+        personality, scenario, prompt_tokens = await _load_personality_and_scenario(
+            request.personality_id, request.scenario_id
+        )
         
-        scenario = None
-        if request.scenario_id:
-            scenario = await personality_service.get_scenario(request.scenario_id)
+        # Session starts draw from the pre-generated pool, then the personality's starters
+        initial_message = (
+            opener_pool.draw(request.personality_id, request.scenario_id, request.user_profile)
+            or opener_pool.fallback(personality)
+        )
+        if initial_message is None:
+            with stage_timer("generation"):
+                initial_message = await _model_call(
+                    "conversation",
+                    conversation_service.generate_initial_message,
+                    personality=personality,
+                    scenario=scenario,
+                    user_profile=request.user_profile,
+                    session_id=request.session_id
+                )
+        
+        with stage_timer("session_store"):
+            state = await session_store.replace(
+                request.session_id, [_message("AI", initial_message["content"])]
+            )
+        
+        payload = _initial_message_payload(initial_message, personality)
+        payload["version"] = state.version
+        return payload
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating initial message: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to generate initial message")
+
+@app.post("/api/conversation/initial-message/stream")
+async def stream_initial_message(request: InitialMessageRequest):
+    """Stream the initial conversation message as Server-Sent Events"""
+    try:
+        logger.info(f"Streaming initial message for session {request.session_id}")
         
-        initial_message = await conversation_service.generate_initial_message(
-            personality=personality,
-            scenario=scenario,
-            user_profile=request.user_profile,
-            session_id=request.session_id
+        personality, scenario, prompt_tokens = await _load_personality_and_scenario(
+            request.personality_id, request.scenario_id
         )
         
-        return {
-            "content": initial_message["content"],
-            "sentiment": initial_message.get("sentiment", "neutral"),
-            "confidence": initial_message.get("confidence", 0.8),
-            "topics": initial_message.get("topics", []),
-            "personality_context": {
-                "name": personality["display_name"],
-                "type": personality["base_type"],
-                "traits": personality["traits"]
-            }
-        }
+        opener = (
+            opener_pool.draw(request.personality_id, request.scenario_id, request.user_profile)
+            or opener_pool.fallback(personality)
+        )
+        if opener is not None:
+            chunks = replay_as_stream(opener)
+        else:
+            _require_stream_method("stream_initial_message")
+            chunks = timed_stream("generation", model_router.stream(
+                "conversation",
+                conversation_service.stream_initial_message,
+                personality=personality,
+                scenario=scenario,
+                user_profile=request.user_profile,
+                session_id=request.session_id
+            ))
+        
+        async def build_final(initial_message: Dict[str, Any]) -> Dict[str, Any]:
+            with stage_timer("session_store"):
+                state = await session_store.replace(
+                    request.session_id, [_message("AI", initial_message["content"])]
+                )
+            payload = _initial_message_payload(initial_message, personality)
+            payload["version"] = state.version
+            return payload
+        
+        return StreamingResponse(
+            relay_conversation_stream(chunks, build_final, request.session_id),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error generating initial message: {str(e)}")
+        logger.error(f"Error streaming initial message: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate initial message")
 
 @app.post("/api/conversation/response")
@@ -150,39 +471,87 @@ async def generate_response(request: MessageRequest):
     try:
         logger.info(f"Generating response for session {request.session_id}")
         
-        personality = await personality_service.get_personality(request.personality_id)
-        if not personality:
-            raise HTTPException(status_code=404, detail="Personality not found")
+        personality, scenario, prompt_tokens = await _load_personality_and_scenario(
+            request.personality_id, request.scenario_id
+        )
         
-        scenario = None
-        if request.scenario_id:
-            scenario = await personality_service.get_scenario(request.scenario_id)
+        history, version = await _resolve_history(request)
+        context = _compact_history(request.session_id, history, prompt_tokens)
+        user_entry = _message("USER", request.user_message)
+        # Per-turn flow comes from the running session state; the full
+        # transcript analysis only runs for the comprehensive report
+        with stage_timer("flow_analysis"):
+            flow_state, flow_analysis = flow_analyzer.analyze_turn(request.session_id, history, user_entry)
+        
+        with stage_timer("generation"):
+            response = await _model_call(
+                "conversation",
+                conversation_service.generate_response,
+                user_message=request.user_message,
+                conversation_history=context.history,
+                personality=personality,
+                scenario=scenario,
+                session_id=request.session_id
+            )
+        
+        payload = _response_payload(response, flow_analysis)
+        payload["context"] = context.to_dict()
+        payload["version"] = await _record_turn(
+            request.session_id, request.personality_id, version, user_entry, response["content"], flow_state
+        )
+        return payload
         
-        response = await conversation_service.generate_response(
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating response: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to generate response")
+
+@app.post("/api/conversation/response/stream")
+async def stream_response(request: MessageRequest):
+    """Stream AI response deltas as Server-Sent Events, followed by a metadata frame"""
+    try:
+        logger.info(f"Streaming response for session {request.session_id}")
+        _require_stream_method("stream_response")
+        
+        personality, scenario, prompt_tokens = await _load_personality_and_scenario(
+            request.personality_id, request.scenario_id
+        )
+        
+        history, version = await _resolve_history(request)
+        context = _compact_history(request.session_id, history, prompt_tokens)
+        user_entry = _message("USER", request.user_message)
+        with stage_timer("flow_analysis"):
+            flow_state, flow_analysis = flow_analyzer.analyze_turn(request.session_id, history, user_entry)
+        
+        chunks = timed_stream("generation", model_router.stream(
+            "conversation",
+            conversation_service.stream_response,
             user_message=request.user_message,
-            conversation_history=request.conversation_history,
+            conversation_history=context.history,
             personality=personality,
             scenario=scenario,
             session_id=request.session_id
+        ))
+        
+        async def build_final(response: Dict[str, Any]) -> Dict[str, Any]:
+            payload = _response_payload(response, flow_analysis)
+            payload["context"] = context.to_dict()
+            payload["version"] = await _record_turn(
+                request.session_id, request.personality_id, version, user_entry, response["content"], flow_state
+            )
+            return payload
+        
+        return StreamingResponse(
+            relay_conversation_stream(chunks, build_final, request.session_id),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
         )
         
-        # Analyze conversation flow
-        flow_analysis = await conversation_service.analyze_conversation_flow(
-            request.conversation_history + [{"content": request.user_message, "sender": "USER"}]
-        )
-        
-        return {
-            "content": response["content"],
-            "sentiment": response.get("sentiment", "neutral"),
-            "confidence": response.get("confidence", 0.8),
-            "topics": response.get("topics", []),
-            "emotions": response.get("emotions", []),
-            "conversation_flow": flow_analysis,
-            "personality_adaptation": response.get("personality_adaptation", {})
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error generating response: {str(e)}")
+        logger.error(f"Error streaming response: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate response")
 
 # Feedback Endpoints
@@ -192,11 +561,13 @@ async def generate_real_time_feedback(request: FeedbackRequest):
     try:
         logger.info(f"Generating real-time feedback for session {request.session_id}")
         
-        feedback = await feedback_service.generate_real_time_feedback(
-            session_id=request.session_id,
-            messages=request.messages,
-            session_type=request.session_type
-        )
+        # Bursts for the same session are coalesced; superseded computations are cancelled
+        with stage_timer("feedback"):
+            feedback = await feedback_engine.submit(
+                session_id=request.session_id,
+                messages=request.messages,
+                session_type=request.session_type
+            )
         
         return feedback
         
@@ -210,19 +581,58 @@ async def generate_comprehensive_feedback(request: FeedbackRequest):
     try:
         logger.info(f"Generating comprehensive feedback for session {request.session_id}")
         
-        feedback_report = await feedback_service.generate_comprehensive_feedback(
+        # Served from the report cache when these inputs were already processed
+        job = report_jobs.submit(
             session_id=request.session_id,
             messages=request.messages,
             session_type=request.session_type,
-            difficulty_level=request.difficulty_level
+            difficulty_level=request.difficulty_level,
+            user_id=request.user_id
         )
+        with stage_timer("feedback"):
+            job = await report_jobs.wait(job)
+        if job.status != "completed":
+            raise RuntimeError(job.error)
         
-        return feedback_report
+        return job.result
         
+    except ReportQueueFull as e:
+        logger.error(f"Error generating comprehensive feedback: {str(e)}")
+        raise HTTPException(status_code=503, detail="Feedback report queue is full")
     except Exception as e:
         logger.error(f"Error generating comprehensive feedback: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to generate comprehensive feedback")
 
+@app.post("/api/feedback/comprehensive/jobs", status_code=202)
+async def submit_comprehensive_feedback_job(request: FeedbackRequest):
+    """Queue a comprehensive feedback report and return its job id"""
+    try:
+        logger.info(f"Queueing comprehensive feedback for session {request.session_id}")
+        
+        job = report_jobs.submit(
+            session_id=request.session_id,
+            messages=request.messages,
+            session_type=request.session_type,
+            difficulty_level=request.difficulty_level,
+            user_id=request.user_id
+        )
+        return job.to_dict()
+        
+    except ReportQueueFull as e:
+        logger.error(f"Error queueing comprehensive feedback: {str(e)}")
+        raise HTTPException(status_code=503, detail="Feedback report queue is full")
+    except Exception as e:
+        logger.error(f"Error queueing comprehensive feedback: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to queue comprehensive feedback")
+
+@app.get("/api/feedback/comprehensive/jobs/{job_id}")
+async def get_comprehensive_feedback_job(job_id: str):
+    """Poll a comprehensive feedback job"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Feedback job not found")
+    return job.to_dict()
+
 # Assessment Endpoints
 @app.post("/api/assessment/analyze")
 async def analyze_conversation_skills(request: AssessmentRequest):
@@ -230,12 +640,8 @@ async def analyze_conversation_skills(request: AssessmentRequest):
     try:
         logger.info(f"Analyzing conversation skills for user {request.user_id}")
         
-        assessment_result = await assessment_service.analyze_skills(
-            user_id=request.user_id,
-            assessment_type=request.assessment_type,
-            conversation_data=request.conversation_data,
-            session_context=request.session_context
-        )
+        with stage_timer("assessment"):
+            assessment_result = await _analyze_skills(request.dict())
         
         return assessment_result
         
@@ -243,34 +649,120 @@ async def analyze_conversation_skills(request: AssessmentRequest):
         logger.error(f"Error analyzing conversation skills: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to analyze conversation skills")
 
+async def _assessment_batch_items(
+    raw_items: AsyncIterator[Tuple[Any, Optional[str]]]
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Validate batch entries one by one; invalid entries are reported, not raised"""
+    index = 0
+    async for raw, error in raw_items:
+        payload = raw if isinstance(raw, dict) else None
+        if error is None and payload is None:
+            error = "Expected a JSON object"
+        if error is None:
+            try:
+                payload = AssessmentRequest(**payload).dict()
+            except ValidationError as e:
+                error = str(e)
+        yield index, payload, error
+        index += 1
+
+async def _json_items(items: List[Any]) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    for item in items:
+        yield item, None
+
+@app.post("/api/assessment/analyze/batch")
+async def analyze_conversation_skills_batch(request: Request):
+    """
+    Score many assessment requests in one call.
+    
+    Accepts a JSON list (or {"requests": [...]}) or an NDJSON request body and
+    streams one NDJSON result per item as it completes, followed by a summary
+    line. Items are scored exactly like /api/assessment/analyze; invalid items
+    are reported individually.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        raw_items = iter_ndjson(request.stream())
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be JSON or NDJSON")
+        if isinstance(body, dict):
+            body = body.get("requests")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a list of assessment requests")
+        raw_items = _json_items(body)
+    
+    logger.info("Starting batch skill assessment")
+    results = batch_assessor.assess(_assessment_batch_items(raw_items))
+    
+    async def encode() -> AsyncIterator[str]:
+        async for result in results:
+            yield ndjson_line(result)
+    
+    return DuplexStreamingResponse(encode(), media_type=NDJSON_MEDIA_TYPE)
+
+@app.get("/api/assessment/analyze/batch/stats")
+async def get_batch_assessment_stats():
+    """Item and failure counters and the concurrency limit for batch skill assessment"""
+    return batch_assessor.stats()
+
 @app.post("/api/assessment/baseline")
-async def conduct_baseline_assessment(user_id: str, background_tasks: BackgroundTasks):
+async def conduct_baseline_assessment(user_id: str, priority: int = 0):
     """Conduct baseline assessment for new user"""
     try:
         logger.info(f"Conducting baseline assessment for user {user_id}")
         
-        # Start background assessment process
-        background_tasks.add_task(
-            assessment_service.conduct_baseline_assessment,
-            user_id
-        )
+        # Persist the assessment job; a queue worker picks it up
+        with stage_timer("db"):
+            job = await assessment_queue.enqueue({"user_id": user_id}, priority=priority)
         
         return {
-            "message": "Baseline assessment started",
+            "message": "Baseline assessment queued",
             "user_id": user_id,
-            "status": "in_progress"
+            "job_id": job["id"],
+            "status": job["status"]
         }
         
     except Exception as e:
         logger.error(f"Error starting baseline assessment: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to start baseline assessment")
 
+@app.get("/api/assessment/jobs/{job_id}")
+async def get_assessment_job(job_id: str):
+    """Get status of a queued assessment job"""
+    try:
+        with stage_timer("db"):
+            job = await assessment_queue.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Assessment job not found")
+        
+        return {
+            "job_id": job["id"],
+            "user_id": job["payload"].get("user_id"),
+            "status": job["status"],
+            "priority": job["priority"],
+            "attempts": job["attempts"],
+            "max_attempts": job["max_attempts"],
+            "result": job["result"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching assessment job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch assessment job")
+
 # Personality Management Endpoints
 @app.get("/api/personalities")
 async def get_all_personalities():
     """Get all available AI personalities"""
     try:
-        personalities = await personality_service.get_all_personalities()
+        personalities = await personality_cache.get_all_personalities()
         return {"personalities": personalities}
         
     except Exception as e:
@@ -281,7 +773,7 @@ async def get_all_personalities():
 async def get_personality(personality_id: str):
     """Get specific AI personality"""
     try:
-        personality = await personality_service.get_personality(personality_id)
+        personality = await personality_cache.get_personality(personality_id)
         if not personality:
             raise HTTPException(status_code=404, detail="Personality not found")
         
@@ -296,6 +788,7 @@ async def create_personality(config: PersonalityConfig):
     """Create new AI personality"""
     try:
         personality = await personality_service.create_personality(config.dict())
+        await personality_cache.invalidate_personality(personality.get("id") if personality else None)
         return {
             "message": "Personality created successfully",
             "personality": personality
@@ -310,6 +803,8 @@ async def update_personality(personality_id: str, config: PersonalityConfig):
     """Update existing AI personality"""
     try:
         personality = await personality_service.update_personality(personality_id, config.dict())
+        # Also drops the personality's prompt counts and pooled openers on every worker
+        await personality_cache.invalidate_personality(personality_id)
         if not personality:
             raise HTTPException(status_code=404, detail="Personality not found")
         
@@ -322,12 +817,35 @@ async def update_personality(personality_id: str, config: PersonalityConfig):
         logger.error(f"Error updating personality {personality_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update personality")
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the personality, scenario, prompt budget and opener caches"""
+    stats = personality_cache.stats()
+    stats["prompt_budgets"] = prompt_budget.stats()
+    stats["openers"] = opener_pool.stats()
+    stats["context_summaries"] = context_manager.stats()
+    return stats
+
+@app.get("/api/feedback/real-time/stats")
+async def get_real_time_feedback_stats():
+    """Coalescing and batching counters for the real-time feedback engine"""
+    return feedback_engine.stats()
+
 # Model Management Endpoints
+@app.get("/api/database/stats")
+async def get_database_stats():
+    """Connection pool, write-behind buffer and assessment job queue counters"""
+    stats = write_buffer.stats()
+    stats["assessment_queue"] = await assessment_queue.stats()
+    return stats
+
 @app.get("/api/models/status")
 async def get_model_status():
     """Get status of all AI models"""
     try:
         status = await ai_model_manager.get_models_status()
+        status["batching"] = model_scheduler.stats()
+        status["routing"] = model_router.routing_table()
         return status
         
     except Exception as e:
@@ -339,10 +857,13 @@ async def optimize_model_selection(background_tasks: BackgroundTasks):
     """Optimize model selection based on performance metrics"""
     try:
         background_tasks.add_task(ai_model_manager.optimize_model_selection)
+        # Routing is re-evaluated continuously; this only skips the refresh interval
+        model_router.refresh()
         
         return {
             "message": "Model optimization started",
-            "status": "in_progress"
+            "status": "in_progress",
+            "routing": model_router.routing_table()
         }
         
     except Exception as e:
@@ -353,16 +874,38 @@ async def optimize_model_selection(background_tasks: BackgroundTasks):
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
+    global db_pool
     logger.info("Starting AIGFNetwork AI Service...")
     
-    # Initialize database connections
+    # Initialize database connections; the service runs without persistence
+    # when the database is missing or unreachable
     await db_manager.connect()
+    try:
+        pool = create_pool()
+        await pool.open()
+        db_pool = pool
+        await write_buffer.start(db_pool)
+    except Exception as e:
+        logger.error(f"Write-behind persistence and session recovery disabled: {str(e)}")
     
     # Initialize AI models
     await ai_model_manager.initialize()
     
     # Load personalities
     await personality_service.load_personalities()
+    await personality_cache.start()
+    
+    # Keep an opener pool warm for every personality
+    try:
+        for summary in await personality_cache.get_all_personalities():
+            opener_pool.register(summary["id"])
+    except Exception as e:
+        logger.error(f"Failed to register opener pools: {str(e)}")
+    await opener_pool.start()
+    
+    # Start comprehensive feedback and assessment workers
+    await report_jobs.start()
+    await assessment_queue.start()
     
     logger.info("AIGFNetwork AI Service started successfully")
 
@@ -371,10 +914,20 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down AIGFNetwork AI Service...")
     
-    # Close database connections
+    await opener_pool.stop()
+    await personality_cache.stop()
+    await report_jobs.stop()
+    await assessment_queue.stop()
+    
+    # Flush buffered writes, then close database connections
+    await write_buffer.stop()
+    if db_pool is not None:
+        await db_pool.close()
     await db_manager.disconnect()
+    await close_redis()
     
     # Cleanup AI models
+    await model_scheduler.drain()
     await ai_model_manager.cleanup()
     
     logger.info("AIGFNetwork AI Service shut down successfully")
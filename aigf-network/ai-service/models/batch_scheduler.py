@@ -0,0 +1,182 @@
+"""
+Dynamic request batching for AIModelManager.
+
+Every conversation, feedback and assessment request is a single model call.
+The scheduler keeps one queue per model, collects requests that arrive within
+a short window (or until the batch is full), runs them as one batched
+inference and hands each caller its own result.
+
+Models served through the service layer (ConversationService and
+FeedbackService talk to the provider themselves) are registered with
+``register_service_calls`` and receive ``service_call`` requests. A call is
+only queued when its service method has a batch entry point: a
+``<method>_batch`` method on the same object that takes a list of
+keyword-argument dicts and returns one result (or exception) per dict.
+Calls without one run directly, so they never wait for a batch window that
+would not save any inference.
+"""
+
+import asyncio
+import functools
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.batching import MicroBatcher
+from utils.logger import get_logger
+from utils.signatures import optional_kwargs
+
+logger = get_logger(__name__)
+
+MODEL_BATCH_SIZE = int(os.getenv("MODEL_BATCH_SIZE", "8"))
+MODEL_BATCH_WAIT_MS = float(os.getenv("MODEL_BATCH_WAIT_MS", "10"))
+
+# Suffix of a service method's batch entry point
+BATCH_SUFFIX = "_batch"
+
+
+class UnknownModel(KeyError):
+    """Raised when a request targets a model without a registered backend"""
+
+
+# dispatch(request_type, fn, *args, **kwargs): how services run a model-backed call
+ModelDispatch = Callable[..., Awaitable[Any]]
+
+
+async def call_directly(request_type: str, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+    """Dispatch that bypasses scheduling, for services used without a scheduler"""
+    return await fn(*args, **kwargs)
+
+
+def batch_entry(fn: Callable[..., Any]) -> Optional[Callable[..., Awaitable[List[Any]]]]:
+    """The ``<method>_batch`` counterpart of a bound service method, if its object has one"""
+    owner = getattr(fn, "__self__", None)
+    name = getattr(fn, "__name__", None)
+    if owner is None or name is None:
+        return None
+    return getattr(owner, name + BATCH_SUFFIX, None)
+
+
+def service_call(fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """Scheduler request that runs one service coroutine on the model it is routed to"""
+    # Only keyword calls can be handed to a batch entry point
+    batch = batch_entry(fn) if not args else None
+    return {"call": fn, "batch": batch, "args": args, "kwargs": kwargs}
+
+
+async def run_service_calls(model_name: str, requests: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Batch function for service-layer models: requests for the same service
+    method go to its batch entry point in one call. Failures are returned
+    per request.
+    """
+    groups: Dict[Callable[..., Any], List[int]] = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(request["batch"], []).append(index)
+
+    results: List[Any] = [None] * len(requests)
+
+    async def run_group(batch_fn: Callable[..., Awaitable[List[Any]]], indexes: List[int]) -> None:
+        try:
+            outputs = await batch_fn(
+                [requests[index]["kwargs"] for index in indexes],
+                **optional_kwargs(batch_fn, model=model_name)
+            )
+            if len(outputs) != len(indexes):
+                raise RuntimeError(
+                    f"{getattr(batch_fn, '__name__', 'batch')} returned {len(outputs)} results for {len(indexes)} calls"
+                )
+        except Exception as e:
+            outputs = [e] * len(indexes)
+        for index, output in zip(indexes, outputs):
+            results[index] = output
+
+    await asyncio.gather(*(run_group(batch_fn, indexes) for batch_fn, indexes in groups.items()))
+    return results
+
+
+class BatchScheduler:
+    """Per-model batching queues in front of the inference backends"""
+
+    def __init__(
+        self,
+        max_batch_size: int = MODEL_BATCH_SIZE,
+        max_wait_ms: float = MODEL_BATCH_WAIT_MS,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self.direct_calls = 0
+
+    def register(
+        self,
+        model_name: str,
+        batch_fn: Callable[[List[Dict[str, Any]]], Any],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        blocking: bool = False,
+    ) -> None:
+        """
+        Register the batched inference function for a model.
+
+        ``batch_fn`` takes a list of requests and returns one result per
+        request. Set ``blocking`` for synchronous backends (local torch or
+        transformers pipelines) so batches run in a worker thread.
+        """
+        if blocking:
+            async def run(requests: List[Dict[str, Any]]) -> List[Any]:
+                return await asyncio.to_thread(batch_fn, requests)
+        else:
+            run = batch_fn
+
+        self._batchers[model_name] = MicroBatcher(
+            run,
+            max_batch_size=max_batch_size or self.max_batch_size,
+            max_wait=(max_wait_ms if max_wait_ms is not None else self.max_wait_ms) / 1000,
+            name=model_name,
+        )
+        logger.info(f"Registered batched backend for model {model_name}")
+
+    def register_service_calls(self, model_name: str, **options: Any) -> None:
+        """Serve ``model_name`` by running batches of ``service_call`` requests"""
+        self.register(model_name, functools.partial(run_service_calls, model_name), **options)
+
+    def unregister(self, model_name: str) -> None:
+        self._batchers.pop(model_name, None)
+
+    @property
+    def models(self) -> List[str]:
+        return list(self._batchers)
+
+    async def submit(self, model_name: str, request: Dict[str, Any]) -> Any:
+        """Queue one request for ``model_name`` and wait for its result"""
+        batcher = self._batchers.get(model_name)
+        if batcher is None:
+            raise UnknownModel(model_name)
+        return await batcher.submit(request)
+
+    async def run(self, model_name: str, request: Dict[str, Any]) -> Any:
+        """
+        Run a ``service_call`` on ``model_name``: queued for a batch when the
+        callee has a batch entry point and the model is registered, called
+        directly otherwise.
+        """
+        if request["batch"] is not None and model_name in self._batchers:
+            return await self._batchers[model_name].submit(request)
+        self.direct_calls += 1
+        fn = request["call"]
+        return await fn(*request["args"], **{**optional_kwargs(fn, model=model_name), **request["kwargs"]})
+
+    def queue_depth(self, model_name: str) -> int:
+        batcher = self._batchers.get(model_name)
+        if batcher is None:
+            return 0
+        return batcher.queue_depth + batcher.inflight_items
+
+    async def drain(self) -> None:
+        await asyncio.gather(*(b.drain() for b in self._batchers.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": {name: batcher.stats() for name, batcher in self._batchers.items()},
+            "direct_calls": self.direct_calls,
+        }
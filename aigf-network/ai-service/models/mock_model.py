@@ -0,0 +1,84 @@
+"""
+Deterministic stand-in for a generation model.
+
+Used for local testing and benchmarks: replies depend only on the request
+content, and latency follows a fixed per-call cost plus a small per-item
+cost, which is how batched inference on real hardware behaves.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Dict, List
+
+_PHRASES = [
+    "That sounds really interesting, tell me more.",
+    "I love that! What got you into it?",
+    "Ha, I didn't expect that. How did it go?",
+    "I can relate to that. What happened next?",
+    "That's a great point. Have you always felt that way?",
+    "Oh nice, I've been wanting to try that myself.",
+    "What was the best part about it for you?",
+    "I hear you. That must have been a lot to handle.",
+]
+
+
+def _request_text(request: Dict[str, Any]) -> str:
+    if "prompt" in request:
+        return str(request["prompt"])
+    messages = request.get("messages") or []
+    return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+class MockModel:
+    """Deterministic batched model with configurable latency"""
+
+    def __init__(
+        self,
+        name: str = "mock",
+        call_latency: float = 0.05,
+        item_latency: float = 0.002,
+        token_latency: float = 0.0,
+        sentences: int = 2,
+    ):
+        self.name = name
+        self.call_latency = call_latency
+        self.item_latency = item_latency
+        self.token_latency = token_latency
+        self.sentences = sentences
+        self.calls = 0
+        self.items = 0
+
+    def _reply(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        digest = hashlib.sha256(_request_text(request).encode("utf-8")).digest()
+        content = " ".join(
+            _PHRASES[digest[i] % len(_PHRASES)] for i in range(self.sentences)
+        )
+        return {
+            "content": content,
+            "model": self.name,
+            "sentiment": "positive" if digest[-1] % 3 else "neutral",
+            "confidence": round(0.6 + (digest[-2] % 40) / 100, 2),
+            "usage": {
+                "prompt_tokens": len(_request_text(request).split()),
+                "completion_tokens": len(content.split()),
+            },
+        }
+
+    async def generate_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        self.items += len(requests)
+        await asyncio.sleep(self.call_latency + self.item_latency * len(requests))
+        return [self._reply(request) for request in requests]
+
+    async def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self.generate_batch([request]))[0]
+
+    async def stream(self, request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the reply word by word, then a final metadata chunk"""
+        await asyncio.sleep(self.call_latency)
+        reply = self._reply(request)
+        for index, word in enumerate(reply["content"].split(" ")):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield {"delta": word if index == 0 else " " + word}
+        yield {"done": True, **reply}
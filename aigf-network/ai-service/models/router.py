@@ -0,0 +1,275 @@
+"""
+Latency-aware model routing.
+
+Tracks rolling latency percentiles, error rate and queue depth for every model
+and sends each request type to the first candidate that currently meets its
+latency SLO. Models that start failing are ejected for a cooldown period and
+traffic fails over to the next candidate.
+
+Routing only applies to callees that take a ``model`` argument. Any other
+call runs on the provider its service is configured with (``service_model``),
+exactly once, and its outcome is recorded against that model.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from models.batch_scheduler import BatchScheduler
+from utils.logger import get_logger
+from utils.signatures import accepts
+from utils.tokens import DEFAULT_MODEL
+
+logger = get_logger(__name__)
+
+ROUTER_WINDOW_SECONDS = float(os.getenv("MODEL_ROUTER_WINDOW_SECONDS", "300"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.2"))
+ROUTER_MAX_QUEUE_DEPTH = int(os.getenv("MODEL_ROUTER_MAX_QUEUE_DEPTH", "64"))
+ROUTER_EJECT_SECONDS = float(os.getenv("MODEL_ROUTER_EJECT_SECONDS", "30"))
+# Model the service layer uses when it is not told which one to call
+SERVICE_MODEL = os.getenv("MODEL_ROUTER_SERVICE_MODEL", DEFAULT_MODEL)
+
+DEFAULT_ROUTES = {
+    "conversation": {"candidates": [DEFAULT_MODEL, "gpt-3.5-turbo"], "p95_slo_ms": 2500},
+    "feedback": {"candidates": [DEFAULT_MODEL, "gpt-3.5-turbo"], "p95_slo_ms": 4000},
+    "assessment": {"candidates": [DEFAULT_MODEL], "p95_slo_ms": 10000},
+}
+
+
+def load_routes() -> Dict[str, Dict[str, Any]]:
+    """Routes from MODEL_ROUTING_CONFIG (inline JSON or a path to a JSON file)"""
+    raw = os.getenv("MODEL_ROUTING_CONFIG")
+    if not raw:
+        return DEFAULT_ROUTES
+    if os.path.isfile(raw):
+        with open(raw) as f:
+            return json.load(f)
+    return json.loads(raw)
+
+
+class ModelStats:
+    """Rolling window of call outcomes for one model"""
+
+    def __init__(self, window_seconds: float, max_samples: int):
+        self.window_seconds = window_seconds
+        self.samples: Deque[Tuple[float, float, bool]] = deque(maxlen=max_samples)
+        self.ejected_until = 0.0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.samples.append((time.monotonic(), latency, ok))
+
+    def summary(self) -> Dict[str, Any]:
+        cutoff = time.monotonic() - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+
+        count = len(self.samples)
+        if not count:
+            return {"samples": 0, "p50_ms": None, "p95_ms": None, "error_rate": 0.0}
+
+        latencies = sorted(latency for _, latency, ok in self.samples if ok)
+        errors = sum(1 for _, _, ok in self.samples if not ok)
+
+        def percentile(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(q * len(latencies)))
+            return round(latencies[index] * 1000, 1)
+
+        return {
+            "samples": count,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "error_rate": round(errors / count, 4),
+        }
+
+
+class ModelRouter:
+    """Keeps a live routing table from request type to model"""
+
+    def __init__(
+        self,
+        scheduler: Optional[BatchScheduler] = None,
+        routes: Optional[Dict[str, Dict[str, Any]]] = None,
+        window_seconds: float = ROUTER_WINDOW_SECONDS,
+        max_samples: int = 2000,
+        min_samples: int = 20,
+        max_error_rate: float = ROUTER_MAX_ERROR_RATE,
+        max_queue_depth: int = ROUTER_MAX_QUEUE_DEPTH,
+        eject_seconds: float = ROUTER_EJECT_SECONDS,
+        refresh_seconds: float = 1.0,
+        queue_depth: Optional[Callable[[str], int]] = None,
+        service_model: str = SERVICE_MODEL,
+    ):
+        self.scheduler = scheduler
+        self.service_model = service_model
+        self.routes = routes or load_routes()
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.max_queue_depth = max_queue_depth
+        self.eject_seconds = eject_seconds
+        self.refresh_seconds = refresh_seconds
+        self.queue_depth = queue_depth or (scheduler.queue_depth if scheduler else (lambda model: 0))
+        self._stats: Dict[str, ModelStats] = {}
+        self._table: Dict[str, List[str]] = {}
+        self._health: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at = 0.0
+
+    @property
+    def models(self) -> List[str]:
+        """Every model that is a candidate for some request type, and the service model"""
+        models: List[str] = [self.service_model]
+        for route in self.routes.values():
+            models.extend(m for m in route.get("candidates", []) if m not in models)
+        return models
+
+    def _model_stats(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = ModelStats(self.window_seconds, self.max_samples)
+        return stats
+
+    def record(self, model: str, latency: float, ok: bool) -> None:
+        """Record the outcome of one model call"""
+        stats = self._model_stats(model)
+        stats.record(latency, ok)
+        if not ok:
+            summary = stats.summary()
+            if summary["samples"] >= self.min_samples and summary["error_rate"] > self.max_error_rate:
+                if stats.ejected_until < time.monotonic():
+                    logger.warning(f"Ejecting model {model}: error rate {summary['error_rate']}")
+                stats.ejected_until = time.monotonic() + self.eject_seconds
+                self._refreshed_at = 0.0
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """Recompute each request type's candidate order from live stats"""
+        now = time.monotonic()
+        health: Dict[str, Dict[str, Any]] = {}
+        table: Dict[str, List[str]] = {}
+
+        for request_type, route in self.routes.items():
+            slo_ms = route.get("p95_slo_ms")
+            healthy, degraded, ejected = [], [], []
+            for model in route.get("candidates", []):
+                stats = self._model_stats(model)
+                summary = stats.summary()
+                summary["queue_depth"] = self.queue_depth(model)
+                summary["ejected"] = stats.ejected_until > now
+
+                # Too few samples to judge counts as meeting the SLO
+                meets_slo = (
+                    slo_ms is None
+                    or summary["p95_ms"] is None
+                    or summary["samples"] < self.min_samples
+                    or summary["p95_ms"] <= slo_ms
+                )
+                summary["meets_slo"] = meets_slo
+                health[model] = summary
+
+                if summary["ejected"]:
+                    ejected.append(model)
+                elif meets_slo and summary["queue_depth"] <= self.max_queue_depth:
+                    healthy.append(model)
+                else:
+                    degraded.append(model)
+
+            # Preference order among healthy models; degraded ones by observed p95
+            degraded.sort(key=lambda m: health[m]["p95_ms"] if health[m]["p95_ms"] is not None else float("inf"))
+            table[request_type] = healthy + degraded + ejected
+
+        self._table = table
+        self._health = health
+        self._refreshed_at = now
+        return table
+
+    def candidates(self, request_type: str) -> List[str]:
+        if time.monotonic() - self._refreshed_at > self.refresh_seconds:
+            self.refresh()
+        if request_type not in self._table:
+            raise KeyError(f"No model route configured for request type {request_type}")
+        return self._table[request_type]
+
+    def choose(self, request_type: str) -> str:
+        """Model that should serve ``request_type`` right now"""
+        return self.candidates(request_type)[0]
+
+    def serving_model(self, request_type: str, fn: Callable[..., Any]) -> str:
+        """The model a call to ``fn`` for ``request_type`` will actually run on"""
+        return self.choose(request_type) if accepts(fn, "model") else self.service_model
+
+    async def submit(self, request_type: str, request: Dict[str, Any], max_attempts: int = 2) -> Any:
+        """
+        Run a ``service_call`` through the batch scheduler.
+
+        A callee that takes ``model`` is routed and fails over to the next
+        candidate on error. Any other callee runs once on the service model:
+        retrying it would only repeat the call on the same provider.
+        """
+        if self.scheduler is None:
+            raise RuntimeError("ModelRouter.submit requires a BatchScheduler")
+
+        routed = all(accepts(fn, "model") for fn in (request["call"], request["batch"]) if fn is not None)
+        if not routed:
+            return await self._run(self.service_model, request)
+
+        last_error: Optional[Exception] = None
+        for model in self.candidates(request_type)[:max_attempts]:
+            try:
+                return await self._run(model, request)
+            except Exception as e:
+                last_error = e
+                logger.error(f"Model {model} failed for {request_type}: {str(e)}")
+
+        raise last_error or RuntimeError(f"No model available for request type {request_type}")
+
+    async def _run(self, model: str, request: Dict[str, Any]) -> Any:
+        started = time.monotonic()
+        try:
+            result = await self.scheduler.run(model, request)
+        except Exception:
+            self.record(model, time.monotonic() - started, ok=False)
+            raise
+        self.record(model, time.monotonic() - started, ok=True)
+        return result
+
+    async def stream(
+        self, request_type: str, fn: Callable[..., AsyncIterator[Any]], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        """
+        Relay a streaming call on the routed model and record its outcome.
+
+        A stream cannot fail over once chunks have been sent, so errors only
+        count against the model. A client that stops reading is not an error.
+        """
+        model = self.serving_model(request_type, fn)
+        model_kwargs = {"model": model} if accepts(fn, "model") else {}
+        started = time.monotonic()
+        try:
+            async for chunk in fn(*args, **{**model_kwargs, **kwargs}):
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            raise
+        except Exception:
+            self.record(model, time.monotonic() - started, ok=False)
+            raise
+        self.record(model, time.monotonic() - started, ok=True)
+
+    def routing_table(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            "routes": {
+                request_type: {
+                    "active": models[0] if models else None,
+                    "fallbacks": models[1:],
+                    "p95_slo_ms": self.routes[request_type].get("p95_slo_ms"),
+                }
+                for request_type, models in self._table.items()
+            },
+            "models": self._health,
+            "service_model": self.service_model,
+        }
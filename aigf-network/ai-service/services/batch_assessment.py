@@ -0,0 +1,127 @@
+"""
+Bulk skill assessment.
+
+Nothing is vectorized here: every item is scored by the same
+``AssessmentService.analyze_skills`` call the single-item endpoint makes, so a
+conversation gets the same scores alone or in bulk. What this adds is a bound
+on concurrency: at most ASSESSMENT_MAX_IN_FLIGHT items are being scored (or
+waiting to be sent back) at once, however many the request carries. When the
+assessment service provides an ``analyze_skills_batch`` entry point, the model
+scheduler groups the concurrent calls into batches for it.
+"""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from utils.logger import get_logger
+from utils.metrics import stage_timer
+
+logger = get_logger(__name__)
+
+ASSESSMENT_MAX_IN_FLIGHT = int(os.getenv("ASSESSMENT_MAX_IN_FLIGHT", "16"))
+
+AnalyzeFn = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class ConcurrentAssessor:
+    """Streams skill scores for a sequence of assessment requests with bounded concurrency"""
+
+    def __init__(self, analyze: AnalyzeFn, max_in_flight: int = ASSESSMENT_MAX_IN_FLIGHT):
+        self.analyze = analyze
+        self.max_in_flight = max_in_flight
+        self.items = 0
+        self.failed = 0
+
+    async def _score(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with stage_timer("assessment"):
+            return await self.analyze(payload)
+
+    async def assess(
+        self, items: AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Score ``(index, payload, error)`` items and yield results as they complete.
+
+        Items arriving with an ``error`` are reported back as failed without
+        being scored. At most ``max_in_flight`` items are pending or unsent at
+        once, so a streamed request body is only read as fast as the client
+        takes the results.
+        The stream ends with a summary record.
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        pending: Set[asyncio.Task] = set()
+        done = object()
+
+        async def run_one(index: int, payload: Dict[str, Any]) -> None:
+            try:
+                result = await self._score(payload)
+                await results.put(self._result(index, payload, result))
+            except Exception as e:
+                await results.put(self._failure(index, payload, str(e)))
+
+        async def feed() -> None:
+            try:
+                async for index, payload, error in items:
+                    # Released once the consumer has taken the item's result
+                    await slots.acquire()
+                    if error is not None:
+                        await results.put(self._failure(index, payload, error))
+                        continue
+                    task = asyncio.create_task(run_one(index, payload))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                if pending:
+                    await asyncio.gather(*pending)
+            finally:
+                results.put_nowait(done)
+
+        feeder = asyncio.create_task(feed())
+        total = failed = 0
+        try:
+            while True:
+                entry = await results.get()
+                if entry is done:
+                    break
+                slots.release()
+                total += 1
+                if "error" in entry:
+                    failed += 1
+                yield entry
+        finally:
+            feeder.cancel()
+            for task in list(pending):
+                task.cancel()
+            self.items += total
+            self.failed += failed
+
+        summary = {"done": True, "total": total, "failed": failed}
+        if feeder.done() and not feeder.cancelled() and feeder.exception() is not None:
+            logger.error(f"Batch assessment input failed: {str(feeder.exception())}")
+            summary["error"] = "Failed to read batch input"
+        yield summary
+
+    @staticmethod
+    def _result(index: int, payload: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "user_id": payload.get("user_id"),
+            "assessment_type": payload.get("assessment_type"),
+            **result,
+        }
+
+    @staticmethod
+    def _failure(index: int, payload: Optional[Dict[str, Any]], error: str) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "user_id": (payload or {}).get("user_id"),
+            "error": error,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "failed": self.failed,
+            "in_flight_limit": self.max_in_flight,
+        }
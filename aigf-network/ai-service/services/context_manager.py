@@ -0,0 +1,259 @@
+"""
+Token-budgeted conversation context.
+
+Keeps the most recent turns verbatim and folds everything older into a rolling
+per-session summary. Messages are folded exactly once, in order, so the summary
+grows incrementally and is never rebuilt from the full transcript. The cached
+token counts and summary are tied to the number of messages they cover and a
+hash of the last of them, so a rewritten or truncated transcript resets them
+without rescanning the history every turn.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.text import STOPWORDS, WORD_RE
+from utils.tokens import DEFAULT_MODEL, count_tokens
+
+logger = get_logger(__name__)
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_MIN_RECENT_MESSAGES = int(os.getenv("CONTEXT_MIN_RECENT_MESSAGES", "6"))
+CONTEXT_SUMMARY_RATIO = float(os.getenv("CONTEXT_SUMMARY_RATIO", "0.2"))
+CONTEXT_MAX_SESSIONS = int(os.getenv("CONTEXT_MAX_SESSIONS", "10000"))
+
+# Prompt token budgets (personality prompt plus history), leaving headroom for the reply
+DEFAULT_MODEL_BUDGETS = {
+    "gpt-4": 6000,
+    "gpt-4-turbo": 24000,
+    "gpt-4o": 24000,
+    "gpt-4o-mini": 24000,
+    "gpt-3.5-turbo": 12000,
+}
+
+# Per-message overhead of the chat format (role and separators)
+_MESSAGE_OVERHEAD = 4
+_LINE_WORDS = 24
+_SUMMARY_TOPICS = 8
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def load_budgets() -> Dict[str, int]:
+    """Model budgets, overridden by CONTEXT_MODEL_BUDGETS (inline JSON)"""
+    budgets = dict(DEFAULT_MODEL_BUDGETS)
+    raw = os.getenv("CONTEXT_MODEL_BUDGETS")
+    if raw:
+        budgets.update({model: int(tokens) for model, tokens in json.loads(raw).items()})
+    return budgets
+
+
+def _message_tokens(message: Dict[str, Any], model: str) -> int:
+    text = f"{message.get('sender', 'USER')}: {message.get('content', '')}"
+    return count_tokens(text, model) + _MESSAGE_OVERHEAD
+
+
+def _message_hash(message: Dict[str, Any]) -> bytes:
+    text = f"{message.get('sender', 'USER')}\x1f{message.get('content', '')}"
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _condense(content: str) -> str:
+    """First sentence of a message, capped at a fixed number of words"""
+    sentence = _SENTENCE_RE.split(content.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > _LINE_WORDS:
+        return " ".join(words[:_LINE_WORDS]) + "..."
+    return " ".join(words)
+
+
+@dataclass
+class SummaryState:
+    model: str
+    folded: int = 0
+    # Hash of the last message counted in message_tokens
+    last_hash: bytes = b""
+    message_tokens: List[int] = field(default_factory=list)
+    total_tokens: int = 0
+    lines: Deque[Tuple[str, int]] = field(default_factory=deque)
+    line_tokens: int = 0
+    dropped_lines: int = 0
+    topics: Counter = field(default_factory=Counter)
+    text: str = ""
+    tokens: int = 0
+
+
+@dataclass
+class CompactedContext:
+    history: List[Dict[str, Any]]
+    original_tokens: int
+    compacted_tokens: int
+    summarized_messages: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.compacted_tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "original_tokens": self.original_tokens,
+            "compacted_tokens": self.compacted_tokens,
+            "tokens_saved": self.tokens_saved,
+            "summarized_messages": self.summarized_messages,
+            "verbatim_messages": len(self.history) - (1 if self.summarized_messages else 0),
+        }
+
+
+class ContextManager:
+    """Fits conversation history into a per-model token budget"""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = CONTEXT_TOKEN_BUDGET,
+        min_recent_messages: int = CONTEXT_MIN_RECENT_MESSAGES,
+        summary_ratio: float = CONTEXT_SUMMARY_RATIO,
+        max_sessions: int = CONTEXT_MAX_SESSIONS,
+    ):
+        self.budgets = budgets if budgets is not None else load_budgets()
+        self.default_budget = default_budget
+        self.min_recent_messages = min_recent_messages
+        self.summary_ratio = summary_ratio
+        self.max_sessions = max_sessions
+        self._states: "OrderedDict[str, SummaryState]" = OrderedDict()
+        self._compactions = 0
+        self._tokens_in = 0
+        self._tokens_saved = 0
+
+    def budget_for(self, model: Optional[str] = None) -> int:
+        return self.budgets.get(model or DEFAULT_MODEL, self.default_budget)
+
+    def compact(
+        self,
+        session_id: str,
+        history: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        reserved_tokens: int = 0,
+    ) -> CompactedContext:
+        """
+        Return the history to send for this turn.
+
+        ``reserved_tokens`` is the part of the model budget already spent on
+        the personality prompt. Token counts are cached per message, so each
+        turn only counts the messages added since the last one.
+        """
+        model = model or DEFAULT_MODEL
+        state = self._state(session_id, history, model)
+        budget = max(0, self.budget_for(model) - reserved_tokens)
+
+        for message in history[len(state.message_tokens):]:
+            state.last_hash = _message_hash(message)
+            tokens = _message_tokens(message, model)
+            state.message_tokens.append(tokens)
+            state.total_tokens += tokens
+        self._compactions += 1
+        self._tokens_in += state.total_tokens
+
+        if state.folded == 0 and state.total_tokens <= budget:
+            return CompactedContext(list(history), state.total_tokens, state.total_tokens)
+
+        # Keep as many recent messages verbatim as fit next to the summary
+        summary_budget = int(budget * self.summary_ratio)
+        recent_budget = budget - summary_budget
+        split = len(history)
+        recent_tokens = 0
+        while split > state.folded:
+            tokens = state.message_tokens[split - 1]
+            if len(history) - split >= self.min_recent_messages and recent_tokens + tokens > recent_budget:
+                break
+            recent_tokens += tokens
+            split -= 1
+
+        if split > state.folded:
+            for message in history[state.folded:split]:
+                self._fold(state, message, summary_budget)
+            state.folded = split
+            self._render(state)
+
+        compacted = [{"content": state.text, "sender": "SYSTEM", "summary": True}] + history[split:]
+        context = CompactedContext(
+            compacted,
+            original_tokens=state.total_tokens,
+            compacted_tokens=state.tokens + recent_tokens,
+            summarized_messages=state.folded,
+        )
+        self._tokens_saved += context.tokens_saved
+        return context
+
+    def forget(self, session_id: str) -> None:
+        self._states.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._states),
+            "compactions": self._compactions,
+            "tokens_in": self._tokens_in,
+            "tokens_saved": self._tokens_saved,
+            "saved_ratio": round(self._tokens_saved / self._tokens_in, 4) if self._tokens_in else 0.0,
+        }
+
+    def _state(self, session_id: str, history: List[Dict[str, Any]], model: str) -> SummaryState:
+        state = self._states.get(session_id)
+        # A rewritten history or a different tokenizer means the cached counts
+        # no longer apply; histories only grow at the end, so checking the last
+        # covered message catches rewrites without rescanning the prefix
+        counted = len(state.message_tokens) if state is not None else 0
+        if (
+            state is None
+            or state.model != model
+            or len(history) < counted
+            or (counted and _message_hash(history[counted - 1]) != state.last_hash)
+        ):
+            if state is not None and state.folded:
+                logger.info(f"Resetting context summary for session {session_id}")
+            state = SummaryState(model=model)
+        self._states[session_id] = state
+        self._states.move_to_end(session_id)
+        while len(self._states) > self.max_sessions:
+            self._states.popitem(last=False)
+        return state
+
+    def _fold(self, state: SummaryState, message: Dict[str, Any], summary_budget: int) -> None:
+        content = str(message.get("content", ""))
+        if message.get("summary"):
+            return
+        speaker = "User" if str(message.get("sender", "USER")).upper() == "USER" else "AI"
+        condensed = _condense(content)
+        if condensed:
+            line = f"{speaker}: {condensed}"
+            tokens = count_tokens(line, state.model) + 1
+            state.lines.append((line, tokens))
+            state.line_tokens += tokens
+        if speaker == "User":
+            state.topics.update(
+                w for w in WORD_RE.findall(content.lower()) if len(w) > 3 and w not in STOPWORDS
+            )
+            if len(state.topics) > 4 * _SUMMARY_TOPICS:
+                state.topics = Counter(dict(state.topics.most_common(2 * _SUMMARY_TOPICS)))
+
+        # The oldest condensed lines give way first; topic weights keep their gist
+        while len(state.lines) > 1 and state.line_tokens > summary_budget:
+            _, tokens = state.lines.popleft()
+            state.line_tokens -= tokens
+            state.dropped_lines += 1
+
+    def _render(self, state: SummaryState) -> None:
+        parts = [f"Summary of the earlier conversation ({state.folded} messages)."]
+        if state.topics:
+            topics = ", ".join(word for word, _ in state.topics.most_common(_SUMMARY_TOPICS))
+            parts.append(f"Topics so far: {topics}.")
+        if state.dropped_lines:
+            parts.append("...")
+        parts.extend(line for line, _ in state.lines)
+        state.text = "\n".join(parts)
+        state.tokens = count_tokens(state.text, state.model) + _MESSAGE_OVERHEAD
@@ -0,0 +1,214 @@
+"""
+Coalescing real-time feedback engine.
+
+Clients request real-time feedback after every message. A request for an
+idle session starts computing immediately; follow-ups that arrive while it is
+pending or running are debounced and share one computation, and a newer
+request cancels a computation that has not finished yet, since its result
+would be obsolete. Session-level scores are maintained incrementally from the
+newest messages. Computations from different sessions are micro-batched
+together.
+
+FeedbackService receives the full message list unless
+FEEDBACK_CONTEXT_MESSAGES is set, in which case only that many of the newest
+messages are sent (cheaper, but feedback then ignores older turns).
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from models.batch_scheduler import ModelDispatch, call_directly
+from services.flow_analyzer import IncrementalFlowAnalyzer
+from utils.batching import MicroBatcher
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FEEDBACK_DEBOUNCE_SECONDS = float(os.getenv("FEEDBACK_DEBOUNCE_SECONDS", "0.25"))
+FEEDBACK_MAX_DELAY_SECONDS = float(os.getenv("FEEDBACK_MAX_DELAY_SECONDS", "1.0"))
+# 0 sends the whole conversation; a positive value opts into a recent-message window
+FEEDBACK_CONTEXT_MESSAGES = int(os.getenv("FEEDBACK_CONTEXT_MESSAGES", "0"))
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "16"))
+FEEDBACK_BATCH_WAIT_SECONDS = float(os.getenv("FEEDBACK_BATCH_WAIT_SECONDS", "0.02"))
+
+
+@dataclass
+class _SessionFeedback:
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    session_type: str = "PRACTICE"
+    live_scores: Dict[str, Any] = field(default_factory=dict)
+    pending: List[asyncio.Future] = field(default_factory=list)
+    pending_since: Optional[float] = None
+    timer: Optional[asyncio.TimerHandle] = None
+    running: Optional[asyncio.Task] = None
+    running_waiters: List[asyncio.Future] = field(default_factory=list)
+    running_since: float = 0.0
+
+
+class RealTimeFeedbackEngine:
+    """Debounces, coalesces and batches real-time feedback per session"""
+
+    def __init__(
+        self,
+        feedback_service,
+        debounce_seconds: float = FEEDBACK_DEBOUNCE_SECONDS,
+        max_delay_seconds: float = FEEDBACK_MAX_DELAY_SECONDS,
+        context_messages: int = FEEDBACK_CONTEXT_MESSAGES,
+        max_batch_size: int = FEEDBACK_BATCH_SIZE,
+        batch_wait_seconds: float = FEEDBACK_BATCH_WAIT_SECONDS,
+        dispatch: ModelDispatch = call_directly,
+    ):
+        self.feedback_service = feedback_service
+        self.dispatch = dispatch
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.context_messages = context_messages
+        self.scores = IncrementalFlowAnalyzer()
+        self.batcher = MicroBatcher(
+            self._run_batch,
+            max_batch_size=max_batch_size,
+            max_wait=batch_wait_seconds,
+            name="real_time_feedback",
+        )
+        self._sessions: Dict[str, _SessionFeedback] = {}
+        self.requests = 0
+        self.computations = 0
+        self.superseded = 0
+
+    async def submit(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        session_type: str = "PRACTICE",
+    ) -> Dict[str, Any]:
+        """Return feedback for the latest state of the session"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.requests += 1
+
+        session = self._sessions.setdefault(session_id, _SessionFeedback())
+        session.messages = messages
+        session.session_type = session_type
+        session.live_scores = self.scores.observe_messages(session_id, messages)
+
+        future = loop.create_future()
+        idle = (
+            not session.pending
+            and session.timer is None
+            and (session.running is None or session.running.done())
+        )
+        session.pending.append(future)
+        if session.pending_since is None:
+            session.pending_since = now
+
+        # Leading edge: nothing to coalesce with, so compute right away
+        if idle:
+            self._start(session_id)
+            return await future
+
+        # A computation that has not finished is obsolete now; fold its waiters
+        # into the next one unless they have already waited past the max delay
+        if (
+            session.running is not None
+            and not session.running.done()
+            and now - session.running_since < self.max_delay_seconds
+        ):
+            session.running.cancel()
+            self.superseded += 1
+            session.pending.extend(session.running_waiters)
+            session.pending_since = min(session.pending_since, session.running_since)
+            session.running = None
+            session.running_waiters = []
+
+        if session.timer is not None:
+            session.timer.cancel()
+        deadline = session.pending_since + self.max_delay_seconds
+        delay = max(0.0, min(self.debounce_seconds, deadline - now))
+        session.timer = loop.call_later(delay, self._start, session_id)
+
+        return await future
+
+    def _start(self, session_id: str) -> None:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+        session.timer = None
+        waiters = [w for w in session.pending if not w.done()]
+        since = session.pending_since or 0.0
+        session.pending = []
+        session.pending_since = None
+        if not waiters:
+            self._maybe_forget(session_id, session)
+            return
+
+        self.computations += 1
+        session.running_waiters = waiters
+        session.running_since = since
+        session.running = asyncio.get_running_loop().create_task(
+            self._compute(session_id, session, waiters)
+        )
+
+    async def _compute(
+        self,
+        session_id: str,
+        session: _SessionFeedback,
+        waiters: List[asyncio.Future],
+    ) -> None:
+        live_scores = session.live_scores
+        messages = session.messages
+        if self.context_messages > 0:
+            messages = messages[-self.context_messages:]
+        try:
+            feedback = await self.batcher.submit({
+                "session_id": session_id,
+                "messages": messages,
+                "session_type": session.session_type,
+            })
+        except asyncio.CancelledError:
+            # Superseded: the waiters were handed to the newer computation
+            raise
+        except Exception as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+        else:
+            result = dict(feedback) if isinstance(feedback, dict) else {"feedback": feedback}
+            result["live_scores"] = live_scores
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(result)
+        finally:
+            if session.running is asyncio.current_task():
+                session.running = None
+                session.running_waiters = []
+            self._maybe_forget(session_id, session)
+
+    def _maybe_forget(self, session_id: str, session: _SessionFeedback) -> None:
+        if not session.pending and session.timer is None and session.running is None:
+            self._sessions.pop(session_id, None)
+
+    async def _run_batch(self, items: List[Dict[str, Any]]) -> List[Any]:
+        # Use the service's batched entry point when it has one so the model
+        # sees a single call; otherwise fan the batch out concurrently
+        batch_fn = getattr(self.feedback_service, "generate_real_time_feedback_batch", None)
+        if batch_fn is not None:
+            return await self.dispatch("feedback", batch_fn, items)
+        return await asyncio.gather(
+            *[
+                self.dispatch("feedback", self.feedback_service.generate_real_time_feedback, **item)
+                for item in items
+            ],
+            return_exceptions=True,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "computations": self.computations,
+            "superseded": self.superseded,
+            "context_messages": self.context_messages or None,
+            "active_sessions": len(self._sessions),
+            "batching": self.batcher.stats(),
+        }
@@ -0,0 +1,175 @@
+"""
+Incremental conversation-flow analysis.
+
+Keeps running per-session statistics (turn-taking, topic weights, sentiment
+trend) so each new message is folded in at a cost proportional to the message
+itself instead of re-scanning the whole transcript every turn. A turn's
+state is only stored once the turn has been recorded, so failed or rejected
+turns never leak into the running statistics.
+"""
+
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.text import STOPWORDS, WORD_RE
+
+logger = get_logger(__name__)
+
+_POSITIVE = frozenset("""
+amazing awesome beautiful best comfortable confident cool enjoy enjoyed excited
+fantastic fun glad good great happy interesting laugh love lovely nice perfect
+pleasure relaxed thanks thank wonderful
+""".split())
+
+_NEGATIVE = frozenset("""
+afraid angry annoyed anxious awful awkward bad bored boring confused
+disappointed hate nervous sad scared sorry stressed terrible tired uncomfortable
+upset worried worse worst
+""".split())
+
+# Smoothing factors for the fast/slow sentiment averages used to derive the trend
+_FAST_ALPHA = 0.5
+_SLOW_ALPHA = 0.15
+_TREND_THRESHOLD = 0.05
+
+
+@dataclass
+class FlowState:
+    message_count: int = 0
+    user_turns: int = 0
+    ai_turns: int = 0
+    user_words: int = 0
+    ai_words: int = 0
+    user_questions: int = 0
+    speaker_switches: int = 0
+    last_sender: Optional[str] = None
+    sentiment_fast: float = 0.0
+    sentiment_slow: float = 0.0
+    topics: Counter = field(default_factory=Counter)
+
+    def copy(self) -> "FlowState":
+        return replace(self, topics=Counter(self.topics))
+
+
+class IncrementalFlowAnalyzer:
+    """Per-session running flow statistics with O(message) updates"""
+
+    def __init__(self, max_sessions: int = 10000, max_topics: int = 50):
+        self.max_sessions = max_sessions
+        self.max_topics = max_topics
+        self._states: "OrderedDict[str, FlowState]" = OrderedDict()
+
+    def analyze_turn(
+        self,
+        session_id: str,
+        history: List[Dict[str, Any]],
+        message: Dict[str, Any],
+    ) -> Tuple[FlowState, Dict[str, Any]]:
+        """
+        Return a copy of the session state with ``message`` folded in, and its snapshot.
+
+        Nothing is stored until :meth:`commit_turn`. ``history`` is only scanned
+        when the cached state does not line up with it (first turn on this
+        worker, eviction, or a client-supplied rewrite).
+        """
+        cached = self._states.get(session_id)
+        if cached is None or cached.message_count != len(history):
+            state = FlowState()
+            for previous in history:
+                self._observe(state, previous)
+        else:
+            state = cached.copy()
+        self._observe(state, message)
+        return state, self.snapshot(state)
+
+    def commit_turn(self, session_id: str, state: FlowState, reply: Dict[str, Any]) -> None:
+        """Store the state of a recorded turn with the AI reply folded in"""
+        self._observe(state, reply)
+        self._remember(session_id, state)
+
+    def observe_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fold in only the messages past those already counted for the session"""
+        state = self._states.get(session_id)
+        if state is None or state.message_count > len(messages):
+            state = FlowState()
+        for message in messages[state.message_count:]:
+            self._observe(state, message)
+        self._remember(session_id, state)
+        return self.snapshot(state)
+
+    def forget(self, session_id: str) -> None:
+        self._states.pop(session_id, None)
+
+    def _remember(self, session_id: str, state: FlowState) -> None:
+        self._states[session_id] = state
+        self._states.move_to_end(session_id)
+        while len(self._states) > self.max_sessions:
+            self._states.popitem(last=False)
+
+    def _observe(self, state: FlowState, message: Dict[str, Any]) -> None:
+        content = str(message.get("content", ""))
+        sender = str(message.get("sender", "USER")).upper()
+        words = WORD_RE.findall(content.lower())
+
+        state.message_count += 1
+        if state.last_sender is not None and sender != state.last_sender:
+            state.speaker_switches += 1
+        state.last_sender = sender
+
+        if sender == "USER":
+            state.user_turns += 1
+            state.user_words += len(words)
+            if "?" in content:
+                state.user_questions += 1
+            state.topics.update(w for w in words if len(w) > 2 and w not in STOPWORDS)
+            if len(state.topics) > 2 * self.max_topics:
+                state.topics = Counter(dict(state.topics.most_common(self.max_topics)))
+        else:
+            state.ai_turns += 1
+            state.ai_words += len(words)
+
+        score = self._sentiment(words)
+        if state.message_count == 1:
+            state.sentiment_fast = state.sentiment_slow = score
+        else:
+            state.sentiment_fast += _FAST_ALPHA * (score - state.sentiment_fast)
+            state.sentiment_slow += _SLOW_ALPHA * (score - state.sentiment_slow)
+
+    @staticmethod
+    def _sentiment(words: List[str]) -> float:
+        positive = sum(1 for w in words if w in _POSITIVE)
+        negative = sum(1 for w in words if w in _NEGATIVE)
+        if positive + negative == 0:
+            return 0.0
+        return (positive - negative) / (positive + negative)
+
+    def snapshot(self, state: FlowState) -> Dict[str, Any]:
+        total_words = state.user_words + state.ai_words
+        slope = state.sentiment_fast - state.sentiment_slow
+        if slope > _TREND_THRESHOLD:
+            trend = "improving"
+        elif slope < -_TREND_THRESHOLD:
+            trend = "declining"
+        else:
+            trend = "stable"
+
+        return {
+            "message_count": state.message_count,
+            "turn_taking": {
+                "user_turns": state.user_turns,
+                "ai_turns": state.ai_turns,
+                "user_talk_ratio": round(state.user_words / total_words, 3) if total_words else 0.0,
+                "avg_user_words": round(state.user_words / state.user_turns, 1) if state.user_turns else 0.0,
+                "avg_ai_words": round(state.ai_words / state.ai_turns, 1) if state.ai_turns else 0.0,
+                "speaker_switch_rate": round(state.speaker_switches / max(state.message_count - 1, 1), 3),
+            },
+            "question_ratio": round(state.user_questions / state.user_turns, 3) if state.user_turns else 0.0,
+            "topics": [word for word, _ in state.topics.most_common(5)],
+            "sentiment": {
+                "current": round(state.sentiment_fast, 3),
+                "baseline": round(state.sentiment_slow, 3),
+                "trend": trend,
+            },
+        }
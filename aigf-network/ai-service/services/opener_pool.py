@@ -0,0 +1,280 @@
+"""
+Pre-generated opener pool for new sessions.
+
+Openers depend only on the personality, the scenario and a coarse bucket of
+the user profile, and session starts arrive in sharp spikes. A background
+task keeps a small pool of fresh openers per (personality, scenario, profile
+bucket) so a session start is a constant-time pop instead of a model call.
+Only keys that were drawn from (or registered) within OPENER_ACTIVE_SECONDS
+are refilled, so rarely used combinations do not cost model calls.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from models.batch_scheduler import ModelDispatch, call_directly
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+OPENER_POOL_SIZE = int(os.getenv("OPENER_POOL_SIZE", "8"))
+OPENER_POOL_LOW_WATER = int(os.getenv("OPENER_POOL_LOW_WATER", "3"))
+OPENER_MAX_AGE_SECONDS = float(os.getenv("OPENER_MAX_AGE_SECONDS", "1800"))
+OPENER_REFILL_CONCURRENCY = int(os.getenv("OPENER_REFILL_CONCURRENCY", "4"))
+OPENER_MAX_KEYS = int(os.getenv("OPENER_MAX_KEYS", "512"))
+OPENER_ACTIVE_SECONDS = float(os.getenv("OPENER_ACTIVE_SECONDS", "900"))
+# Profile fields that meaningfully change the opener; everything else is ignored
+OPENER_PROFILE_KEYS = [
+    key.strip()
+    for key in os.getenv("OPENER_PROFILE_KEYS", "experience_level,confidence_level,primary_goal").split(",")
+    if key.strip()
+]
+
+PoolKey = Tuple[str, Optional[str], str]
+
+
+def profile_bucket(user_profile: Optional[Dict[str, Any]]) -> str:
+    """Coarse, stable bucket for a user profile"""
+    if not user_profile:
+        return "any"
+    parts = [
+        f"{key}={str(user_profile[key]).strip().lower()}"
+        for key in OPENER_PROFILE_KEYS
+        if user_profile.get(key) not in (None, "")
+    ]
+    return "|".join(parts) or "any"
+
+
+@dataclass
+class _Opener:
+    payload: Dict[str, Any]
+    digest: str
+    created_at: float
+
+
+@dataclass
+class _PoolEntry:
+    personality_id: str
+    scenario_id: Optional[str]
+    profile: Dict[str, Any]
+    openers: Deque[_Opener]
+    recent: Deque[str]
+    last_used: float = 0.0
+    # Bumped on invalidation so openers generated from the old personality are discarded
+    epoch: int = 0
+
+
+class OpenerPool:
+    """Keeps pools of fresh openers topped up in the background"""
+
+    def __init__(
+        self,
+        conversation_service,
+        personality_cache,
+        target_size: int = OPENER_POOL_SIZE,
+        low_water: int = OPENER_POOL_LOW_WATER,
+        max_age_seconds: float = OPENER_MAX_AGE_SECONDS,
+        refill_concurrency: int = OPENER_REFILL_CONCURRENCY,
+        max_keys: int = OPENER_MAX_KEYS,
+        active_seconds: float = OPENER_ACTIVE_SECONDS,
+        dispatch: ModelDispatch = call_directly,
+    ):
+        self.conversation_service = conversation_service
+        self.personality_cache = personality_cache
+        self.dispatch = dispatch
+        self.target_size = target_size
+        self.low_water = low_water
+        self.max_age_seconds = max_age_seconds
+        self.refill_concurrency = refill_concurrency
+        self.max_keys = max_keys
+        self.active_seconds = active_seconds
+        self._pools: "OrderedDict[PoolKey, _PoolEntry]" = OrderedDict()
+        self._refill_needed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.stale_dropped = 0
+        self.generated = 0
+        self.discarded = 0
+
+    def _entry(self, personality_id: str, scenario_id: Optional[str], user_profile: Optional[Dict[str, Any]]) -> _PoolEntry:
+        bucket = profile_bucket(user_profile)
+        key = (personality_id, scenario_id, bucket)
+        entry = self._pools.get(key)
+        if entry is None:
+            # Generate for the bucket, not the individual user
+            profile = {k: user_profile[k] for k in OPENER_PROFILE_KEYS if user_profile and k in user_profile}
+            entry = _PoolEntry(personality_id, scenario_id, profile, deque(), deque(maxlen=max(self.target_size // 2, 1)))
+            self._pools[key] = entry
+            while len(self._pools) > self.max_keys:
+                self._pools.popitem(last=False)
+        else:
+            self._pools.move_to_end(key)
+        return entry
+
+    def draw(
+        self,
+        personality_id: str,
+        scenario_id: Optional[str],
+        user_profile: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """Pop a fresh opener for the key, or None when the pool is empty"""
+        entry = self._entry(personality_id, scenario_id, user_profile)
+        now = time.time()
+        entry.last_used = now
+        opener = None
+        skipped: List[_Opener] = []
+
+        while entry.openers:
+            candidate = entry.openers.popleft()
+            if now - candidate.created_at > self.max_age_seconds:
+                self.stale_dropped += 1
+                continue
+            # Avoid handing out the same text twice in a row when there is an alternative
+            if candidate.digest in entry.recent and len(skipped) < len(entry.recent):
+                skipped.append(candidate)
+                continue
+            opener = candidate
+            break
+
+        entry.openers.extend(skipped)
+        if opener is None and skipped:
+            opener = entry.openers.popleft()
+
+        if len(entry.openers) < self.low_water and self._refill_needed is not None:
+            self._refill_needed.set()
+
+        if opener is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.recent.append(opener.digest)
+        return dict(opener.payload)
+
+    @staticmethod
+    def fallback(personality: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Canned opener from the personality's conversation starters"""
+        starters = personality.get("conversation_starters") or []
+        if not starters:
+            return None
+        return {
+            "content": random.choice(starters),
+            "confidence": 0.7,
+            "topics": [],
+        }
+
+    def register(self, personality_id: str, scenario_id: Optional[str] = None, user_profile: Optional[Dict[str, Any]] = None) -> None:
+        """Make sure a key is kept warm even before its first draw"""
+        self._entry(personality_id, scenario_id, user_profile).last_used = time.time()
+        if self._refill_needed is not None:
+            self._refill_needed.set()
+
+    def invalidate(self, personality_id: Optional[str] = None, scenario_id: Optional[str] = None) -> None:
+        """
+        Drop pooled openers of a personality, of a scenario, or (with neither)
+        all of them; active keys are refilled from the new versions.
+        """
+        for entry in self._pools.values():
+            if personality_id is not None and str(entry.personality_id) != str(personality_id):
+                continue
+            if scenario_id is not None and str(entry.scenario_id) != str(scenario_id):
+                continue
+            entry.openers.clear()
+            entry.recent.clear()
+            entry.epoch += 1
+        if self._refill_needed is not None:
+            self._refill_needed.set()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._refill_needed = asyncio.Event()
+        self._refill_needed.set()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refill_loop(self) -> None:
+        semaphore = asyncio.Semaphore(self.refill_concurrency)
+        while True:
+            try:
+                # Wake on demand, and periodically to replace openers that aged out
+                await asyncio.wait_for(self._refill_needed.wait(), timeout=self.max_age_seconds / 4)
+            except asyncio.TimeoutError:
+                pass
+            self._refill_needed.clear()
+
+            jobs = []
+            now = time.time()
+            for entry in list(self._pools.values()):
+                while entry.openers and now - entry.openers[0].created_at > self.max_age_seconds:
+                    entry.openers.popleft()
+                    self.stale_dropped += 1
+                if now - entry.last_used > self.active_seconds:
+                    continue
+                deficit = self.target_size - len(entry.openers)
+                jobs.extend(self._generate(entry, semaphore) for _ in range(deficit))
+
+            if jobs:
+                await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def _generate(self, entry: _PoolEntry, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            epoch = entry.epoch
+            try:
+                personality = await self.personality_cache.get_personality(entry.personality_id)
+                if not personality:
+                    return
+                scenario = None
+                if entry.scenario_id:
+                    scenario = await self.personality_cache.get_scenario(entry.scenario_id)
+                payload = await self.dispatch(
+                    "conversation",
+                    self.conversation_service.generate_initial_message,
+                    personality=personality,
+                    scenario=scenario,
+                    user_profile=entry.profile or None,
+                    session_id=f"opener-pool-{uuid.uuid4().hex}",
+                )
+            except Exception as e:
+                logger.error(f"Failed to pre-generate opener for {entry.personality_id}: {str(e)}")
+                return
+
+        if entry.epoch != epoch:
+            self.discarded += 1
+            return
+        digest = hashlib.sha256(payload["content"].encode("utf-8")).hexdigest()
+        if any(opener.digest == digest for opener in entry.openers):
+            return
+        entry.openers.append(_Opener(payload, digest, time.time()))
+        self.generated += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "keys": len(self._pools),
+            "active_keys": sum(
+                1 for entry in self._pools.values() if time.time() - entry.last_used <= self.active_seconds
+            ),
+            "pooled": sum(len(entry.openers) for entry in self._pools.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "generated": self.generated,
+            "stale_dropped": self.stale_dropped,
+            "discarded": self.discarded,
+        }
@@ -0,0 +1,156 @@
+"""
+Read-through cache for personalities and scenarios.
+
+Personalities and scenarios are read on every conversation request but only
+change through the personality management endpoints. Those endpoints
+invalidate the local cache synchronously and publish the invalidation on a
+Redis channel so every uvicorn worker drops its copy too. Anything derived
+from a personality or scenario subscribes with ``on_invalidate`` and is told
+about local and remote invalidations alike.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.cache import TTLCache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INVALIDATION_CHANNEL = "aigf:personality-cache:invalidate"
+
+_ALL_PERSONALITIES = "__all__"
+
+# callback(kind, key): kind is "personality" or "scenario"; key None means all of that kind
+InvalidationCallback = Callable[[str, Optional[str]], None]
+
+
+class PersonalityCache:
+    """Caches PersonalityService lookups with TTL, size bounds and cross-worker invalidation"""
+
+    def __init__(self, personality_service, redis=None):
+        self.personality_service = personality_service
+        self.redis = redis
+        self.personalities = TTLCache(
+            max_size=int(os.getenv("PERSONALITY_CACHE_SIZE", "512")),
+            ttl_seconds=float(os.getenv("PERSONALITY_CACHE_TTL", "600")),
+            name="personalities",
+        )
+        self.scenarios = TTLCache(
+            max_size=int(os.getenv("SCENARIO_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("SCENARIO_CACHE_TTL", "600")),
+            name="scenarios",
+        )
+        self._worker_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._callbacks: List[InvalidationCallback] = []
+
+    def on_invalidate(self, callback: InvalidationCallback) -> None:
+        """Call ``callback`` whenever a personality or scenario is invalidated on any worker"""
+        self._callbacks.append(callback)
+
+    async def get_personality(self, personality_id: str) -> Optional[Dict[str, Any]]:
+        return await self.personalities.get_or_load(
+            personality_id,
+            lambda: self.personality_service.get_personality(personality_id),
+        )
+
+    async def get_scenario(self, scenario_id: str) -> Optional[Dict[str, Any]]:
+        return await self.scenarios.get_or_load(
+            scenario_id,
+            lambda: self.personality_service.get_scenario(scenario_id),
+        )
+
+    async def get_all_personalities(self) -> List[Dict[str, Any]]:
+        return await self.personalities.get_or_load(
+            _ALL_PERSONALITIES,
+            self.personality_service.get_all_personalities,
+        )
+
+    async def invalidate_personality(self, personality_id: Optional[str] = None) -> None:
+        """Drop a personality (and the full listing) locally and on every other worker"""
+        self._invalidate_local("personality", personality_id)
+        await self._publish("personality", personality_id)
+
+    async def invalidate_scenario(self, scenario_id: Optional[str] = None) -> None:
+        self._invalidate_local("scenario", scenario_id)
+        await self._publish("scenario", scenario_id)
+
+    def _invalidate_local(self, kind: str, key: Optional[str]) -> None:
+        cache = self.personalities if kind == "personality" else self.scenarios
+        if key is None:
+            cache.clear()
+        else:
+            cache.invalidate(key)
+            if kind == "personality":
+                cache.invalidate(_ALL_PERSONALITIES)
+        for callback in self._callbacks:
+            try:
+                callback(kind, key)
+            except Exception as e:
+                logger.error(f"Cache invalidation callback failed: {str(e)}")
+
+    async def _publish(self, kind: str, key: Optional[str]) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.publish(
+                INVALIDATION_CHANNEL,
+                json.dumps({"kind": kind, "key": key, "origin": self._worker_id}),
+            )
+        except Exception as e:
+            # Other workers converge when their TTL expires
+            logger.error(f"Failed to publish cache invalidation: {str(e)}")
+
+    async def start(self) -> None:
+        """Subscribe to invalidations published by other workers"""
+        if self.redis is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        reconnect = False
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while we were disconnected is lost, so start clean
+                if reconnect:
+                    self._invalidate_local("personality", None)
+                    self._invalidate_local("scenario", None)
+                else:
+                    self.personalities.clear()
+                    self.scenarios.clear()
+                reconnect = True
+                try:
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        event = json.loads(message["data"])
+                        if event.get("origin") != self._worker_id:
+                            self._invalidate_local(event.get("kind"), event.get("key"))
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Personality cache invalidation listener failed: {str(e)}")
+                await asyncio.sleep(1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "personalities": self.personalities.stats(),
+            "scenarios": self.scenarios.stats(),
+        }
@@ -0,0 +1,130 @@
+"""
+Prompt token reservations for context budgeting.
+
+The conversation service builds its own prompt from the personality's system
+prompt, traits, communication style, background and scenario. The history
+sent next to it has to leave room for that prompt, so its size is estimated
+here from the same fields, once per personality/scenario pair, and reserved
+out of the model's context budget.
+"""
+
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from utils.logger import get_logger
+from utils.tokens import count_tokens
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _Entry:
+    personality: Dict[str, Any]
+    scenario: Optional[Dict[str, Any]]
+    token_count: int
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+
+def render_prompt(personality: Dict[str, Any], scenario: Optional[Dict[str, Any]] = None) -> str:
+    """Render the static part of the prompt for a personality and optional scenario"""
+    lines = [personality.get("system_prompt", "").strip(), ""]
+
+    name = personality.get("display_name") or personality.get("name")
+    if name:
+        lines.append(f"You are {name}.")
+
+    traits = personality.get("traits") or {}
+    if traits:
+        lines.append("Personality traits:")
+        lines.extend(f"- {key}: {_format_value(traits[key])}" for key in sorted(traits))
+
+    style = personality.get("communication_style") or {}
+    if style:
+        lines.append("Communication style:")
+        lines.extend(f"- {key}: {_format_value(style[key])}" for key in sorted(style))
+
+    background = personality.get("background") or {}
+    if background:
+        lines.append("Background:")
+        lines.extend(f"- {key}: {_format_value(background[key])}" for key in sorted(background))
+
+    if scenario:
+        lines.append("")
+        lines.append("Scenario:")
+        for key in ("title", "category", "difficulty", "description", "setup_prompt"):
+            if scenario.get(key):
+                lines.append(f"- {key}: {_format_value(scenario[key])}")
+        for objective in scenario.get("objectives") or []:
+            lines.append(f"- objective: {objective}")
+
+    return "\n".join(lines).strip() + "\n"
+
+
+class PromptBudget:
+    """Token counts of the personality/scenario prompt, computed once per pair"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], _Entry]" = OrderedDict()
+        self.hits = 0
+        self.counts = 0
+
+    def reserved_tokens(
+        self,
+        personality: Dict[str, Any],
+        scenario: Optional[Dict[str, Any]] = None,
+        personality_id: Optional[str] = None,
+    ) -> int:
+        """
+        Tokens to reserve for the prompt, counted only when the inputs changed.
+
+        Pass the id the personality was looked up by so :meth:`invalidate`
+        with that id finds the entry; the personality's own id or name is
+        used otherwise.
+        """
+        if personality_id is None:
+            personality_id = personality.get("id") or personality.get("name")
+        personality_id = str(personality_id)
+        scenario_id = str(scenario.get("id")) if scenario and scenario.get("id") is not None else None
+        key = (personality_id, scenario_id)
+
+        # The personality cache hands out the same objects until they are
+        # reloaded, so identity is enough on the hot path
+        entry = self._entries.get(key)
+        if entry is not None and entry.personality is personality and entry.scenario is scenario:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.token_count
+
+        token_count = count_tokens(render_prompt(personality, scenario))
+        self._entries[key] = _Entry(personality, scenario, token_count)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.counts += 1
+        return token_count
+
+    def invalidate(self, personality_id: Optional[str] = None, scenario_id: Optional[str] = None) -> None:
+        """Drop the counts made for a personality, for a scenario, or (with neither) all of them"""
+        for key in list(self._entries):
+            if personality_id is not None and key[0] != str(personality_id):
+                continue
+            if scenario_id is not None and key[1] != str(scenario_id):
+                continue
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "counts": self.counts,
+        }
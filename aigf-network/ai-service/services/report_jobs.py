@@ -0,0 +1,218 @@
+"""
+Submit/poll jobs for comprehensive post-session feedback reports.
+
+Reports run on a fixed pool of worker tasks instead of inside the request.
+Each job is identified by a hash of its inputs, so a repeated request returns
+the cached report immediately and concurrent duplicates share one job.
+Completed reports are handed to ``on_complete``, e.g. to persist them. When
+given ``analyze_flow``, the full-transcript flow analysis runs alongside the
+report and is attached to it as ``conversation_flow``.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from models.batch_scheduler import ModelDispatch, call_directly
+from utils.cache import TTLCache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "4"))
+REPORT_QUEUE_SIZE = int(os.getenv("REPORT_QUEUE_SIZE", "1000"))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "2048"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "86400"))
+
+
+class ReportQueueFull(Exception):
+    """Raised when no more report jobs can be accepted"""
+
+
+@dataclass
+class ReportJob:
+    job_id: str
+    session_id: str
+    messages: List[Dict[str, Any]]
+    session_type: str
+    difficulty_level: int
+    user_id: Optional[str] = None
+    status: str = "queued"
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def report_key(messages: List[Dict[str, Any]], session_type: str, difficulty_level: int) -> str:
+    """Content hash of the report inputs"""
+    canonical = json.dumps(
+        [messages, session_type, difficulty_level],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ComprehensiveReportJobs:
+    """Worker pool and content-addressed result cache for comprehensive feedback"""
+
+    def __init__(
+        self,
+        feedback_service,
+        workers: int = REPORT_WORKERS,
+        max_queue: int = REPORT_QUEUE_SIZE,
+        dispatch: ModelDispatch = call_directly,
+        analyze_flow: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]] = None,
+        on_complete: Optional[Callable[[ReportJob], Awaitable[None]]] = None,
+    ):
+        self.feedback_service = feedback_service
+        self.dispatch = dispatch
+        self.analyze_flow = analyze_flow
+        self.on_complete = on_complete
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._active: Dict[str, ReportJob] = {}
+        self._finished = TTLCache(
+            max_size=REPORT_CACHE_SIZE,
+            ttl_seconds=REPORT_CACHE_TTL,
+            name="comprehensive_reports",
+        )
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers and fail running and still-queued jobs so no waiter hangs"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status = "failed"
+            job.error = "Report service shut down"
+            self._finish(job)
+            self._queue.task_done()
+
+    def submit(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        session_type: str,
+        difficulty_level: int,
+        user_id: Optional[str] = None,
+    ) -> ReportJob:
+        """Return the existing job for these inputs or queue a new one"""
+        job_id = report_key(messages, session_type, difficulty_level)
+
+        job = self._active.get(job_id)
+        if job is not None:
+            return job
+
+        job = self._finished.get(job_id)
+        if job is not None and job.status == "completed":
+            return job
+
+        job = ReportJob(
+            job_id=job_id,
+            session_id=session_id,
+            messages=messages,
+            session_type=session_type,
+            difficulty_level=difficulty_level,
+            user_id=user_id,
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ReportQueueFull(f"Report queue is full ({self._queue.maxsize} jobs)")
+        self._active[job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self._active.get(job_id) or self._finished.get(job_id)
+
+    async def wait(self, job: ReportJob) -> ReportJob:
+        await job.done.wait()
+        return job
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await self._report(job)
+                job.status = "completed"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "Report worker shut down"
+                raise
+            except Exception as e:
+                logger.error(f"Comprehensive report {job.job_id} failed: {str(e)}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                self._finish(job)
+                self._queue.task_done()
+
+            if job.status == "completed" and self.on_complete is not None:
+                try:
+                    await self.on_complete(job)
+                except Exception as e:
+                    logger.error(f"Post-processing of report {job.job_id} failed: {str(e)}")
+
+    async def _report(self, job: ReportJob) -> Dict[str, Any]:
+        report = self.dispatch(
+            "feedback",
+            self.feedback_service.generate_comprehensive_feedback,
+            session_id=job.session_id,
+            messages=job.messages,
+            session_type=job.session_type,
+            difficulty_level=job.difficulty_level,
+        )
+        if self.analyze_flow is None:
+            return await report
+        result, flow = await asyncio.gather(report, self.analyze_flow(job.messages))
+        if isinstance(result, dict) and "conversation_flow" not in result:
+            result = {**result, "conversation_flow": flow}
+        return result
+
+    def _finish(self, job: ReportJob) -> None:
+        job.finished_at = time.time()
+        # Inputs are not needed once the report exists
+        job.messages = []
+        self._active.pop(job.job_id, None)
+        self._finished.set(job.job_id, job)
+        job.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize(),
+            "active": len(self._active),
+            "cache": self._finished.stats(),
+        }
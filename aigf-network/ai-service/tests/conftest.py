@@ -0,0 +1,24 @@
+"""
+Shared setup for the AI service unit tests.
+
+Tests import the service modules by their in-service paths (``services.*``,
+``utils.*``). ``utils.logger`` ships with the deployed service image; when it
+is not on the path the standard library logger is used instead.
+"""
+
+import importlib
+import logging
+import os
+import sys
+import types
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+try:
+    importlib.import_module("utils.logger")
+except ImportError:
+    _logger_module = types.ModuleType("utils.logger")
+    _logger_module.get_logger = logging.getLogger
+    sys.modules["utils.logger"] = _logger_module
@@ -0,0 +1,124 @@
+import asyncio
+from typing import Any, Dict, List
+
+from models.batch_scheduler import BatchScheduler, service_call
+from models.router import ModelRouter
+from services.batch_assessment import ConcurrentAssessor
+
+CONVERSATIONS = [
+    [
+        {"sender": "AI", "content": "Hi! How was your weekend?"},
+        {"sender": "USER", "content": "Great, I went hiking. Do you like the outdoors?"},
+    ],
+    [
+        {"sender": "AI", "content": "What do you do for work?"},
+        {"sender": "USER", "content": "um, sorry, I guess I'm in sales"},
+        {"sender": "AI", "content": "Sales sounds interesting!"},
+        {"sender": "USER", "content": "it's fine"},
+    ],
+    [{"sender": "USER", "content": "I love cooking pasta from scratch."}],
+]
+
+
+class FakeAssessmentService:
+    """Deterministic stand-in for AssessmentService.analyze_skills"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def analyze_skills(self, user_id, assessment_type, conversation_data, session_context=None):
+        self.calls += 1
+        user_messages = [m["content"] for m in conversation_data if m["sender"] == "USER"]
+        if not user_messages:
+            raise ValueError("conversation_data has no user messages")
+        words = sum(len(content.split()) for content in user_messages)
+        questions = sum("?" in content for content in user_messages)
+        return {
+            "user_id": user_id,
+            "skill_scores": {
+                "engagement": round(min(100.0, 10.0 * words / len(user_messages)), 1),
+                "curiosity": round(100.0 * questions / len(user_messages), 1),
+            },
+        }
+
+
+def _payloads() -> List[Dict[str, Any]]:
+    return [
+        {
+            "user_id": f"user-{index}",
+            "assessment_type": "practice",
+            "conversation_data": conversation,
+            "session_context": None,
+        }
+        for index, conversation in enumerate(CONVERSATIONS)
+    ]
+
+
+async def _items(payloads):
+    for index, payload in enumerate(payloads):
+        yield index, payload, None
+
+
+def _assess_batch(assessor: ConcurrentAssessor, payloads) -> List[Dict[str, Any]]:
+    async def run():
+        return [entry async for entry in assessor.assess(_items(payloads))]
+    return asyncio.run(run())
+
+
+def _routed(service: FakeAssessmentService):
+    """analyze_skills dispatched like main._analyze_skills: router -> batch scheduler"""
+    scheduler = BatchScheduler(max_wait_ms=5)
+    router = ModelRouter(scheduler=scheduler, routes={"assessment": {"candidates": ["test-model"], "p95_slo_ms": 1000}})
+    scheduler.register_service_calls("test-model")
+
+    async def analyze(payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await router.submit("assessment", service_call(service.analyze_skills, **payload))
+    return analyze
+
+
+def test_batch_scores_match_single_assessment():
+    service = FakeAssessmentService()
+    payloads = _payloads()
+    single = [asyncio.run(service.analyze_skills(**payload)) for payload in payloads]
+
+    entries = _assess_batch(ConcurrentAssessor(_routed(service)), payloads)
+
+    summary = entries.pop()
+    assert summary == {"done": True, "total": len(payloads), "failed": 0}
+    for entry in entries:
+        expected = single[entry["index"]]
+        assert {key: entry[key] for key in expected} == expected
+        assert entry["assessment_type"] == "practice"
+
+
+def test_failed_items_are_reported_individually():
+    service = FakeAssessmentService()
+    payloads = _payloads()
+    payloads[1]["conversation_data"] = [{"sender": "AI", "content": "Hello?"}]
+    assessor = ConcurrentAssessor(_routed(service))
+
+    entries = _assess_batch(assessor, payloads)
+
+    summary = entries.pop()
+    assert summary == {"done": True, "total": 3, "failed": 1}
+    failures = [entry for entry in entries if "error" in entry]
+    assert [entry["index"] for entry in failures] == [1]
+    assert "no user messages" in failures[0]["error"]
+    assert assessor.stats()["failed"] == 1
+
+
+def test_concurrent_scoring_is_bounded():
+    running = peak = 0
+
+    async def analyze(payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return {"score": 1}
+
+    payloads = [dict(_payloads()[0], user_id=f"user-{i}") for i in range(20)]
+    entries = _assess_batch(ConcurrentAssessor(analyze, max_in_flight=3), payloads)
+    assert entries.pop() == {"done": True, "total": 20, "failed": 0}
+    assert peak == 3
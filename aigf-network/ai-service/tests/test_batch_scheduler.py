@@ -0,0 +1,70 @@
+import asyncio
+
+from models.batch_scheduler import BatchScheduler, service_call
+
+
+class UnbatchedService:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        return prompt.upper()
+
+
+class BatchedService:
+    def __init__(self):
+        self.batches = []
+
+    async def generate(self, prompt, model=None):
+        return (await self.generate_batch([{"prompt": prompt}], model=model))[0]
+
+    async def generate_batch(self, requests, model=None):
+        self.batches.append((model, [request["prompt"] for request in requests]))
+        return [
+            ValueError("empty prompt") if not request["prompt"] else f"{model}:{request['prompt']}"
+            for request in requests
+        ]
+
+
+def test_calls_without_a_batch_entry_point_run_directly():
+    scheduler = BatchScheduler(max_batch_size=8, max_wait_ms=50)
+    scheduler.register_service_calls("model-a")
+    service = UnbatchedService()
+
+    async def run():
+        return await asyncio.gather(
+            *(scheduler.run("model-a", service_call(service.generate, prompt=p)) for p in "abc")
+        )
+
+    assert asyncio.run(run()) == ["A", "B", "C"]
+    stats = scheduler.stats()
+    assert stats["direct_calls"] == 3
+    assert stats["models"]["model-a"]["batches"] == 0
+
+
+def test_batch_entry_points_receive_one_call_per_batch():
+    scheduler = BatchScheduler(max_batch_size=8, max_wait_ms=5)
+    scheduler.register_service_calls("model-a")
+    service = BatchedService()
+
+    async def run():
+        return await asyncio.gather(
+            *(scheduler.run("model-a", service_call(service.generate, prompt=p)) for p in ["x", "", "y"]),
+            return_exceptions=True,
+        )
+
+    first, failed, last = asyncio.run(run())
+    assert (first, last) == ("model-a:x", "model-a:y")
+    assert isinstance(failed, ValueError)
+    assert service.batches == [("model-a", ["x", "", "y"])]
+    assert scheduler.stats()["direct_calls"] == 0
+
+
+def test_positional_calls_are_not_batched():
+    scheduler = BatchScheduler(max_batch_size=8, max_wait_ms=5)
+    scheduler.register_service_calls("model-a")
+    service = BatchedService()
+
+    assert asyncio.run(scheduler.run("model-a", service_call(service.generate, "x"))) == "model-a:x"
+    assert scheduler.stats()["direct_calls"] == 1
@@ -0,0 +1,75 @@
+import asyncio
+
+from utils.batching import MicroBatcher
+
+
+def test_concurrent_submissions_are_batched():
+    batches = []
+
+    async def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=4, max_wait=0.01)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(10)]
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert batcher.stats()["items"] == 10
+
+
+def test_batch_failure_reaches_every_caller():
+    async def broken(items):
+        raise ValueError("model down")
+
+    batcher = MicroBatcher(broken, max_batch_size=8, max_wait=0.001)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_per_item_exceptions_only_fail_their_caller():
+    async def partly(items):
+        return [ValueError(item) if item == 1 else item for item in items]
+
+    batcher = MicroBatcher(partly, max_batch_size=8, max_wait=0.001)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    first, second, third = asyncio.run(run())
+    assert (first, third) == (0, 2)
+    assert isinstance(second, ValueError)
+
+
+def test_result_count_mismatch_is_an_error():
+    async def short(items):
+        return items[:-1]
+
+    batcher = MicroBatcher(short, max_batch_size=2, max_wait=0.001)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    for result in asyncio.run(run()):
+        assert isinstance(result, RuntimeError)
+
+
+def test_drain_dispatches_queued_items():
+    async def identity(items):
+        return items
+
+    batcher = MicroBatcher(identity, max_batch_size=8, max_wait=60)
+
+    async def run():
+        pending = asyncio.ensure_future(batcher.submit("item"))
+        await asyncio.sleep(0)
+        await batcher.drain()
+        return await pending
+
+    assert asyncio.run(run()) == "item"
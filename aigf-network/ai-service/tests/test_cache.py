@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from utils.cache import TTLCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+    assert cache.get("key") == "value"
+
+
+def test_entries_expire_and_evict_least_recently_used():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    cache.set("short", 4, ttl_seconds=-1)
+    assert cache.get("short") is None
+
+
+def test_invalidated_load_is_not_written_back():
+    cache = TTLCache()
+    release = None
+
+    async def slow_loader():
+        await release.wait()
+        return "old"
+
+    async def fresh_loader():
+        return "new"
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.create_task(cache.get_or_load("key", slow_loader))
+        await asyncio.sleep(0)
+        cache.invalidate("key")
+        # A caller after the invalidation does not join the stale load
+        assert await cache.get_or_load("key", fresh_loader) == "new"
+        release.set()
+        assert await first == "old"
+        return cache.get("key")
+
+    assert asyncio.run(run()) == "new"
+
+
+def test_waiter_takes_over_a_cancelled_load():
+    cache = TTLCache()
+    started = None
+
+    async def loader():
+        started.set()
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        nonlocal started
+        started = asyncio.Event()
+        owner = asyncio.create_task(cache.get_or_load("key", loader))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_load("key", loader))
+        await asyncio.sleep(0)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return await waiter
+
+    assert asyncio.run(run()) == "value"
+    assert cache.takeovers == 1
+
+
+def test_missing_values_are_cached_for_the_negative_ttl():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return None
+
+    async def run(cache):
+        await cache.get_or_load("key", loader)
+        await cache.get_or_load("key", loader)
+
+    asyncio.run(run(TTLCache(negative_ttl_seconds=60)))
+    assert len(calls) == 1
+
+    calls.clear()
+    asyncio.run(run(TTLCache(negative_ttl_seconds=0)))
+    assert len(calls) == 2
@@ -0,0 +1,50 @@
+from services.context_manager import ContextManager
+
+
+def _history(count, start=0):
+    return [
+        {"sender": "USER" if i % 2 else "AI", "content": f"Message number {i} about hiking trails and weekend plans."}
+        for i in range(start, start + count)
+    ]
+
+
+def test_short_histories_are_sent_verbatim():
+    manager = ContextManager(budgets={"m": 1000})
+    history = _history(4)
+    context = manager.compact("s1", history, model="m")
+    assert context.history == history
+    assert context.summarized_messages == 0
+
+
+def test_long_histories_are_summarized_within_budget():
+    manager = ContextManager(budgets={"m": 300}, min_recent_messages=2)
+    history = _history(40)
+    context = manager.compact("s1", history, model="m", reserved_tokens=50)
+    assert context.history[0]["summary"] is True
+    assert context.summarized_messages > 0
+    assert context.compacted_tokens < context.original_tokens
+    assert context.history[-2:] == history[-2:]
+
+
+def test_appended_turns_reuse_the_cached_state():
+    manager = ContextManager(budgets={"m": 300}, min_recent_messages=2)
+    history = _history(40)
+    first = manager.compact("s1", history, model="m")
+    state = manager._states["s1"]
+    second = manager.compact("s1", history + _history(2, start=40), model="m")
+    assert manager._states["s1"] is state
+    assert second.summarized_messages >= first.summarized_messages
+
+
+def test_rewritten_history_resets_the_summary():
+    manager = ContextManager(budgets={"m": 300}, min_recent_messages=2)
+    history = _history(40)
+    manager.compact("s1", history, model="m")
+    state = manager._states["s1"]
+
+    rewritten = history[:-1] + [{"sender": "USER", "content": "Something else entirely."}]
+    manager.compact("s1", rewritten, model="m")
+    assert manager._states["s1"] is not state
+
+    manager.compact("s1", rewritten[:10], model="m")
+    assert manager._states["s1"].folded == 0
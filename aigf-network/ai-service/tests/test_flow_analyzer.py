@@ -0,0 +1,61 @@
+import asyncio
+
+from services.flow_analyzer import IncrementalFlowAnalyzer
+from services.report_jobs import ComprehensiveReportJobs
+
+TRANSCRIPT = [
+    {"sender": "AI", "content": "Hi! How was your weekend?"},
+    {"sender": "USER", "content": "Great, I went hiking with friends. Do you like hiking?"},
+    {"sender": "AI", "content": "I love hiking! Where did you go?"},
+    {"sender": "USER", "content": "A lake trail, it was awesome but I was tired."},
+]
+
+
+def test_incremental_turns_match_a_full_scan():
+    analyzer = IncrementalFlowAnalyzer()
+    state, _ = analyzer.analyze_turn("s1", TRANSCRIPT[:1], TRANSCRIPT[1])
+    analyzer.commit_turn("s1", state, TRANSCRIPT[2])
+    _, snapshot = analyzer.analyze_turn("s1", TRANSCRIPT[:3], TRANSCRIPT[3])
+
+    fresh = IncrementalFlowAnalyzer()
+    _, rescanned = fresh.analyze_turn("s2", TRANSCRIPT[:3], TRANSCRIPT[3])
+    assert snapshot == rescanned
+    assert snapshot["message_count"] == 4
+    assert snapshot["turn_taking"]["user_turns"] == 2
+    assert snapshot["question_ratio"] == 0.5
+    assert "hiking" in snapshot["topics"]
+
+
+def test_uncommitted_turns_are_not_kept():
+    analyzer = IncrementalFlowAnalyzer()
+    analyzer.analyze_turn("s1", TRANSCRIPT[:1], TRANSCRIPT[1])
+    _, snapshot = analyzer.analyze_turn("s1", TRANSCRIPT[:1], TRANSCRIPT[1])
+    assert snapshot["message_count"] == 2
+
+
+class FakeFeedbackService:
+    async def generate_comprehensive_feedback(self, session_id, messages, session_type, difficulty_level):
+        return {"session_id": session_id, "message_count": len(messages)}
+
+
+def test_report_carries_the_full_transcript_flow_analysis():
+    scanned = []
+
+    async def analyze_flow(messages):
+        scanned.append(len(messages))
+        return {"message_count": len(messages)}
+
+    jobs = ComprehensiveReportJobs(FakeFeedbackService(), workers=1, analyze_flow=analyze_flow)
+
+    async def run():
+        await jobs.start()
+        try:
+            job = jobs.submit("s1", TRANSCRIPT, "PRACTICE", 1)
+            return await jobs.wait(job)
+        finally:
+            await jobs.stop()
+
+    job = asyncio.run(run())
+    assert job.status == "completed"
+    assert job.result == {"session_id": "s1", "message_count": 4, "conversation_flow": {"message_count": 4}}
+    assert scanned == [4]
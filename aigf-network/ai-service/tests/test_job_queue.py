@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from utils.job_queue import PersistentJobQueue
+
+
+def _queue(tmp_path, handler=None, **options):
+    async def noop(payload):
+        return None
+
+    return PersistentJobQueue(
+        path=str(tmp_path / "jobs.db"),
+        queue="test",
+        handler=handler or noop,
+        **options,
+    )
+
+
+async def _wait_for(queue, job_id, statuses=("completed", "failed"), timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = await queue.get(job_id)
+        if job["status"] in statuses or time.monotonic() > deadline:
+            return job
+        await asyncio.sleep(0.01)
+
+
+def test_jobs_run_to_completion(tmp_path):
+    async def handler(payload):
+        return {"user_id": payload["user_id"], "score": 42}
+
+    queue = _queue(tmp_path, handler, workers=1, poll_interval_seconds=0.01)
+
+    async def run():
+        await queue.start()
+        try:
+            job = await queue.enqueue({"user_id": "u1"})
+            return await _wait_for(queue, job["id"]), await queue.stats()
+        finally:
+            await queue.stop()
+
+    job, stats = asyncio.run(run())
+    assert job["status"] == "completed"
+    assert job["result"] == {"user_id": "u1", "score": 42}
+    assert job["attempts"] == 1
+    assert stats["jobs"] == {"completed": 1}
+
+
+def test_failures_are_retried_then_failed(tmp_path):
+    attempts = []
+
+    async def handler(payload):
+        attempts.append(1)
+        raise RuntimeError("service unavailable")
+
+    queue = _queue(
+        tmp_path, handler, workers=1, max_attempts=3,
+        retry_backoff_seconds=0.0, poll_interval_seconds=0.01,
+    )
+
+    async def run():
+        await queue.start()
+        try:
+            job = await queue.enqueue({"user_id": "u1"})
+            return await _wait_for(queue, job["id"], statuses=("failed",))
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(run())
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert job["error"] == "service unavailable"
+    assert len(attempts) == 3
+
+
+def test_expired_leases_count_as_attempts_and_dead_letter(tmp_path):
+    # A zero timeout makes every lease expire as soon as it is taken
+    queue = _queue(tmp_path, max_attempts=2, job_timeout_seconds=0.0)
+
+    async def run():
+        job = await queue.enqueue({"user_id": "u1"})
+        first = await queue._run(queue._claim)
+        time.sleep(0.001)
+        second = await queue._run(queue._claim)
+        time.sleep(0.001)
+        third = await queue._run(queue._claim)
+        return job, first, second, third, await queue.get(job["id"])
+
+    try:
+        job, first, second, third, final = asyncio.run(run())
+    finally:
+        asyncio.run(queue.stop())
+    assert (first["id"], first["attempts"]) == (job["id"], 1)
+    assert (second["id"], second["attempts"]) == (job["id"], 2)
+    assert second["error"] == "Worker lease expired"
+    assert third is None
+    assert final["status"] == "failed"
+    assert final["error"] == "Worker lease expired after 2 attempts"
+
+
+def test_reclaimed_job_ignores_the_old_workers_result(tmp_path):
+    queue = _queue(tmp_path, max_attempts=3, job_timeout_seconds=0.0)
+
+    async def run():
+        job = await queue.enqueue({"user_id": "u1"})
+        stale = await queue._run(queue._claim)
+        time.sleep(0.001)
+        current = await queue._run(queue._claim)
+        await queue._run(queue._complete, stale, {"from": "stale"})
+        after_stale = await queue.get(job["id"])
+        await queue._run(queue._complete, current, {"from": "current"})
+        return after_stale, await queue.get(job["id"])
+
+    try:
+        after_stale, final = asyncio.run(run())
+    finally:
+        asyncio.run(queue.stop())
+    assert after_stale["status"] == "running"
+    assert final["status"] == "completed"
+    assert final["result"] == {"from": "current"}
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from services.opener_pool import OpenerPool
+from services.personality_cache import INVALIDATION_CHANNEL, PersonalityCache
+
+PERSONALITY = {"id": "p1", "display_name": "Riley", "conversation_starters": ["Hey there!"]}
+
+
+class FakePersonalityService:
+    async def get_personality(self, personality_id):
+        return dict(PERSONALITY, id=personality_id)
+
+    async def get_scenario(self, scenario_id):
+        return None
+
+
+class FakeConversationService:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_initial_message(self, personality, scenario=None, user_profile=None, session_id=None):
+        self.calls += 1
+        return {"content": f"Opener {self.calls} from {personality['id']}", "sentiment": "neutral"}
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def listen(self):
+        for message in self.messages:
+            yield message
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self, messages):
+        self.pubsub_client = FakePubSub(messages)
+
+    def pubsub(self):
+        return self.pubsub_client
+
+
+def _pool(dispatched=None):
+    cache = PersonalityCache(FakePersonalityService())
+
+    async def dispatch(request_type, fn, *args, **kwargs):
+        if dispatched is not None:
+            dispatched.append(request_type)
+        return await fn(*args, **kwargs)
+
+    pool = OpenerPool(
+        FakeConversationService(), cache, target_size=2, low_water=1, refill_concurrency=1, dispatch=dispatch
+    )
+    return cache, pool
+
+
+async def _filled(pool, key=("p1", None, "any")):
+    for _ in range(200):
+        entry = pool._pools.get(key)
+        if entry is not None and len(entry.openers) >= pool.target_size:
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("pool was not refilled")
+
+
+def test_openers_are_generated_through_dispatch():
+    dispatched = []
+    _, pool = _pool(dispatched)
+
+    async def run():
+        pool.register("p1")
+        await pool.start()
+        try:
+            await _filled(pool)
+            return pool.draw("p1", None, None)
+        finally:
+            await pool.stop()
+
+    opener = asyncio.run(run())
+    assert opener["content"].startswith("Opener")
+    assert dispatched and set(dispatched) == {"conversation"}
+
+
+def test_remote_invalidation_drops_pooled_openers():
+    event = {"kind": "personality", "key": "p1", "origin": "another-worker"}
+    cache, pool = _pool()
+    dropped = []
+    cache.on_invalidate(lambda kind, key: dropped.append((kind, key)))
+    cache.on_invalidate(lambda kind, key: pool.invalidate(personality_id=key) if kind == "personality" else None)
+
+    async def run():
+        pool.register("p1")
+        await pool.start()
+        try:
+            await _filled(pool)
+            epoch = pool._pools[("p1", None, "any")].epoch
+            cache.redis = FakeRedis([{"type": "message", "data": json.dumps(event)}])
+            await cache.start()
+            for _ in range(100):
+                if dropped:
+                    break
+                await asyncio.sleep(0.005)
+            return epoch, pool._pools[("p1", None, "any")].epoch
+        finally:
+            await cache.stop()
+            await pool.stop()
+
+    before, after = asyncio.run(run())
+    assert cache.redis.pubsub_client.channels == [INVALIDATION_CHANNEL]
+    assert dropped == [("personality", "p1")]
+    assert after == before + 1
+
+
+def test_fallback_openers_do_not_claim_a_sentiment():
+    opener = OpenerPool.fallback(PERSONALITY)
+    assert opener["content"] == "Hey there!"
+    assert "sentiment" not in opener
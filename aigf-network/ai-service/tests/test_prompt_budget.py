@@ -0,0 +1,29 @@
+from services.prompt_budget import PromptBudget
+
+PERSONALITY = {
+    "id": "p1",
+    "display_name": "Riley",
+    "system_prompt": "You are an upbeat conversation partner.",
+    "traits": {"warmth": 0.9, "humor": 0.7},
+}
+SCENARIO = {"id": "s1", "title": "Coffee shop first date", "description": "Meeting for the first time."}
+
+
+def test_counts_once_per_personality_and_scenario():
+    budget = PromptBudget()
+    base = budget.reserved_tokens(PERSONALITY)
+    assert budget.reserved_tokens(PERSONALITY) == base
+    with_scenario = budget.reserved_tokens(PERSONALITY, SCENARIO)
+    assert with_scenario > base > 0
+    assert budget.stats() == {"entries": 2, "hits": 1, "counts": 2}
+
+
+def test_invalidate_drops_every_scenario_of_a_personality():
+    budget = PromptBudget()
+    budget.reserved_tokens(PERSONALITY, personality_id="p1")
+    budget.reserved_tokens(PERSONALITY, SCENARIO, personality_id="p1")
+    budget.invalidate("p1")
+    assert budget.stats()["entries"] == 0
+
+    updated = {**PERSONALITY, "system_prompt": PERSONALITY["system_prompt"] + " Ask lots of questions."}
+    assert budget.reserved_tokens(updated, personality_id="p1") > budget.reserved_tokens(PERSONALITY, personality_id="p2")
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from models.batch_scheduler import BatchScheduler, service_call
+from models.router import ModelRouter
+
+ROUTES = {"conversation": {"candidates": ["fast", "backup"], "p95_slo_ms": 1000}}
+
+
+def _router():
+    scheduler = BatchScheduler(max_wait_ms=1)
+    router = ModelRouter(scheduler=scheduler, routes=ROUTES, service_model="configured")
+    for model in router.models:
+        scheduler.register_service_calls(model)
+    return router
+
+
+class FlakyService:
+    """Fails on its first call; takes no model argument"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate(self, prompt):
+        self.calls.append(None)
+        if len(self.calls) == 1:
+            raise RuntimeError("provider error")
+        return prompt
+
+
+class RoutableService(FlakyService):
+    async def generate(self, prompt, model=None):
+        self.calls.append(model)
+        if len(self.calls) == 1:
+            raise RuntimeError("provider error")
+        return f"{model}:{prompt}"
+
+
+def test_unroutable_calls_run_once_on_the_service_model():
+    router = _router()
+    service = FlakyService()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(router.submit("conversation", service_call(service.generate, prompt="hi")))
+    assert service.calls == [None]
+
+    health = router.routing_table()
+    assert router.serving_model("conversation", service.generate) == "configured"
+    assert "configured" in router.models
+    assert health["models"]["fast"]["samples"] == 0
+    assert router._model_stats("configured").summary()["error_rate"] == 1.0
+
+
+def test_routable_calls_fail_over_to_the_next_candidate():
+    router = _router()
+    service = RoutableService()
+
+    result = asyncio.run(router.submit("conversation", service_call(service.generate, prompt="hi")))
+    assert result == "backup:hi"
+    assert service.calls == ["fast", "backup"]
+    health = router.routing_table()["models"]
+    assert health["fast"]["error_rate"] == 1.0
+    assert health["backup"]["error_rate"] == 0.0
+
+
+def test_streams_record_against_the_model_that_served_them():
+    router = _router()
+
+    async def stream(prompt):
+        for word in prompt.split():
+            yield word
+
+    async def run():
+        return [chunk async for chunk in router.stream("conversation", stream, prompt="a b")]
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert router._model_stats("configured").summary()["samples"] == 1
+    assert router._model_stats("fast").summary()["samples"] == 0
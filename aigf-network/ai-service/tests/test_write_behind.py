@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime
+
+from utils.db_pool import SQLitePool
+from utils.write_behind import WriteBehindBuffer
+
+
+def _message(index):
+    return {
+        "session_id": "s1",
+        "message_type": "user",
+        "content": f"message {index}",
+        "ai_personality_id": "p1",
+        "timestamp": datetime(2026, 1, 1, 12, 0, index),
+        "message_metadata": {"version": index},
+    }
+
+
+async def _count(pool):
+    rows = await pool.fetch("SELECT COUNT(*) AS n FROM chat_messages")
+    return rows[0]["n"]
+
+
+def test_rows_flush_on_size_and_on_stop(tmp_path):
+    async def run():
+        pool = SQLitePool(str(tmp_path / "aigf.db"))
+        await pool.open()
+        buffer = WriteBehindBuffer(max_rows=100, flush_rows=5, flush_interval_ms=60_000)
+        await buffer.start(pool)
+        for index in range(5):
+            await buffer.write("chat_messages", _message(index))
+        for _ in range(100):
+            if buffer.rows_written == 5:
+                break
+            await asyncio.sleep(0.01)
+        flushed_on_size = await _count(pool)
+
+        await buffer.write("chat_messages", _message(5))
+        await buffer.stop()
+        flushed_on_stop = await _count(pool)
+        await pool.close()
+        return flushed_on_size, flushed_on_stop, buffer.stats()
+
+    flushed_on_size, flushed_on_stop, stats = asyncio.run(run())
+    assert flushed_on_size == 5
+    assert flushed_on_stop == 6
+    assert stats["buffered_rows"] == 0
+    assert stats["pool"]["dialect"] == "sqlite"
+
+
+def test_writers_wait_while_the_buffer_is_full(tmp_path):
+    async def run():
+        pool = SQLitePool(str(tmp_path / "aigf.db"))
+        await pool.open()
+        buffer = WriteBehindBuffer(max_rows=3, flush_rows=3, flush_interval_ms=60_000)
+        await buffer.start(pool)
+        await asyncio.gather(*(buffer.write("chat_messages", _message(i)) for i in range(10)))
+        await buffer.stop()
+        written = await _count(pool)
+        await pool.close()
+        return written, buffer.stats()
+
+    written, stats = asyncio.run(run())
+    assert written == 10
+    assert stats["backpressure_waits"] > 0
+    assert stats["dropped_rows"] == 0
+
+
+def test_rows_are_skipped_without_a_database():
+    buffer = WriteBehindBuffer()
+    asyncio.run(buffer.write("chat_messages", _message(0)))
+    assert buffer.stats()["skipped_rows"] == 1
+    assert buffer.stats()["pool"] is None
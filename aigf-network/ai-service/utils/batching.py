@@ -0,0 +1,131 @@
+"""
+Micro-batching of concurrent async calls.
+
+Callers submit single items and await their own result; the batcher groups
+items that arrive within ``max_wait`` seconds (or until ``max_batch_size``)
+and hands them to one batch function call.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BatchFn = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class MicroBatcher:
+    """Collects concurrent submissions into batches for ``batch_fn``"""
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        max_batch_size: int = 16,
+        max_wait: float = 0.01,
+        name: str = "batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._queue: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = set()
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self.max_observed_batch = 0
+        self.inflight_items = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((item, future, time.monotonic()))
+
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._queue:
+            batch, self._queue = self._queue[:self.max_batch_size], self._queue[self.max_batch_size:]
+            # Callers that gave up while queued are dropped before dispatch
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        now = time.monotonic()
+        self.batches += 1
+        self.items += len(batch)
+        self.last_batch_size = len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+        for _, _, enqueued_at in batch:
+            self.total_wait += now - enqueued_at
+            self.max_observed_wait = max(self.max_observed_wait, now - enqueued_at)
+
+        self.inflight_items += len(batch)
+        try:
+            results = await self.batch_fn([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"{self.name}: batch function returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            logger.error(f"{self.name}: batch of {len(batch)} failed: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.inflight_items -= len(batch)
+
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def drain(self) -> None:
+        """Dispatch anything queued and wait for in-flight batches"""
+        self._flush()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size_observed": self.max_observed_batch,
+            "avg_wait_ms": round(1000 * self.total_wait / self.items, 2) if self.items else 0.0,
+            "max_wait_ms": round(1000 * self.max_observed_wait, 2),
+            "queue_depth": self.queue_depth,
+            "inflight_items": self.inflight_items,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_seconds": self.max_wait,
+        }
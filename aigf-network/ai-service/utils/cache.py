@@ -0,0 +1,154 @@
+"""
+Small async-friendly TTL/LRU cache with hit/miss accounting.
+
+Concurrent misses share one load. A load whose caller is cancelled hands the
+work to one of its waiters, and a load for a key invalidated while it was in
+flight neither writes back nor serves callers that arrive after the
+invalidation. Misses (``None``) are remembered for a short negative TTL.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "5"))
+
+
+class _Load:
+    """An in-flight load; ``stale`` is set when its key is invalidated meanwhile"""
+
+    __slots__ = ("future", "stale")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.stale = False
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after ``ttl_seconds``"""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 300.0,
+        name: str = "cache",
+        negative_ttl_seconds: float = CACHE_NEGATIVE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.takeovers = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Load] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        # Later callers start a fresh load instead of joining the stale one
+        load = self._inflight.pop(key, None)
+        if load is not None:
+            load.stale = True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for load in self._inflight.values():
+            load.stale = True
+        self._inflight.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        cache_none: bool = False,
+    ) -> Any:
+        """
+        Return the cached value or load it once, sharing the load with concurrent callers.
+
+        ``None`` is cached for ``negative_ttl_seconds``, or for the full TTL
+        when ``cache_none`` is set.
+        """
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending.future)
+            except asyncio.CancelledError:
+                if not pending.future.cancelled():
+                    raise
+                # The caller running the load went away; take it over
+                self.takeovers += 1
+
+        load = _Load(asyncio.get_running_loop().create_future())
+        self._inflight[key] = load
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            load.future.cancel()
+            raise
+        except Exception as e:
+            load.future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            load.future.exception()
+            raise
+        else:
+            load.future.set_result(value)
+            if not load.stale:
+                if value is not None or cache_none:
+                    self.set(key, value)
+                elif self.negative_ttl_seconds > 0:
+                    self.set(key, None, ttl_seconds=self.negative_ttl_seconds)
+            return value
+        finally:
+            if self._inflight.get(key) is load:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "takeovers": self.takeovers,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,273 @@
+"""
+Async database connection pools.
+
+Postgres (asyncpg) is used for the DATABASE_URL postgres server. A small pool
+of SQLite connections can stand in for tests and benchmarks, but only when
+DB_ALLOW_SQLITE_FALLBACK is set; otherwise ``create_pool`` refuses a missing
+or non-postgres DATABASE_URL and the service starts without persistence. Both expose the same execute/fetch/insert_many
+interface.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.logger import get_logger
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - asyncpg is an optional dependency
+    asyncpg = None
+
+logger = get_logger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+DB_ALLOW_SQLITE_FALLBACK = os.getenv("DB_ALLOW_SQLITE_FALLBACK", "false").lower() == "true"
+SQLITE_FALLBACK_URL = "sqlite:///data/aigf.db"
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+
+# Tables the AI service writes and reads back, in the shape of database/schema.sql
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message_type TEXT NOT NULL,
+    content TEXT NOT NULL,
+    ai_personality_id TEXT,
+    timestamp TEXT,
+    message_metadata TEXT DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, timestamp);
+CREATE TABLE IF NOT EXISTS session_analytics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    analysis_data TEXT NOT NULL,
+    confidence_metrics TEXT NOT NULL,
+    conversation_quality TEXT NOT NULL,
+    improvement_suggestions TEXT,
+    strengths_identified TEXT,
+    areas_to_work_on TEXT,
+    ai_performance_metrics TEXT NOT NULL,
+    generated_at TEXT
+);
+"""
+
+
+class DatabasePool(ABC):
+    """Common interface of the Postgres and SQLite pools"""
+
+    dialect = ""
+    max_params = 999
+
+    @abstractmethod
+    async def open(self) -> None:
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        ...
+
+    @abstractmethod
+    async def execute(self, sql: str, *args: Any) -> None:
+        ...
+
+    @abstractmethod
+    async def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def placeholder(self, index: int) -> str:
+        ...
+
+    async def insert_many(self, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> int:
+        """Insert ``rows`` with as few multi-row INSERT statements as the parameter limit allows"""
+        per_statement = max(1, self.max_params // len(columns))
+        column_list = ", ".join(columns)
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            values, params = [], []
+            for row in chunk:
+                offset = len(params)
+                values.append(
+                    "(" + ", ".join(self.placeholder(offset + i + 1) for i in range(len(columns))) + ")"
+                )
+                params.extend(row)
+            await self.execute(
+                f"INSERT INTO {table} ({column_list}) VALUES {', '.join(values)}",
+                *params
+            )
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"dialect": self.dialect}
+
+
+class PostgresPool(DatabasePool):
+    dialect = "postgres"
+    max_params = 32767
+
+    def __init__(self, url: str, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE):
+        self.url = url
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+
+    async def open(self) -> None:
+        if asyncpg is None:
+            raise RuntimeError("asyncpg is required for a postgres DATABASE_URL")
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                self.url, min_size=self.min_size, max_size=self.max_size
+            )
+            logger.info(f"Postgres pool opened ({self.min_size}-{self.max_size} connections)")
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def execute(self, sql: str, *args: Any) -> None:
+        async with self._pool.acquire() as conn:
+            await conn.execute(sql, *args)
+
+    async def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        async with self._pool.acquire() as conn:
+            return [dict(row) for row in await conn.fetch(sql, *args)]
+
+    def placeholder(self, index: int) -> str:
+        return f"${index}"
+
+    def stats(self) -> Dict[str, Any]:
+        if self._pool is None:
+            return {"dialect": self.dialect, "open": False}
+        return {
+            "dialect": self.dialect,
+            "open": True,
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+        }
+
+
+class SQLitePool(DatabasePool):
+    """A bounded set of SQLite connections used from worker threads"""
+
+    dialect = "sqlite"
+    max_params = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+    def __init__(self, path: str, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE):
+        self.path = path
+        self.min_size = min_size
+        self.max_size = max_size
+        self._idle: Optional[asyncio.Queue] = None
+        self._size = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    async def open(self) -> None:
+        if self._idle is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._idle = asyncio.Queue()
+        conn = await asyncio.to_thread(self._connect)
+        await asyncio.to_thread(conn.executescript, _SQLITE_SCHEMA)
+        self._size = 1
+        self._idle.put_nowait(conn)
+        while self._size < self.min_size:
+            self._idle.put_nowait(await asyncio.to_thread(self._connect))
+            self._size += 1
+        logger.info(f"SQLite pool opened at {self.path}")
+
+    async def close(self) -> None:
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+        self._idle = None
+        self._size = 0
+
+    async def _acquire(self) -> sqlite3.Connection:
+        if self._idle.empty() and self._size < self.max_size:
+            self._size += 1
+            try:
+                return await asyncio.to_thread(self._connect)
+            except Exception:
+                self._size -= 1
+                raise
+        return await self._idle.get()
+
+    @staticmethod
+    def _adapt(args: Sequence[Any]) -> List[Any]:
+        adapted = []
+        for value in args:
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, (dict, list)):
+                value = json.dumps(value, default=str)
+            adapted.append(value)
+        return adapted
+
+    def _run(self, conn: sqlite3.Connection, sql: str, args: List[Any]) -> List[Dict[str, Any]]:
+        with conn:
+            rows = conn.execute(sql, args).fetchall()
+        return [dict(row) for row in rows]
+
+    async def execute(self, sql: str, *args: Any) -> None:
+        await self.fetch(sql, *args)
+
+    async def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        conn = await self._acquire()
+        try:
+            return await asyncio.to_thread(self._run, conn, sql, self._adapt(args))
+        finally:
+            self._idle.put_nowait(conn)
+
+    def placeholder(self, index: int) -> str:
+        return "?"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dialect": self.dialect,
+            "open": self._idle is not None,
+            "size": self._size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+        }
+
+
+def create_pool(url: str = DATABASE_URL, allow_sqlite: bool = DB_ALLOW_SQLITE_FALLBACK) -> DatabasePool:
+    """
+    Pool for ``url``: postgres:// or postgresql:// via asyncpg.
+
+    SQLite (a sqlite:///path URL, or SQLITE_FALLBACK_URL when ``url`` is
+    empty) is only accepted with ``allow_sqlite``, so a misconfigured
+    deployment fails instead of quietly using a local file.
+    """
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresPool(url)
+    if not url and not allow_sqlite:
+        raise RuntimeError(
+            "DATABASE_URL is not set; set DB_ALLOW_SQLITE_FALLBACK=true to use SQLite for tests or benchmarks"
+        )
+    url = url or SQLITE_FALLBACK_URL
+    if url.startswith("sqlite:///"):
+        if not allow_sqlite:
+            raise RuntimeError("A SQLite DATABASE_URL is only accepted with DB_ALLOW_SQLITE_FALLBACK=true")
+        logger.warning(f"Using SQLite database {url} (DB_ALLOW_SQLITE_FALLBACK)")
+        return SQLitePool(url[len("sqlite:///"):])
+    raise RuntimeError(f"Unsupported DATABASE_URL scheme: {url.split(':', 1)[0]}")
@@ -0,0 +1,268 @@
+"""
+Durable job queue backed by SQLite.
+
+Jobs are persisted before they are acknowledged, claimed under a lease so a
+crashed worker's jobs become claimable again, retried with exponential
+backoff, and processed by a bounded pool of worker tasks. A reclaimed lease
+counts as an attempt, so a job that keeps killing its worker is failed once
+it reaches ``max_attempts`` instead of being retried forever. The database file
+can be shared by several uvicorn workers on the same host.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    run_after REAL NOT NULL,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (queue, status, priority DESC, created_at);
+"""
+
+_COLUMNS = (
+    "id", "queue", "payload", "priority", "status", "attempts", "max_attempts",
+    "result", "error", "created_at", "updated_at", "run_after", "lease_expires_at",
+)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class PersistentJobQueue:
+    """SQLite-backed priority queue with leases, retries and a bounded worker pool"""
+
+    def __init__(
+        self,
+        path: str,
+        queue: str,
+        handler: JobHandler,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 5.0,
+        job_timeout_seconds: float = 300.0,
+        poll_interval_seconds: float = 1.0,
+    ):
+        self.path = path
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.job_timeout_seconds = job_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # Storage
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        def call():
+            with self._lock:
+                return fn(self._connect(), *args)
+        return await asyncio.to_thread(call)
+
+    @staticmethod
+    def _row_to_job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = {column: row[column] for column in _COLUMNS}
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def _insert(self, conn: sqlite3.Connection, job_id: str, payload: Dict[str, Any], priority: int) -> Dict[str, Any]:
+        now = time.time()
+        conn.execute(
+            "INSERT INTO jobs (id, queue, payload, priority, status, attempts, max_attempts,"
+            " created_at, updated_at, run_after) VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?, ?)",
+            (job_id, self.queue, json.dumps(payload, default=str), priority, self.max_attempts, now, now, now),
+        )
+        return self._select(conn, job_id)
+
+    def _select(self, conn: sqlite3.Connection, job_id: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE id = ? AND queue = ?", (job_id, self.queue)
+        ).fetchone()
+        return self._row_to_job(row)
+
+    def _claim(self, conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Lost leases that already used up their attempts are dead-lettered
+            conn.execute(
+                "UPDATE jobs SET status = 'failed',"
+                " error = 'Worker lease expired after ' || attempts || ' attempts',"
+                " updated_at = ?, lease_expires_at = NULL WHERE queue = ?"
+                " AND status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts",
+                (now, self.queue, now),
+            )
+            # Queued jobs that are due, or running jobs whose worker lost its lease
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE queue = ? AND ("
+                " (status = 'queued' AND run_after <= ?)"
+                " OR (status = 'running' AND lease_expires_at < ?))"
+                " ORDER BY priority DESC, created_at LIMIT 1",
+                (self.queue, now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1,"
+                " error = CASE WHEN status = 'running' THEN 'Worker lease expired' ELSE error END,"
+                " status = 'running', updated_at = ?, lease_expires_at = ? WHERE id = ?",
+                (now, now + self.job_timeout_seconds, row["id"]),
+            )
+            job = self._select(conn, row["id"])
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Updates for a claimed job only apply while that claim (its attempt) still
+    # holds the job, so a worker whose lease was reclaimed cannot overwrite it
+
+    def _complete(self, conn: sqlite3.Connection, job: Dict[str, Any], result: Any) -> None:
+        conn.execute(
+            "UPDATE jobs SET status = 'completed', result = ?, error = NULL,"
+            " updated_at = ?, lease_expires_at = NULL"
+            " WHERE id = ? AND status = 'running' AND attempts = ?",
+            (json.dumps(result, default=str), time.time(), job["id"], job["attempts"]),
+        )
+
+    def _fail(self, conn: sqlite3.Connection, job: Dict[str, Any], error: str) -> str:
+        now = time.time()
+        if job["attempts"] < job["max_attempts"]:
+            delay = self.retry_backoff_seconds * (2 ** (job["attempts"] - 1))
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', error = ?, updated_at = ?,"
+                " run_after = ?, lease_expires_at = NULL"
+                " WHERE id = ? AND status = 'running' AND attempts = ?",
+                (error, now, now + delay, job["id"], job["attempts"]),
+            )
+            return "queued"
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ?,"
+            " lease_expires_at = NULL WHERE id = ? AND status = 'running' AND attempts = ?",
+            (error, now, job["id"], job["attempts"]),
+        )
+        return "failed"
+
+    def _release(self, conn: sqlite3.Connection, job: Dict[str, Any]) -> None:
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = attempts - 1, updated_at = ?,"
+            " lease_expires_at = NULL WHERE id = ? AND status = 'running' AND attempts = ?",
+            (time.time(), job["id"], job["attempts"]),
+        )
+
+    def _counts(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) AS n FROM jobs WHERE queue = ? GROUP BY status", (self.queue,)
+        ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    # Public API
+
+    async def enqueue(self, payload: Dict[str, Any], priority: int = 0) -> Dict[str, Any]:
+        """Persist a job and wake a worker"""
+        job = await self._run(self._insert, uuid.uuid4().hex, payload, priority)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._select, job_id)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "queue": self.queue,
+            "workers": len(self._tasks),
+            "jobs": await self._run(self._counts),
+        }
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} workers for job queue {self.queue}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await self._run(self._claim)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job queue {self.queue} failed to claim a job: {str(e)}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                result = await asyncio.wait_for(self.handler(job["payload"]), timeout=self.job_timeout_seconds)
+            except asyncio.CancelledError:
+                # Shutting down: hand the job back without counting the attempt
+                with self._lock:
+                    self._release(self._connect(), job)
+                raise
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                status = await self._run(self._fail, job, error)
+                logger.error(f"Job {job['id']} in {self.queue} failed (attempt {job['attempts']}), now {status}: {error}")
+            else:
+                await self._run(self._complete, job, result)
@@ -0,0 +1,129 @@
+"""
+Prometheus metrics for the AI service: request middleware plus per-stage
+timings for the conversation pipeline.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Iterator, TypeVar
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+T = TypeVar("T")
+
+# Stages are a closed set so label cardinality stays bounded
+STAGES = (
+    "personality_lookup",
+    "scenario_lookup",
+    "session_store",
+    "context",
+    "generation",
+    "flow_analysis",
+    "feedback",
+    "assessment",
+    "db",
+)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_COUNT = Counter(
+    "aigf_ai_requests_total", "Total requests", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "aigf_ai_request_duration_seconds", "Request latency", ["method", "route"],
+    buckets=_LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "aigf_ai_requests_in_flight", "Requests currently being served", multiprocess_mode="livesum"
+)
+STAGE_LATENCY = Histogram(
+    "aigf_ai_stage_duration_seconds", "Latency of each request stage", ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "aigf_ai_stage_errors_total", "Stage failures", ["stage"]
+)
+
+
+def route_template(request: Request) -> str:
+    """Route path template, e.g. /api/personalities/{personality_id}"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _observe_request(request: Request, status: int, start_time: float) -> None:
+    route = route_template(request)
+    REQUEST_COUNT.labels(method=request.method, route=route, status=str(status)).inc()
+    REQUEST_LATENCY.labels(method=request.method, route=route).observe(time.perf_counter() - start_time)
+    REQUESTS_IN_FLIGHT.dec()
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Count and time requests until their body has been sent, so SSE and NDJSON streams are measured in full"""
+    start_time = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _observe_request(request, 500, start_time)
+        raise
+
+    body = getattr(response, "body_iterator", None)
+    if body is None:
+        _observe_request(request, response.status_code, start_time)
+        return response
+
+    async def measured_body() -> AsyncIterator[Any]:
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            _observe_request(request, response.status_code, start_time)
+
+    response.body_iterator = measured_body()
+    return response
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time a block of the request pipeline"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start_time)
+
+
+async def timed(stage: str, awaitable: Awaitable[T]) -> T:
+    """Await ``awaitable`` under a stage timer; handy inside asyncio.gather"""
+    with stage_timer(stage):
+        return await awaitable
+
+
+async def timed_stream(stage: str, chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Time a stream from its first pull to its last chunk"""
+    with stage_timer(stage):
+        async for chunk in chunks:
+            yield chunk
+
+
+def metrics_response() -> Response:
+    """Render metrics, aggregating across workers in multiprocess mode"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,44 @@
+"""
+Shared async Redis connection used for session state, caches and pub/sub.
+Redis is optional: when REDIS_URL is unset or the client library is missing,
+callers fall back to in-process state.
+"""
+
+import os
+from typing import Optional
+
+from utils.logger import get_logger
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is an optional dependency
+    aioredis = None
+
+logger = get_logger(__name__)
+
+_client = None
+
+
+def get_redis() -> Optional["aioredis.Redis"]:
+    """Return the shared Redis client, or None when Redis is not configured"""
+    global _client
+    if _client is None:
+        url = os.getenv("REDIS_URL")
+        if not url or aioredis is None:
+            return None
+        _client = aioredis.from_url(
+            url,
+            password=os.getenv("REDIS_PASSWORD") or None,
+            db=int(os.getenv("REDIS_DB", "0")),
+            decode_responses=True,
+        )
+        logger.info("Redis client configured")
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client if one was opened"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
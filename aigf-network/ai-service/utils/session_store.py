@@ -0,0 +1,197 @@
+"""
+Server-side conversation history keyed by session_id.
+
+History lives in Redis as one list per session so a turn is an O(1) append
+instead of a full re-upload. An in-process LRU keeps hot sessions decoded in
+memory and only pulls the tail of the list when another worker has appended
+to it. The session version is the number of stored messages; appends are
+rejected when the caller's version is stale. Each state also carries a
+chained content digest, so a full transcript from a legacy client can be
+compared with the stored one without relying on its length.
+
+A session that falls out of the LRU without a Redis backend, or expires in
+Redis, is rebuilt through the optional ``loader`` instead of being lost.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "86400"))
+
+# Atomically check the expected length and append. Returns {1, new_len} on
+# success and {0, current_len} when the caller's version is stale.
+_APPEND_SCRIPT = """
+local current = redis.call('LLEN', KEYS[1])
+if current ~= tonumber(ARGV[1]) then
+    return {0, current}
+end
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return {1, current + #ARGV - 2}
+"""
+
+
+class StaleSessionVersion(Exception):
+    """Raised when a client appends to a session using an outdated version"""
+
+    def __init__(self, session_id: str, expected: int, current: int):
+        super().__init__(
+            f"Session {session_id} is at version {current}, client sent {expected}"
+        )
+        self.session_id = session_id
+        self.expected = expected
+        self.current = current
+
+
+def history_digest(messages: List[Dict[str, Any]], digest: str = "") -> str:
+    """Chained hash of ``messages``, continuing from ``digest``"""
+    for message in messages:
+        encoded = json.dumps(message, sort_keys=True, default=str)
+        digest = hashlib.blake2b((digest + encoded).encode(), digest_size=16).hexdigest()
+    return digest
+
+
+@dataclass
+class SessionState:
+    session_id: str
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    digest: str = ""
+
+    def __post_init__(self):
+        if self.history and not self.digest:
+            self.digest = history_digest(self.history)
+
+    @property
+    def version(self) -> int:
+        return len(self.history)
+
+    def extend(self, messages: List[Dict[str, Any]]) -> None:
+        self.history.extend(messages)
+        self.digest = history_digest(messages, self.digest)
+
+
+class SessionStore:
+    """In-process LRU of session histories over an optional Redis backend"""
+
+    def __init__(
+        self,
+        redis=None,
+        max_sessions: int = SESSION_CACHE_SIZE,
+        ttl_seconds: int = SESSION_TTL_SECONDS,
+        key_prefix: str = "aigf:session:",
+        loader: Optional[Callable[[str], Awaitable[Optional[List[Dict[str, Any]]]]]] = None,
+    ):
+        self.redis = redis
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._cache: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._append_script = redis.register_script(_APPEND_SCRIPT) if redis is not None else None
+        self.recovered = 0
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:history"
+
+    def _remember(self, state: SessionState) -> SessionState:
+        self._cache[state.session_id] = state
+        self._cache.move_to_end(state.session_id)
+        while len(self._cache) > self.max_sessions:
+            evicted, _ = self._cache.popitem(last=False)
+            if self.redis is None:
+                logger.warning(f"Session {evicted} evicted from history store without a Redis backend")
+        return state
+
+    async def get(self, session_id: str) -> SessionState:
+        """Return the stored history, syncing only the tail from Redis"""
+        state = self._cache.get(session_id)
+        if self.redis is None:
+            return self._remember(state or SessionState(session_id))
+
+        key = self._key(session_id)
+        if state is None:
+            raw = await self.redis.lrange(key, 0, -1)
+            return self._remember(SessionState(session_id, [json.loads(item) for item in raw]))
+
+        length = await self.redis.llen(key)
+        if length > state.version:
+            raw = await self.redis.lrange(key, state.version, -1)
+            state.extend([json.loads(item) for item in raw])
+        elif length < state.version:
+            # Expired or reset elsewhere; reload from the source of truth
+            raw = await self.redis.lrange(key, 0, -1)
+            state = SessionState(session_id, [json.loads(item) for item in raw])
+        return self._remember(state)
+
+    async def append(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        expected_version: int,
+    ) -> SessionState:
+        """Append messages if the session is still at ``expected_version``"""
+        state = self._cache.get(session_id)
+
+        if self.redis is None:
+            state = state or SessionState(session_id)
+            if state.version != expected_version:
+                raise StaleSessionVersion(session_id, expected_version, state.version)
+            state.extend(messages)
+            return self._remember(state)
+
+        ok, current = await self._append_script(
+            keys=[self._key(session_id)],
+            args=[expected_version, self.ttl_seconds] + [json.dumps(m, default=str) for m in messages],
+        )
+        if not ok:
+            self._cache.pop(session_id, None)
+            raise StaleSessionVersion(session_id, expected_version, current)
+
+        if state is not None and state.version == expected_version:
+            state.extend(messages)
+            return self._remember(state)
+        return await self.get(session_id)
+
+    async def recover(self, session_id: str) -> Optional[SessionState]:
+        """Rebuild a session the cache and backend no longer hold from ``loader``"""
+        if self.loader is None:
+            return None
+        try:
+            history = await self.loader(session_id)
+        except Exception as e:
+            logger.error(f"Failed to reload history for session {session_id}: {str(e)}")
+            return None
+        if not history:
+            return None
+        self.recovered += 1
+        return await self.replace(session_id, history)
+
+    async def replace(self, session_id: str, history: List[Dict[str, Any]]) -> SessionState:
+        """Overwrite the stored history, e.g. when a legacy client uploads a full transcript"""
+        state = SessionState(session_id, list(history))
+        if self.redis is not None:
+            key = self._key(session_id)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                if history:
+                    pipe.rpush(key, *[json.dumps(m, default=str) for m in history])
+                    pipe.expire(key, self.ttl_seconds)
+                await pipe.execute()
+        return self._remember(state)
+
+    async def delete(self, session_id: str) -> None:
+        """Drop a session from the cache and the backend"""
+        self._cache.pop(session_id, None)
+        if self.redis is not None:
+            await self.redis.delete(self._key(session_id))
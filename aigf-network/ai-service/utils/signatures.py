@@ -0,0 +1,40 @@
+"""
+Keyword filtering for calls into services whose signatures vary.
+
+The service classes live outside this package and not every version accepts
+the optional arguments the request path can supply (the routed model).
+Those arguments are only passed to callees that declare them or take
+``**kwargs``.
+"""
+
+import inspect
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Optional
+
+
+@lru_cache(maxsize=256)
+def _keywords(fn: Callable[..., Any]) -> Optional[FrozenSet[str]]:
+    """Keyword names ``fn`` accepts, or None when it takes ``**kwargs``"""
+    try:
+        parameters = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    names = set()
+    for parameter in parameters:
+        if parameter.kind is inspect.Parameter.VAR_KEYWORD:
+            return None
+        if parameter.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY):
+            names.add(parameter.name)
+    return frozenset(names)
+
+
+def accepts(fn: Callable[..., Any], name: str) -> bool:
+    """Whether ``fn`` can be called with keyword argument ``name``"""
+    # Bound methods are recreated on every attribute access; cache the function
+    keywords = _keywords(getattr(fn, "__func__", fn))
+    return keywords is None or name in keywords
+
+
+def optional_kwargs(fn: Callable[..., Any], **kwargs: Any) -> Dict[str, Any]:
+    """The subset of ``kwargs`` that ``fn`` accepts"""
+    return {name: value for name, value in kwargs.items() if accepts(fn, name)}
@@ -0,0 +1,119 @@
+"""
+Server-Sent Events and NDJSON helpers for the streaming endpoints.
+"""
+
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Disable proxy buffering so deltas reach the browser as soon as they are produced
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for handlers that keep reading the request body while
+    the response is being sent.
+
+    The stock response listens for a client disconnect by draining
+    ``receive()``, which would swallow body chunks the handler has not read
+    yet. Here a disconnect surfaces through the body reader or a failed send.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def ndjson_line(data: Dict[str, Any]) -> str:
+    return json.dumps(data, default=str) + "\n"
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    """
+    Parse a newline-delimited JSON body as it arrives.
+
+    Yields ``(value, None)`` per line, or ``(None, error)`` for a line that is
+    not valid JSON so one bad record does not abort the rest. Blank lines are
+    skipped.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if buffer.strip():
+        yield _parse_ndjson_line(buffer)
+
+
+def _parse_ndjson_line(line: bytes) -> Tuple[Any, Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {str(e)}"
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Encode a single SSE frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def replay_as_stream(message: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Present an already generated message as a ConversationService stream"""
+    yield {"delta": message["content"]}
+    yield {"done": True, **message}
+
+
+async def relay_conversation_stream(
+    chunks: AsyncIterator[Dict[str, Any]],
+    build_final: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    session_id: str,
+) -> AsyncIterator[str]:
+    """
+    Relay chunks from a ConversationService stream as SSE frames.
+
+    Chunks carrying a ``delta`` are forwarded immediately as ``delta`` events.
+    The chunk marked ``done`` carries the reply metadata; it is passed to
+    ``build_final`` and sent as the closing ``done`` event.
+    """
+    parts = []
+    try:
+        async for chunk in chunks:
+            if chunk.get("done"):
+                chunk.setdefault("content", "".join(parts))
+                yield sse_event("done", await build_final(chunk))
+                return
+
+            delta = chunk.get("delta")
+            if delta:
+                parts.append(delta)
+                yield sse_event("delta", {"content": delta})
+
+        # Stream ended without a metadata chunk; close with what we have
+        yield sse_event("done", await build_final({"content": "".join(parts)}))
+
+    except HTTPException as e:
+        yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        logger.error(f"Error streaming conversation for session {session_id}: {str(e)}")
+        yield sse_event("error", {"detail": "Failed to stream conversation"})
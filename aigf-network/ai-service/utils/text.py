@@ -0,0 +1,16 @@
+"""
+Word tokenization shared by the conversation analyzers.
+"""
+
+import re
+
+WORD_RE = re.compile(r"[a-z']+")
+
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been but by can
+could did do does doing don't for from had has have having he her here hers him
+his how i i'm if in into is it it's its just like me more most my no not now of
+on one or our out really so some than that that's the their them then there
+these they this to too up us very was we well were what when where which who
+why will with would yeah yes you you're your
+""".split())
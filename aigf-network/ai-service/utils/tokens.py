@@ -0,0 +1,37 @@
+"""
+Token counting shared by prompt reservations and context budgeting.
+
+Uses tiktoken when it is installed; otherwise falls back to an estimate that
+is close enough for budgeting.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is an optional dependency
+    tiktoken = None
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly 4/3 tokens per word-like piece for English text
+    pieces = _PIECE_RE.findall(text)
+    return (len(pieces) * 4 + 2) // 3
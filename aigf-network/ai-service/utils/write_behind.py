@@ -0,0 +1,191 @@
+"""
+Write-behind buffer for high-volume inserts.
+
+Request handlers hand rows to the buffer and return; rows are flushed as
+multi-row INSERTs when enough have accumulated, on a timer, and on shutdown.
+Once the buffer holds ``max_rows`` (including rows being flushed), writers
+wait for a flush to make room instead of growing memory without bound. The
+buffer writes through a pool opened by its owner; until it is started with one,
+rows are counted as skipped and dropped.
+"""
+
+import asyncio
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.db_pool import DatabasePool
+from utils.logger import get_logger
+from utils.metrics import stage_timer
+
+logger = get_logger(__name__)
+
+WRITE_BUFFER_MAX_ROWS = int(os.getenv("WRITE_BUFFER_MAX_ROWS", "10000"))
+WRITE_BUFFER_FLUSH_ROWS = int(os.getenv("WRITE_BUFFER_FLUSH_ROWS", "500"))
+WRITE_BUFFER_FLUSH_INTERVAL_MS = float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL_MS", "250"))
+WRITE_BUFFER_MAX_RETRIES = int(os.getenv("WRITE_BUFFER_MAX_RETRIES", "3"))
+
+# Buffered tables and the columns written for each
+TABLES: Dict[str, Tuple[str, ...]] = {
+    "chat_messages": (
+        "session_id", "message_type", "content", "ai_personality_id", "timestamp",
+        "message_metadata",
+    ),
+    "session_analytics": (
+        "session_id", "user_id", "analysis_data", "confidence_metrics",
+        "conversation_quality", "improvement_suggestions", "strengths_identified",
+        "areas_to_work_on", "ai_performance_metrics", "generated_at",
+    ),
+}
+
+# JSONB columns are sent as serialized text
+_JSON_COLUMNS = frozenset({
+    "message_metadata", "analysis_data", "confidence_metrics", "conversation_quality",
+    "ai_performance_metrics",
+})
+
+
+def _row(table: str, values: Dict[str, Any]) -> Tuple[Any, ...]:
+    row = []
+    for column in TABLES[table]:
+        value = values.get(column)
+        if column in _JSON_COLUMNS:
+            value = json.dumps(value if value is not None else {}, default=str)
+        row.append(value)
+    return tuple(row)
+
+
+class WriteBehindBuffer:
+    """Batches inserts per table and flushes them in the background"""
+
+    def __init__(
+        self,
+        max_rows: int = WRITE_BUFFER_MAX_ROWS,
+        flush_rows: int = WRITE_BUFFER_FLUSH_ROWS,
+        flush_interval_ms: float = WRITE_BUFFER_FLUSH_INTERVAL_MS,
+        max_retries: int = WRITE_BUFFER_MAX_RETRIES,
+    ):
+        self.pool: Optional[DatabasePool] = None
+        self.max_rows = max_rows
+        self.flush_rows = min(flush_rows, max_rows)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_retries = max_retries
+        self._rows: Dict[str, List[Tuple[Any, ...]]] = defaultdict(list)
+        self._failures: Dict[str, int] = defaultdict(int)
+        self._size = 0
+        self._space: Optional[asyncio.Condition] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.running = False
+        self.rows_written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped_rows = 0
+        self.skipped_rows = 0
+        self.backpressure_waits = 0
+
+    async def start(self, pool: DatabasePool) -> None:
+        """Start flushing into ``pool``, which must already be open"""
+        if self.running:
+            return
+        self.pool = pool
+        self._space = asyncio.Condition()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        self.running = True
+
+    async def stop(self) -> None:
+        """Flush everything still buffered; the pool is left open for its owner to close"""
+        if not self.running:
+            return
+        self.running = False
+        # Cancel between flushes so no batch is lost mid-write
+        async with self._flush_lock:
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+        async with self._space:
+            self._space.notify_all()
+        if self._size:
+            logger.error(f"Write-behind buffer closed with {self._size} unwritten rows")
+
+    async def write(self, table: str, values: Dict[str, Any]) -> None:
+        """Queue one row for ``table``; waits only while the buffer is full"""
+        row = _row(table, values)
+        if not self.running:
+            self.skipped_rows += 1
+            return
+
+        if self._size >= self.max_rows:
+            self.backpressure_waits += 1
+            self._wakeup.set()
+            async with self._space:
+                await self._space.wait_for(lambda: self._size < self.max_rows or not self.running)
+
+        self._rows[table].append(row)
+        self._size += 1
+        if self._size >= self.flush_rows:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Flush on the interval unless a full buffer wakes us first
+            timer = loop.call_later(self.flush_interval, self._wakeup.set)
+            try:
+                await self._wakeup.wait()
+            finally:
+                timer.cancel()
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered rows; failed tables are retried on the next flush"""
+        async with self._flush_lock:
+            pending, self._rows = self._rows, defaultdict(list)
+            for table, rows in pending.items():
+                if not rows:
+                    continue
+                try:
+                    with stage_timer("db"):
+                        await self.pool.insert_many(table, TABLES[table], rows)
+                    self.rows_written += len(rows)
+                    self._failures[table] = 0
+                    written = len(rows)
+                except Exception as e:
+                    self.failed_flushes += 1
+                    self._failures[table] += 1
+                    if self._failures[table] < self.max_retries:
+                        logger.error(f"Flushing {len(rows)} {table} rows failed, will retry: {str(e)}")
+                        # Keep insertion order: the failed rows go ahead of newer ones
+                        self._rows[table][:0] = rows
+                        continue
+                    logger.error(f"Dropping {len(rows)} {table} rows after {self._failures[table]} failed flushes: {str(e)}")
+                    self._failures[table] = 0
+                    self.dropped_rows += len(rows)
+                    written = len(rows)
+
+                self._size -= written
+                async with self._space:
+                    self._space.notify_all()
+            self.flushes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "buffered_rows": self._size,
+            "buffered_by_table": {table: len(rows) for table, rows in self._rows.items() if rows},
+            "max_rows": self.max_rows,
+            "flush_rows": self.flush_rows,
+            "flush_interval_ms": round(self.flush_interval * 1000, 1),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "dropped_rows": self.dropped_rows,
+            "skipped_rows": self.skipped_rows,
+            "backpressure_waits": self.backpressure_waits,
+            "pool": self.pool.stats() if self.pool is not None else None,
+        }
@@ -0,0 +1,144 @@
+"""
+Single-item vs batched UI-element detection.
+
+Drives the DynamicBatcher and InferencePool used by
+/api/v1/computer-vision/detect-ui-elements with the synthetic detector in
+benchmarks/mocks.py. Concurrent clients send screenshots of a few common
+sizes as fast as they get answers, once with batching effectively off
+(max batch size 1) and once per requested batch size, and the throughput and
+latency of each run are reported and written as JSON.
+
+Usage (from the ai-engine directory):
+
+    python benchmarks/batching_benchmark.py --clients 32 --requests 20 --batch-sizes 1,4,8,16
+    python benchmarks/batching_benchmark.py --workers 4 --max-wait-ms 5 --sizes 1280x720,1920x1080
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ENGINE_DIR, "benchmarks", "results")
+sys.path.insert(0, ENGINE_DIR)
+
+
+def _screenshots(sizes: List[tuple], count: int) -> List[np.ndarray]:
+    """Flat-coloured screens with a few bright widgets, one per size and variant"""
+    rng = np.random.default_rng(1)
+    images = []
+    for index in range(count):
+        width, height = sizes[index % len(sizes)]
+        image = np.full((height, width, 3), 235, dtype=np.uint8)
+        for _ in range(12):
+            x, y = rng.integers(0, width - 120), rng.integers(0, height - 40)
+            image[y:y + 40, x:x + 120] = rng.integers(0, 255, 3, dtype=np.uint8)
+        images.append(image)
+    return images
+
+
+async def run(args, max_batch_size: int, images: List[np.ndarray]) -> Dict[str, Any]:
+    from benchmarks.mocks import SyntheticUIDetector
+    from src.utils.batching import DynamicBatcher
+    from src.utils.inference_pool import InferencePool
+
+    os.environ["AI_ENGINE_CONCURRENCY_COMPUTER_VISION"] = str(args.workers)
+    inference = InferencePool({"computer_vision": SyntheticUIDetector}, workers=args.workers,
+                              process_services=["computer_vision"])
+    service = SyntheticUIDetector()
+    await service.initialize()
+
+    async def run_batch(key, batch: List[np.ndarray]):
+        if len(batch) == 1:
+            return [await inference.call("computer_vision", service, "detect_ui_elements", batch[0])]
+        return await inference.call("computer_vision", service, "detect_ui_elements_batch", np.stack(batch))
+
+    batcher = DynamicBatcher(run_batch, max_batch_size=max_batch_size,
+                             max_wait_ms=args.max_wait_ms if max_batch_size > 1 else 0,
+                             name=f"batch-{max_batch_size}")
+    inference.start()
+    await inference._warmup
+
+    latencies: List[float] = []
+
+    async def client(index: int) -> None:
+        for turn in range(args.requests):
+            image = images[(index + turn) % len(images)]
+            started = time.perf_counter()
+            await batcher.submit((image.shape, image.dtype.str), image)
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(args.clients)))
+        duration = time.perf_counter() - started
+    finally:
+        await batcher.stop()
+        await inference.shutdown()
+
+    values = np.array(latencies) * 1000
+    return {
+        "max_batch_size": max_batch_size,
+        "duration_s": round(duration, 3),
+        "images": len(latencies),
+        "throughput_ips": round(len(latencies) / duration, 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "batching": batcher.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="UI detection batching benchmark")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent callers")
+    parser.add_argument("--requests", type=int, default=20, help="screenshots per caller")
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=2, help="inference worker processes")
+    parser.add_argument("--sizes", default="1280x720,1920x1080", help="screenshot sizes, WxH")
+    parser.add_argument("--call-overhead-ms", type=float, default=5.0, help="synthetic per-call model overhead")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/batching-<timestamp>.json)")
+    args = parser.parse_args()
+
+    # Read by the detector in the worker processes
+    os.environ["BENCH_CALL_OVERHEAD_MS"] = str(args.call_overhead_ms)
+    sizes = [tuple(int(v) for v in size.split("x")) for size in args.sizes.split(",")]
+    images = _screenshots(sizes, 4 * len(sizes))
+
+    runs = [
+        asyncio.run(run(args, int(size), images))
+        for size in args.batch_sizes.split(",")
+    ]
+    baseline = next((r for r in runs if r["max_batch_size"] == 1), runs[0])
+    result = {
+        "started_at": datetime.now().isoformat(),
+        "config": {**vars(args), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "runs": runs,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"batching-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2, default=str)
+
+    print(f"{'max batch':>10} {'images/s':>10} {'speedup':>8} {'mean batch':>11} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in runs:
+        print(
+            f"{r['max_batch_size']:>10} {r['throughput_ips']:>10.1f} "
+            f"{r['throughput_ips'] / baseline['throughput_ips']:>7.2f}x "
+            f"{r['batching']['mean_batch_size']:>11.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f}"
+        )
+    print(f"saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
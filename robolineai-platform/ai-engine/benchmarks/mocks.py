@@ -0,0 +1,73 @@
+"""
+Synthetic computer vision service used by the benchmarks.
+
+The detector is a small patch classifier written in NumPy: images are
+downsampled, cut into 16x16 patches and pushed through two dense layers, and
+every patch scoring above the threshold is reported as a UI element. Its
+cost has the same shape as a real detector: a fixed per-call overhead
+(``BENCH_CALL_OVERHEAD_MS``, standing in for framework dispatch and
+pre/post-processing set-up) plus matrix work that gets cheaper per image as
+the batch grows.
+"""
+
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+CALL_OVERHEAD_MS = float(os.getenv("BENCH_CALL_OVERHEAD_MS", "5"))
+PATCH = 16
+STRIDE = 4
+LABELS = ["button", "input", "checkbox", "link", "icon", "label", "menu", "background"]
+
+
+class SyntheticUIDetector:
+    async def initialize(self) -> None:
+        rng = np.random.default_rng(0)
+        features = PATCH * PATCH * 3
+        self.w1 = rng.standard_normal((features, 256), dtype=np.float32) / np.sqrt(features)
+        self.w2 = rng.standard_normal((256, len(LABELS)), dtype=np.float32) / 16
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def health_check(self) -> Dict[str, Any]:
+        return {"status": "healthy"}
+
+    async def detect_ui_elements(self, image_data: np.ndarray) -> Dict[str, Any]:
+        return self._forward(image_data[None])[0]
+
+    async def detect_ui_elements_batch(self, images: np.ndarray) -> List[Dict[str, Any]]:
+        return self._forward(images)
+
+    def _forward(self, images: np.ndarray) -> List[Dict[str, Any]]:
+        time.sleep(CALL_OVERHEAD_MS / 1000)
+        small = images[:, ::STRIDE, ::STRIDE].astype(np.float32) / 255.0
+        n, h, w, c = small.shape
+        rows, cols = h // PATCH, w // PATCH
+        patches = (
+            small[:, :rows * PATCH, :cols * PATCH]
+            .reshape(n, rows, PATCH, cols, PATCH, c)
+            .transpose(0, 1, 3, 2, 4, 5)
+            .reshape(n * rows * cols, -1)
+        )
+        scores = np.maximum(patches @ self.w1, 0) @ self.w2
+        labels = scores.argmax(axis=1).reshape(n, rows, cols)
+        confidence = scores.max(axis=1).reshape(n, rows, cols)
+
+        results = []
+        for index in range(n):
+            found = np.argwhere((labels[index] != len(LABELS) - 1) & (confidence[index] > 0.5))
+            results.append({
+                "elements": [
+                    {
+                        "type": LABELS[labels[index, r, col]],
+                        "bbox": [int(col * PATCH * STRIDE), int(r * PATCH * STRIDE), PATCH * STRIDE, PATCH * STRIDE],
+                        "confidence": round(float(confidence[index, r, col]), 3),
+                    }
+                    for r, col in found[:50]
+                ],
+                "image_size": [int(images.shape[2]), int(images.shape[1])],
+            })
+        return results
@@ -15,15 +15,18 @@ import os
 import sys
 import asyncio
 import uvicorn
+from datetime import datetime
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, BackgroundTasks, Request, Query
+from typing import Any, Dict, List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 import structlog
 from prometheus_client import generate_latest, Counter, Histogram, Gauge
 import time
+import numpy as np
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent))
@@ -53,6 +56,20 @@ from src.utils.config import settings
 from src.utils.logger import setup_logger
 from src.utils.auth import verify_api_key
 from src.utils.metrics import setup_metrics
+from src.utils.service_registry import ServiceRegistry, ServiceUnavailable
+from src.utils.image_io import decode_request_image, decode_upload
+from src.utils.inference_pool import InferencePool, run_until_disconnected
+from src.utils.batching import DynamicBatcher
+from src.utils.result_cache import ResultCache
+from src.utils.artifact_store import ArtifactStore
+from src.utils.document_artifacts import (
+    PARSE, decode_document, document_parse, file_digest, pages_to_parse, replay_pages, takes_parse, upload_digest
+)
+from src.utils.event_log import EventLogBuilder, EventLogError, ingest_event_log, upload_chunks
+from src.utils.event_workspace import WorkspaceManager, WorkspaceNotFound
+from src.utils.document_pages import (
+    NDJSON_MEDIA_TYPE, count_pages, ndjson_line, remove_document, save_document, spool_document, stream_pages
+)
 
 # Setup logging
 logger = setup_logger(__name__)
@@ -62,49 +79,112 @@ REQUEST_COUNT = Counter('ai_engine_requests_total', 'Total requests', ['method',
 REQUEST_LATENCY = Histogram('ai_engine_request_duration_seconds', 'Request latency')
 ACTIVE_CONNECTIONS = Gauge('ai_engine_active_connections', 'Active connections')
 
-# Global service instances
-services = {}
+SERVICE_CLASSES = {
+    'computer_vision': ComputerVisionService,
+    'ocr': OCRService,
+    'nlp': NLPService,
+    'document_intelligence': DocumentIntelligenceService,
+    'process_mining': ProcessMiningService,
+    'ml_models': MLModelService,
+    'automation': AutomationService,
+}
+
+# CPU-bound inference runs in worker processes with their own model copies
+inference = InferencePool(SERVICE_CLASSES)
+
+# Global service registry; services are constructed when they initialize.
+# Offloaded services are only handles on the workers' copies.
+services = ServiceRegistry(inference.service_factories(SERVICE_CLASSES))
+
+async def run_vision_batch(key, images):
+    """One batched forward pass for images that share a model and input size"""
+    method, _shape, _dtype, options = key
+    options = {name: list(value) if isinstance(value, tuple) else value for name, value in options}
+    service = await services.get('computer_vision')
+    return await inference.call('computer_vision', service, f"{method}_batch", np.stack(images), **options)
+
+# Concurrent screenshots of the same size share one detector pass
+vision_batcher = DynamicBatcher(run_vision_batch, name='computer_vision')
+
+async def run_vision(service, method: str, image: np.ndarray, request: Request, **options):
+    """
+    Batched across requests when the vision service has a ``<method>_batch``
+    entry point; otherwise called directly, without waiting for a batch
+    """
+    if hasattr(SERVICE_CLASSES['computer_vision'], f"{method}_batch"):
+        key = vision_batch_key(method, image, **options)
+        return await run_until_disconnected(vision_batcher.submit(key, image), request)
+    return await inference.call('computer_vision', service, method, image, request=request, **options)
+
+# OCR/vision results keyed by input content and request parameters
+result_cache = ResultCache()
+
+# Parsed documents shared by the document endpoints
+artifacts = ArtifactStore()
+
+# Uploaded event logs, indexed on disk for repeated process-mining queries
+workspaces = WorkspaceManager()
+
+async def ocr_document_image(image: np.ndarray) -> str:
+    """OCR text of a document page image, for the artifact store's parse"""
+    service = await get_service('ocr')
+    defaults = OCRRequest.model_fields
+    result = await inference.call(
+        'ocr', service, 'extract_text',
+        image_data=image,
+        languages=defaults['languages'].default,
+        preprocessing=defaults['preprocessing'].default,
+        confidence_threshold=defaults['confidence_threshold'].default
+    )
+    return result.get('text', '')
+
+async def get_document_parse(document_id: str, data: bytes):
+    """Shared parse of a document; None (and the service parses itself) if it cannot be parsed"""
+    try:
+        return await document_parse(artifacts, inference, document_id, data, ocr_document_image)
+    except Exception as e:
+        logger.warning(f"Document {document_id} could not be parsed: {e}")
+        return None
+
+async def document_parse_kwargs(service_name: str, method: str, document_id: str, data: bytes) -> Dict[str, Any]:
+    """``{"parse": ...}`` if the service method takes the shared parse; the document is only parsed then"""
+    if not takes_parse(SERVICE_CLASSES[service_name], method):
+        return {}
+    parse = await get_document_parse(document_id, data)
+    return {"parse": parse} if parse is not None else {}
+
+def vision_batch_key(method: str, image: np.ndarray, **options):
+    return (
+        method, image.shape, image.dtype.str,
+        tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in options.items())),
+    )
+
+async def get_service(name: str):
+    """Resolve an initialized service, answering 503 while it is unavailable"""
+    try:
+        return await services.get(name)
+    except ServiceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle management for the FastAPI app"""
     logger.info("Starting RoboLineAI AI Engine...")
     
-    # Initialize services
-    global services
-    services = {
-        'computer_vision': ComputerVisionService(),
-        'ocr': OCRService(),
-        'nlp': NLPService(),
-        'document_intelligence': DocumentIntelligenceService(),
-        'process_mining': ProcessMiningService(),
-        'ml_models': MLModelService(),
-        'automation': AutomationService(),
-    }
-    
-    # Initialize all services
-    for name, service in services.items():
-        logger.info(f"Initializing {name} service...")
-        try:
-            await service.initialize()
-            logger.info(f"✅ {name} service initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize {name} service: {e}")
-            raise
-    
-    logger.info("🚀 AI Engine initialized successfully!")
+    # Independent services load concurrently in the background; each one
+    # takes traffic as soon as it is ready (see /readyz)
+    inference.start()
+    services.start()
+    await result_cache.open()
+    logger.info("🚀 AI Engine started, services initializing")
     
     yield
     
     # Cleanup
     logger.info("Shutting down AI Engine...")
-    for name, service in services.items():
-        logger.info(f"Shutting down {name} service...")
-        try:
-            await service.shutdown()
-        except Exception as e:
-            logger.error(f"Error shutting down {name} service: {e}")
-    
+    await vision_batcher.stop()
+    await inference.shutdown()
+    await services.shutdown()
     logger.info("AI Engine shutdown complete")
 
 # Create FastAPI app
@@ -136,7 +216,10 @@ async def metrics_middleware(request, call_next):
     response = await call_next(request)
     
     duration = time.time() - start_time
-    REQUEST_COUNT.labels(method=request.method, endpoint=request.url.path).inc()
+    # Label by route template so path parameters (workspace ids, ...) do not
+    # create a series each
+    route = request.scope.get("route")
+    REQUEST_COUNT.labels(method=request.method, endpoint=getattr(route, "path", None) or "unmatched").inc()
     REQUEST_LATENCY.observe(duration)
     ACTIVE_CONNECTIONS.dec()
     
@@ -151,10 +234,42 @@ async def health_check():
         "timestamp": time.time(),
         "services": {
             name: await service.health_check() 
-            for name, service in services.items()
-        }
+            for name, service in services.ready_services().items()
+        },
+        "initialization": services.status(),
+        "inference": inference.stats(),
+        "batching": vision_batcher.stats(),
+        "result_cache": result_cache.stats(),
+        "artifacts": artifacts.stats(),
+        "workspaces": workspaces.stats()
     }
 
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: the process and event loop are responsive"""
+    return {"status": "alive", "timestamp": time.time()}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: 200 once every eagerly loaded service is ready"""
+    status = services.status()
+    ready = all(s["ready"] for s in status.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "timestamp": time.time(), "services": status}
+    )
+
+@app.get("/readyz/{service_name}")
+async def service_readiness(service_name: str):
+    """Per-service readiness probe, so routes can be gated on the models they need"""
+    if service_name not in services:
+        raise HTTPException(status_code=404, detail=f"Unknown service: {service_name}")
+    status = services.status()[service_name]
+    return JSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content={"service": service_name, "timestamp": time.time(), **status}
+    )
+
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint"""
@@ -164,32 +279,67 @@ async def metrics():
 @app.post("/api/v1/computer-vision/analyze", response_model=ComputerVisionResponse)
 async def analyze_image(
     request: ComputerVisionRequest,
+    http_request: Request,
     api_key: str = Depends(verify_api_key)
 ):
     """Analyze image using computer vision models"""
+    service = await get_service('computer_vision')
     try:
-        service = services['computer_vision']
-        result = await service.analyze_image(
+        result = await inference.call(
+            'computer_vision', service, 'analyze_image', request=http_request,
             image_data=request.image_data,
             analysis_types=request.analysis_types,
             confidence_threshold=request.confidence_threshold
         )
         return ComputerVisionResponse(**result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Computer vision analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/computer-vision/analyze/raw", response_model=ComputerVisionResponse)
+async def analyze_image_raw(
+    request: Request,
+    analysis_types: Optional[List[str]] = Query(None),
+    confidence_threshold: Optional[float] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """Analyze an image sent as the raw request body (image/png, image/jpeg, ...)"""
+    service = await get_service('computer_vision')
+    defaults = ComputerVisionRequest.model_fields
+    try:
+        image = await decode_request_image(request)
+        result = await run_vision(
+            service, 'analyze_image', image, request,
+            analysis_types=analysis_types or defaults['analysis_types'].default,
+            confidence_threshold=confidence_threshold if confidence_threshold is not None
+            else defaults['confidence_threshold'].default
+        )
+        return ComputerVisionResponse(**result)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Computer vision analysis failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/computer-vision/detect-ui-elements")
 async def detect_ui_elements(
+    request: Request,
     image: UploadFile = File(...),
     api_key: str = Depends(verify_api_key)
 ):
     """Detect UI elements in screenshots for RPA automation"""
+    service = await get_service('computer_vision')
     try:
-        image_data = await image.read()
-        service = services['computer_vision']
-        result = await service.detect_ui_elements(image_data)
+        image_data = await decode_upload(image)
+        result = await result_cache.get_or_compute(
+            'computer_vision.detect_ui_elements', image_data, {},
+            lambda: run_vision(service, 'detect_ui_elements', image_data, request)
+        )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"UI element detection failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -198,34 +348,84 @@ async def detect_ui_elements(
 @app.post("/api/v1/ocr/extract-text", response_model=OCRResponse)
 async def extract_text(
     request: OCRRequest,
+    http_request: Request,
     api_key: str = Depends(verify_api_key)
 ):
     """Extract text from images using OCR"""
+    service = await get_service('ocr')
+    params = {
+        'languages': request.languages,
+        'preprocessing': request.preprocessing,
+        'confidence_threshold': request.confidence_threshold,
+    }
     try:
-        service = services['ocr']
-        result = await service.extract_text(
-            image_data=request.image_data,
-            languages=request.languages,
-            preprocessing=request.preprocessing,
-            confidence_threshold=request.confidence_threshold
+        result = await result_cache.get_or_compute(
+            'ocr.extract_text', request.image_data, params,
+            lambda: inference.call(
+                'ocr', service, 'extract_text', request=http_request, image_data=request.image_data, **params
+            )
         )
         return OCRResponse(**result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"OCR extraction failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/ocr/extract-text/raw", response_model=OCRResponse)
+async def extract_text_raw(
+    request: Request,
+    languages: Optional[List[str]] = Query(None),
+    preprocessing: Optional[bool] = None,
+    confidence_threshold: Optional[float] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """Extract text from an image sent as the raw request body"""
+    service = await get_service('ocr')
+    defaults = OCRRequest.model_fields
+    params = {
+        'languages': languages or defaults['languages'].default,
+        'preprocessing': preprocessing if preprocessing is not None else defaults['preprocessing'].default,
+        'confidence_threshold': confidence_threshold if confidence_threshold is not None
+        else defaults['confidence_threshold'].default,
+    }
+    try:
+        image = await decode_request_image(request)
+        result = await result_cache.get_or_compute(
+            'ocr.extract_text', image, params,
+            lambda: inference.call('ocr', service, 'extract_text', request=request, image_data=image, **params)
+        )
+        return OCRResponse(**result)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"OCR extraction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/ocr/extract-structured-data")
 async def extract_structured_data(
+    request: Request,
     image: UploadFile = File(...),
     template: str = "invoice",
     api_key: str = Depends(verify_api_key)
 ):
     """Extract structured data from documents (invoices, forms, etc.)"""
+    service = await get_service('ocr')
     try:
-        image_data = await image.read()
-        service = services['ocr']
-        result = await service.extract_structured_data(image_data, template)
+        # Identified from the spooled upload; its bytes are only read when the service runs
+        document_id = await upload_digest(image)
+
+        async def extract():
+            document_data = await image.read()
+            return await inference.call(
+                'ocr', service, 'extract_structured_data', document_data, template, request=request,
+                **await document_parse_kwargs('ocr', 'extract_structured_data', document_id, document_data)
+            )
+
+        result = await artifacts.get_or_build(document_id, f"structured_data:{template}", extract)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Structured data extraction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -237,8 +437,8 @@ async def analyze_text(
     api_key: str = Depends(verify_api_key)
 ):
     """Analyze text using NLP models"""
+    service = await get_service('nlp')
     try:
-        service = services['nlp']
         result = await service.analyze_text(
             text=request.text,
             analysis_types=request.analysis_types,
@@ -257,8 +457,8 @@ async def classify_email(
     api_key: str = Depends(verify_api_key)
 ):
     """Classify email content and suggest automation actions"""
+    service = await get_service('nlp')
     try:
-        service = services['nlp']
         result = await service.classify_email(subject, body, attachments)
         return result
     except Exception as e:
@@ -269,34 +469,130 @@ async def classify_email(
 @app.post("/api/v1/documents/analyze", response_model=DocumentAnalysisResponse)
 async def analyze_document(
     request: DocumentAnalysisRequest,
+    http_request: Request,
     api_key: str = Depends(verify_api_key)
 ):
     """Intelligent document processing and analysis"""
+    service = await get_service('document_intelligence')
     try:
-        service = services['document_intelligence']
-        result = await service.analyze_document(
-            document_data=request.document_data,
-            document_type=request.document_type,
-            extract_tables=request.extract_tables,
-            extract_forms=request.extract_forms
+        # Decoded once: the bytes identify the document and feed the shared parse
+        document_bytes, document_id = await asyncio.to_thread(decode_document, request.document_data)
+
+        async def analyze():
+            return await inference.call(
+                'document_intelligence', service, 'analyze_document', request=http_request,
+                document_data=request.document_data,
+                document_type=request.document_type,
+                extract_tables=request.extract_tables,
+                extract_forms=request.extract_forms,
+                **await document_parse_kwargs('document_intelligence', 'analyze_document', document_id, document_bytes)
+            )
+
+        result = await artifacts.get_or_build(
+            document_id,
+            f"analysis:{request.document_type}:{request.extract_tables}:{request.extract_forms}",
+            analyze
         )
         return DocumentAnalysisResponse(**result)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Document analysis failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/documents/analyze/stream")
+async def analyze_document_stream(
+    request: Request,
+    extract_tables: bool = True,
+    extract_forms: bool = True,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Analyze a PDF page by page, streaming each page's text, tables and forms
+    as NDJSON as soon as it is done. Send the PDF as the raw request body, or
+    a DocumentAnalysisRequest as JSON. A PDF already parsed by another
+    document endpoint is replayed from the shared parse; a full first pass
+    (tables and forms) stores one.
+    """
+    await get_service('document_intelligence')
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = DocumentAnalysisRequest(**await request.json())
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        extract_tables, extract_forms = body.extract_tables, body.extract_forms
+        try:
+            document_bytes, document_id = await asyncio.to_thread(decode_document, body.document_data)
+            path = await asyncio.to_thread(save_document, document_bytes)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid document_data: {e}")
+        del document_bytes
+    else:
+        path = await spool_document(request)
+        document_id = await asyncio.to_thread(file_digest, path)
+
+    parse = artifacts.get(document_id, PARSE)
+    if parse is not None and parse["kind"] == "pdf":
+        remove_document(path)
+        return StreamingResponse(
+            (ndjson_line(item) async for item in replay_pages(parse, extract_tables, extract_forms)),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+
+    try:
+        pages = await asyncio.to_thread(count_pages, path)
+    except Exception as e:
+        remove_document(path)
+        raise HTTPException(status_code=415, detail=str(e))
+
+    # Pages are kept for the shared parse only while they fit the store
+    keep = extract_tables and extract_forms
+    collected, collected_bytes = [], 0
+
+    async def lines():
+        nonlocal keep, collected_bytes
+        async for item in stream_pages(inference, path, pages, extract_tables, extract_forms):
+            if keep and item["type"] == "page":
+                collected_bytes += len(item.get("text", ""))
+                keep = "error" not in item and collected_bytes <= artifacts.max_bytes
+                if keep:
+                    collected.append(item)
+                else:
+                    # No parse will be stored; do not hold the pages until the stream ends
+                    collected.clear()
+            elif keep and item["type"] == "summary":
+                artifacts.put(document_id, PARSE, pages_to_parse("pdf", collected))
+                collected.clear()
+            yield ndjson_line(item)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
 @app.post("/api/v1/documents/extract-entities")
 async def extract_document_entities(
+    request: Request,
     document: UploadFile = File(...),
     entity_types: list[str] = ["person", "organization", "location", "date", "money"],
     api_key: str = Depends(verify_api_key)
 ):
-    """Extract named entities from documents"""
+    """
+    Extract named entities from documents. The service result is kept per
+    document and entity_types next to the document's shared parse.
+    """
+    service = await get_service('document_intelligence')
     try:
-        document_data = await document.read()
-        service = services['document_intelligence']
-        result = await service.extract_entities(document_data, entity_types)
+        document_id = await upload_digest(document)
+
+        async def extract():
+            document_data = await document.read()
+            return await inference.call(
+                'document_intelligence', service, 'extract_entities', document_data, entity_types, request=request,
+                **await document_parse_kwargs('document_intelligence', 'extract_entities', document_id, document_data)
+            )
+
+        result = await artifacts.get_or_build(document_id, f"entities:{','.join(entity_types)}", extract)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Entity extraction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -304,12 +600,25 @@ async def extract_document_entities(
 # Process Mining endpoints
 @app.post("/api/v1/process-mining/analyze", response_model=ProcessAnalysisResponse)
 async def analyze_process(
-    request: ProcessAnalysisRequest,
+    request: Optional[ProcessAnalysisRequest] = None,
+    workspace_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     api_key: str = Depends(verify_api_key)
 ):
-    """Analyze business process from logs"""
+    """
+    Analyze business process from logs. With workspace_id the analysis is
+    answered from that workspace's indexes, optionally for the time window
+    [start, end), instead of re-reading a log.
+    """
+    service = await get_service('process_mining')
+    if workspace_id is not None:
+        workspace = await get_workspace(workspace_id)
+        result = await asyncio.to_thread(workspace.analyze, start=start, end=end)
+        return ProcessAnalysisResponse(**result)
+    if request is None:
+        raise HTTPException(status_code=422, detail="Send a process analysis request or a workspace_id")
     try:
-        service = services['process_mining']
         result = await service.analyze_process(
             log_data=request.log_data,
             case_id_column=request.case_id_column,
@@ -327,15 +636,218 @@ async def discover_workflow(
     api_key: str = Depends(verify_api_key)
 ):
     """Discover workflow patterns from system logs"""
+    service = await get_service('process_mining')
     try:
         log_data = await logs.read()
-        service = services['process_mining']
         result = await service.discover_workflow(log_data)
         return result
     except Exception as e:
         logger.error(f"Workflow discovery failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/process-mining/discover-workflow/raw")
+async def discover_workflow_raw(
+    request: Request,
+    case_id_column: Optional[str] = None,
+    activity_column: Optional[str] = None,
+    timestamp_column: Optional[str] = None,
+    delimiter: str = ",",
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Directly-follows graph and activity durations of a CSV log sent as the raw
+    request body. This is the only discovery route that parses the log while
+    it uploads (the multipart route's file is spooled before its handler
+    runs); columns are detected from common names unless given.
+    """
+    await get_service('process_mining')
+    # No disconnect watcher: it would read body messages meant for the parser,
+    # and request.stream() raises on disconnect anyway
+    return await discover_from_chunks(
+        request.stream(), None,
+        case_column=case_id_column, activity_column=activity_column,
+        timestamp_column=timestamp_column, delimiter=delimiter
+    )
+
+async def discover_from_chunks(chunks, request: Optional[Request], **options):
+    try:
+        builder = await run_until_disconnected(ingest_event_log(chunks, EventLogBuilder(), **options), request)
+        if builder.events == 0:
+            raise EventLogError("No events with a case, activity and timestamp")
+        return builder.summary()
+    except HTTPException:
+        raise
+    except EventLogError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Workflow discovery failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def event_log_body(request: Request):
+    """Body chunks of an event log sent raw or as the multipart file field 'logs'"""
+    async def chunks():
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            upload = (await request.form()).get("logs")
+            if upload is None or isinstance(upload, str):
+                raise EventLogError("Missing 'logs' file field")
+            async for chunk in upload_chunks(upload):
+                yield chunk
+        else:
+            async for chunk in request.stream():
+                yield chunk
+    return chunks()
+
+async def get_workspace(workspace_id: str, ready: bool = True):
+    try:
+        # Loads or reloads indexes when another worker changed the workspace
+        workspace = await asyncio.to_thread(workspaces.get, workspace_id)
+    except WorkspaceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if ready and not workspace.ready:
+        raise HTTPException(status_code=409, detail=f"Workspace {workspace_id} is still being indexed")
+    return workspace
+
+@app.post("/api/v1/process-mining/workspaces")
+async def create_workspace(
+    request: Request,
+    case_id_column: Optional[str] = None,
+    activity_column: Optional[str] = None,
+    timestamp_column: Optional[str] = None,
+    delimiter: str = ",",
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Upload a CSV event log (raw body or multipart field 'logs') into a
+    persisted, indexed workspace for repeated filter, variant and bottleneck
+    queries.
+    """
+    await get_service('process_mining')
+    workspace = workspaces.create()
+    try:
+        try:
+            result = await workspace.append(
+                event_log_body(request),
+                case_column=case_id_column, activity_column=activity_column,
+                timestamp_column=timestamp_column, delimiter=delimiter
+            )
+            if result["events"] == 0:
+                raise EventLogError("No events with a case, activity and timestamp")
+        except BaseException:
+            await workspaces.delete(workspace.id)
+            raise
+        return result
+    except HTTPException:
+        raise
+    except EventLogError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Workspace creation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/process-mining/workspaces/{workspace_id}/events")
+async def append_workspace_events(
+    workspace_id: str,
+    request: Request,
+    case_id_column: Optional[str] = None,
+    activity_column: Optional[str] = None,
+    timestamp_column: Optional[str] = None,
+    delimiter: str = ",",
+    api_key: str = Depends(verify_api_key)
+):
+    """Append events to a workspace; only the cases they belong to are re-indexed"""
+    workspace = await get_workspace(workspace_id, ready=False)
+    try:
+        return await workspace.append(
+            event_log_body(request),
+            case_column=case_id_column, activity_column=activity_column,
+            timestamp_column=timestamp_column, delimiter=delimiter
+        )
+    except HTTPException:
+        raise
+    except EventLogError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except WorkspaceNotFound as e:
+        # Deleted by another worker while this append waited for it
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Workspace append failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/process-mining/workspaces/{workspace_id}")
+async def get_workspace_summary(workspace_id: str, api_key: str = Depends(verify_api_key)):
+    """Event, case, activity and variant counts of a workspace"""
+    return (await get_workspace(workspace_id)).summary()
+
+@app.delete("/api/v1/process-mining/workspaces/{workspace_id}")
+async def delete_workspace(workspace_id: str, api_key: str = Depends(verify_api_key)):
+    """Delete a workspace and its files"""
+    try:
+        await workspaces.delete(workspace_id)
+    except WorkspaceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"workspace_id": workspace_id, "deleted": True}
+
+@app.get("/api/v1/process-mining/workspaces/{workspace_id}/cases")
+async def filter_workspace_cases(
+    workspace_id: str,
+    activity: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    variant: Optional[int] = None,
+    min_seconds: Optional[float] = None,
+    max_seconds: Optional[float] = None,
+    limit: int = Query(100, ge=0, le=10000),
+    api_key: str = Depends(verify_api_key)
+):
+    """Cases containing every given activity, started in [start, end), of a variant or within duration bounds"""
+    workspace = await get_workspace(workspace_id)
+    try:
+        return await asyncio.to_thread(
+            workspace.filter_cases, limit=limit, activities=activity, start=start, end=end,
+            variant=variant, min_seconds=min_seconds, max_seconds=max_seconds
+        )
+    except Exception as e:
+        logger.error(f"Workspace case filter failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/process-mining/workspaces/{workspace_id}/variants")
+async def workspace_variants(
+    workspace_id: str,
+    top: int = Query(20, ge=1, le=1000),
+    activity: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    min_seconds: Optional[float] = None,
+    max_seconds: Optional[float] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """Most frequent activity sequences, optionally among filtered cases"""
+    workspace = await get_workspace(workspace_id)
+    try:
+        return await asyncio.to_thread(
+            workspace.variant_table, top=top, activities=activity, start=start, end=end,
+            min_seconds=min_seconds, max_seconds=max_seconds
+        )
+    except Exception as e:
+        logger.error(f"Workspace variant table failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/process-mining/workspaces/{workspace_id}/bottlenecks")
+async def workspace_bottlenecks(
+    workspace_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    top: int = Query(10, ge=1, le=1000),
+    api_key: str = Depends(verify_api_key)
+):
+    """Activities and transitions with the longest mean waiting times"""
+    workspace = await get_workspace(workspace_id)
+    try:
+        return await asyncio.to_thread(workspace.bottlenecks, start=start, end=end, top=top)
+    except Exception as e:
+        logger.error(f"Workspace bottleneck analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Machine Learning endpoints
 @app.post("/api/v1/ml/predict", response_model=PredictionResponse)
 async def make_prediction(
@@ -343,8 +855,8 @@ async def make_prediction(
     api_key: str = Depends(verify_api_key)
 ):
     """Make predictions using trained ML models"""
+    service = await get_service('ml_models')
     try:
-        service = services['ml_models']
         result = await service.predict(
             model_id=request.model_id,
             input_data=request.input_data,
@@ -362,8 +874,8 @@ async def detect_anomalies(
     api_key: str = Depends(verify_api_key)
 ):
     """Detect anomalies in process execution data"""
+    service = await get_service('ml_models')
     try:
-        service = services['ml_models']
         result = await service.detect_anomalies(data, model_type)
         return result
     except Exception as e:
@@ -378,8 +890,8 @@ async def execute_automation(
     api_key: str = Depends(verify_api_key)
 ):
     """Execute AI-powered automation task"""
+    service = await get_service('automation')
     try:
-        service = services['automation']
         
         if request.async_execution:
             # Execute in background
@@ -412,8 +924,8 @@ async def get_automation_status(
     api_key: str = Depends(verify_api_key)
 ):
     """Get status of automation task"""
+    service = await get_service('automation')
     try:
-        service = services['automation']
         result = await service.get_task_status(task_id)
         return result
     except Exception as e:
@@ -0,0 +1,157 @@
+"""
+Parse-once document artifact store.
+
+Endpoints that work on the same document share the expensive intermediate
+results of processing it: the parsed text, page layout, tables and forms, and
+each endpoint's service result. Artifacts are grouped per document,
+keyed by a hash of the document's bytes, built at most once at a time, and
+evicted when they outlive their TTL or when the store grows past its size
+budget (least recently used documents first).
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ARTIFACT_TTL_SECONDS = float(os.getenv("AI_ENGINE_ARTIFACT_TTL_SECONDS", "900"))
+ARTIFACT_STORE_MB = float(os.getenv("AI_ENGINE_ARTIFACT_STORE_MB", "256"))
+
+
+def artifact_size(value: Any) -> int:
+    """Approximate retained size of an artifact"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class _Document:
+    def __init__(self):
+        self.artifacts: Dict[str, Tuple[Any, int]] = {}
+        self.size = 0
+        self.expires_at = 0.0
+
+
+class ArtifactStore:
+    """Per-document artifacts with TTL and size-based eviction"""
+
+    def __init__(self, ttl_seconds: float = ARTIFACT_TTL_SECONDS, max_mb: float = ARTIFACT_STORE_MB):
+        self.ttl = ttl_seconds
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._documents: "OrderedDict[str, _Document]" = OrderedDict()
+        self._size = 0
+        self._building: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.builds = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, document_id: str, name: str) -> Optional[Any]:
+        document = self._touch(document_id)
+        if document is None or name not in document.artifacts:
+            return None
+        self.hits += 1
+        return document.artifacts[name][0]
+
+    def put(self, document_id: str, name: str, value: Any) -> None:
+        size = artifact_size(value)
+        if size > self.max_bytes:
+            return
+        document = self._touch(document_id)
+        if document is None:
+            document = self._documents[document_id] = _Document()
+        previous = document.artifacts.get(name)
+        if previous is not None:
+            document.size -= previous[1]
+            self._size -= previous[1]
+        document.artifacts[name] = (value, size)
+        document.size += size
+        self._size += size
+        document.expires_at = time.monotonic() + self.ttl
+        self._evict(keep=document_id)
+
+    async def get_or_build(self, document_id: str, name: str, build: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the named artifact, building it once if absent; concurrent callers share the build"""
+        while True:
+            value = self.get(document_id, name)
+            if value is not None:
+                return value
+            pending = self._building.get((document_id, name))
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The builder's caller went away; build it ourselves
+
+        pending = self._building[(document_id, name)] = asyncio.get_running_loop().create_future()
+        try:
+            value = await build()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                pending.set_exception(e)
+                pending.exception()
+            else:
+                pending.cancel()
+            raise
+        finally:
+            self._building.pop((document_id, name), None)
+        self.builds += 1
+        self.put(document_id, name, value)
+        pending.set_result(value)
+        return value
+
+    def _touch(self, document_id: str) -> Optional[_Document]:
+        document = self._documents.get(document_id)
+        if document is None:
+            return None
+        if document.expires_at <= time.monotonic():
+            self._drop(document_id)
+            self.expired += 1
+            return None
+        document.expires_at = time.monotonic() + self.ttl
+        self._documents.move_to_end(document_id)
+        return document
+
+    def _drop(self, document_id: str) -> None:
+        document = self._documents.pop(document_id)
+        self._size -= document.size
+
+    def _evict(self, keep: str) -> None:
+        now = time.monotonic()
+        for document_id in [d for d, doc in self._documents.items() if doc.expires_at <= now and d != keep]:
+            self._drop(document_id)
+            self.expired += 1
+        while self._size > self.max_bytes and len(self._documents) > 1:
+            oldest = next(iter(self._documents))
+            if oldest == keep:
+                self._documents.move_to_end(keep)
+                continue
+            self._drop(oldest)
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "builds": self.builds,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "building": len(self._building),
+        }
@@ -0,0 +1,132 @@
+"""
+Cross-request dynamic batching.
+
+Concurrent requests that can share one forward pass (same model, same input
+size) are collected under a key and handed to a batch function together. A
+batch is dispatched as soon as it reaches ``max_batch_size`` or when its
+oldest item has waited ``max_wait_ms``, and each caller gets back its own
+slice of the results.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+BATCH_MAX_SIZE = int(os.getenv("AI_ENGINE_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("AI_ENGINE_BATCH_MAX_WAIT_MS", "10"))
+
+BatchFunction = Callable[[Hashable, List[Any]], Awaitable[List[Any]]]
+
+
+class _PendingBatch:
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.created = time.perf_counter()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class DynamicBatcher:
+    """Groups concurrent submissions by key and runs them as one batch"""
+
+    def __init__(
+        self,
+        run_batch: BatchFunction,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        name: str = "batcher",
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._pending: Dict[Hashable, _PendingBatch] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.cancelled_items = 0
+        self.batch_sizes: Counter = Counter()
+        self.total_wait = 0.0
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """Queue ``item`` under ``key`` and wait for its result"""
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch(key)
+            batch.timer = loop.call_later(self.max_wait, self._dispatch, batch)
+
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch_size:
+            self._dispatch(batch)
+        # A cancelled caller leaves a cancelled future behind, which is
+        # skipped when the batch runs
+        return await future
+
+    async def stop(self) -> None:
+        """Dispatch whatever is still queued and wait for running batches"""
+        for batch in list(self._pending.values()):
+            self._dispatch(batch)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _dispatch(self, batch: _PendingBatch) -> None:
+        if self._pending.get(batch.key) is not batch:
+            return
+        del self._pending[batch.key]
+        batch.timer.cancel()
+        task = asyncio.create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: _PendingBatch) -> None:
+        live = [(item, future) for item, future in zip(batch.items, batch.futures) if not future.done()]
+        self.cancelled_items += len(batch.items) - len(live)
+        if not live:
+            return
+
+        self.batches += 1
+        self.items += len(live)
+        self.batch_sizes[len(live)] += 1
+        self.total_wait += time.perf_counter() - batch.created
+        try:
+            results = await self.run_batch(batch.key, [item for item, _ in live])
+            if len(results) != len(live):
+                raise RuntimeError(f"{self.name}: batch of {len(live)} returned {len(results)} results")
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"{self.name} batch of {len(live)} failed: {e}")
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(live, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "mean_wait_ms": round(1000 * self.total_wait / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "failed_batches": self.failed_batches,
+            "cancelled_items": self.cancelled_items,
+            "queued": sum(len(b.items) for b in self._pending.values()),
+            "running": len(self._running),
+        }
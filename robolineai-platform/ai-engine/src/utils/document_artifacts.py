@@ -0,0 +1,155 @@
+"""
+The shared ``parse`` artifact of a document.
+
+``parse``: per-page text, layout size, tables and form fields. PDFs go
+through the page pipeline, images through OCR, DOCX and plain text are read
+directly. A document endpoint gets or builds it (once per document) only
+when the service method it calls takes a ``parse`` argument; each endpoint's
+own service result is cached next to it.
+"""
+
+import asyncio
+import base64
+import hashlib
+import inspect
+import io
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from src.utils.artifact_store import ArtifactStore
+from src.utils.document_pages import count_pages, remove_document, save_document, stream_pages
+from src.utils.image_io import decode_image, upload_view
+from src.utils.result_cache import content_digest
+
+PAGE_SEPARATOR = "\n\n"
+PARSE = "parse"
+
+_DIGEST_CHUNK = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """content_digest of a file's contents, read in chunks"""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_DIGEST_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+async def upload_digest(upload) -> str:
+    """content_digest of a multipart upload, hashed from its spooled contents"""
+    with upload_view(upload) as data:
+        return await asyncio.to_thread(content_digest, data)
+
+
+def decode_document(document_data: str) -> Tuple[bytes, str]:
+    """Decode a base64 document once; returns its bytes and document id"""
+    data = base64.b64decode(document_data, validate=False)
+    return data, content_digest(data)
+
+
+def takes_parse(service: Any, method: str) -> bool:
+    """Whether ``service.method`` accepts a ``parse`` argument; ``service`` may be the class"""
+    try:
+        parameters = inspect.signature(getattr(service, method)).parameters.values()
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return any(
+        parameter.kind is inspect.Parameter.VAR_KEYWORD or parameter.name == "parse"
+        for parameter in parameters
+    )
+
+
+def _docx_pages(data: bytes) -> List[Dict[str, Any]]:
+    import docx
+
+    document = docx.Document(io.BytesIO(data))
+    tables = [[[cell.text for cell in row.cells] for row in table.rows] for table in document.tables]
+    text = "\n".join(paragraph.text for paragraph in document.paragraphs)
+    return [{"page": 1, "text": text, "tables": tables, "forms": {}, "ocr": False}]
+
+
+def pages_to_parse(kind: str, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the parse artifact from page results"""
+    page_list = []
+    for page in sorted(pages, key=lambda item: item["page"]):
+        page = dict(page)
+        page.pop("type", None)
+        page.pop("seconds", None)
+        page_list.append(page)
+    return {"kind": kind, "pages": page_list, "text": PAGE_SEPARATOR.join(page["text"] for page in page_list)}
+
+
+async def build_parse(
+    data: bytes,
+    inference,
+    ocr_text: Callable[[Any], Any],
+) -> Dict[str, Any]:
+    """
+    Parse a document of any supported type into pages. ``ocr_text`` is an
+    async callable returning the OCR text of a decoded image.
+    """
+    if data[:5] == b"%PDF-":
+        path = await asyncio.to_thread(save_document, data)
+        try:
+            pages = await asyncio.to_thread(count_pages, path)
+        except Exception:
+            remove_document(path)
+            raise
+        # stream_pages removes the file when it finishes
+        results = [
+            item async for item in stream_pages(inference, path, pages) if item["type"] == "page"
+        ]
+        failed = [item["page"] for item in results if "error" in item]
+        if failed:
+            raise RuntimeError(f"Failed to parse pages {failed}")
+        return pages_to_parse("pdf", results)
+    if data[:2] == b"PK":
+        return pages_to_parse("docx", await asyncio.to_thread(_docx_pages, data))
+    try:
+        image = await asyncio.to_thread(decode_image, data)
+    except ValueError:
+        image = None
+    if image is not None:
+        text = await ocr_text(image)
+        return pages_to_parse("image", [{
+            "page": 1, "width": image.shape[1], "height": image.shape[0],
+            "text": text, "tables": [], "forms": {}, "ocr": True,
+        }])
+    return pages_to_parse("text", [
+        {"page": 1, "text": data.decode("utf-8", "replace"), "tables": [], "forms": {}, "ocr": False}
+    ])
+
+
+async def document_parse(
+    store: ArtifactStore,
+    inference,
+    document_id: str,
+    data: bytes,
+    ocr_text: Callable[[Any], Any],
+) -> Dict[str, Any]:
+    """The document's parse, from the store or built once"""
+    return await store.get_or_build(document_id, PARSE, lambda: build_parse(data, inference, ocr_text))
+
+
+async def replay_pages(
+    parse: Dict[str, Any],
+    extract_tables: bool = True,
+    extract_forms: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """A stored PDF parse in the shape of stream_pages' output"""
+    started = time.perf_counter()
+    yield {"type": "document", "pages": len(parse["pages"])}
+    for page in parse["pages"]:
+        yield {
+            "type": "page",
+            **page,
+            "tables": page["tables"] if extract_tables else [],
+            "forms": page["forms"] if extract_forms else {},
+        }
+    yield {
+        "type": "summary",
+        "pages": len(parse["pages"]),
+        "failed": 0,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
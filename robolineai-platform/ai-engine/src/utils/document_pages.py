@@ -0,0 +1,243 @@
+"""
+Page-level document pipeline.
+
+A PDF is spooled to a temporary file once and then processed one page at a
+time: worker processes open the file themselves, parse (or, for scanned
+pages without a text layer, rasterize and OCR) only the page they were given,
+and return its text, tables and form fields. Pages are yielded as they finish
+with a bounded number in flight, so memory stays flat however long the
+document is and the first pages come back while later ones are still being
+worked on.
+
+This is an extractor of its own, built on pdfplumber (and Tesseract for
+scanned pages). It does not call DocumentIntelligenceService, so its text,
+tables and form fields can differ from what /documents/analyze returns.
+"""
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+
+from src.utils.logger import setup_logger
+
+try:
+    import pytesseract
+except ImportError:  # pragma: no cover - scanned pages then come back without text
+    pytesseract = None
+
+logger = setup_logger(__name__)
+
+DOCUMENT_PAGES_IN_FLIGHT = int(os.getenv("AI_ENGINE_DOCUMENT_PAGES_IN_FLIGHT", "4"))
+DOCUMENT_RASTER_DPI = int(os.getenv("AI_ENGINE_DOCUMENT_RASTER_DPI", "200"))
+MAX_DOCUMENT_BYTES = int(os.getenv("AI_ENGINE_MAX_DOCUMENT_BYTES", str(500 * 1024 * 1024)))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# "Invoice number: 12345" style lines
+_FIELD_LINE = re.compile(r"^\s*([A-Za-z][\w .#/()-]{0,40}?)\s*:\s*(\S.*?)\s*$")
+
+
+def ndjson_line(data: Dict[str, Any]) -> str:
+    return json.dumps(data, default=str) + "\n"
+
+
+# Spooling --------------------------------------------------------------------
+
+def _new_document_file():
+    return tempfile.NamedTemporaryFile(prefix="ai-engine-doc-", suffix=".pdf", delete=False)
+
+
+async def spool_document(request: Request, max_bytes: int = MAX_DOCUMENT_BYTES) -> str:
+    """Stream a raw request body to a temporary file and return its path"""
+    size = 0
+    f = _new_document_file()
+    try:
+        with f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Document exceeds {max_bytes} bytes")
+                f.write(chunk)
+    except BaseException:
+        remove_document(f.name)
+        raise
+    if size == 0:
+        remove_document(f.name)
+        raise HTTPException(status_code=400, detail="Empty request body")
+    return f.name
+
+
+def save_document(data: bytes) -> str:
+    """Write document bytes to a temporary file and return its path"""
+    f = _new_document_file()
+    try:
+        with f:
+            f.write(data)
+    except Exception:
+        remove_document(f.name)
+        raise
+    return f.name
+
+
+def remove_document(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def count_pages(path: str) -> int:
+    """Page count from the PDF's page tree; no page content is parsed"""
+    import pdfplumber
+
+    with open(path, "rb") as f:
+        if f.read(5) != b"%PDF-":
+            raise ValueError("Page streaming supports PDF documents only")
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+# Worker side -----------------------------------------------------------------
+
+# Each worker (or, with the pool disabled, each thread) keeps the last few
+# documents open so consecutive pages of the same file do not re-read its
+# cross-reference table. Open documents are not shared between threads, so
+# pages run in parallel without a lock.
+_local = threading.local()
+_OPEN_DOCUMENTS_MAX = 2
+
+
+def _open_pdf(path: str):
+    open_documents: "OrderedDict[str, Any]" = getattr(_local, "documents", None)
+    if open_documents is None:
+        open_documents = _local.documents = OrderedDict()
+    pdf = open_documents.get(path)
+    if pdf is not None:
+        open_documents.move_to_end(path)
+        return pdf
+
+    import pdfplumber
+
+    pdf = open_documents[path] = pdfplumber.open(path)
+    while len(open_documents) > _OPEN_DOCUMENTS_MAX:
+        _, old = open_documents.popitem(last=False)
+        old.close()
+    return pdf
+
+
+def _pdf_value(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode("utf-16" if value.startswith(b"\xfe\xff") else "latin-1", "ignore")
+    return getattr(value, "name", value)
+
+
+def _form_fields(page, text: str) -> Dict[str, Any]:
+    """AcroForm widgets on the page, plus "label: value" lines from the text"""
+    fields: Dict[str, Any] = {}
+    for line in text.splitlines():
+        match = _FIELD_LINE.match(line)
+        if match:
+            fields.setdefault(match.group(1), match.group(2))
+    for annot in page.annots or []:
+        data = annot.get("data") or {}
+        if "T" in data:
+            fields[_pdf_value(data["T"])] = _pdf_value(data.get("V"))
+    return fields
+
+
+def analyze_page(
+    path: str,
+    page_number: int,
+    extract_tables: bool = True,
+    extract_forms: bool = True,
+    dpi: int = DOCUMENT_RASTER_DPI,
+) -> Dict[str, Any]:
+    """
+    Text, tables and form fields of one (1-based) page, extracted with
+    pdfplumber (Tesseract for scanned pages), not DocumentIntelligenceService
+    """
+    started = time.perf_counter()
+    pdf = _open_pdf(path)
+    page = pdf.pages[page_number - 1]
+    try:
+        text = page.extract_text() or ""
+        ocr = False
+        if not text.strip() and pytesseract is not None and page.images:
+            # Scanned page: rasterize just this page and OCR it
+            text = pytesseract.image_to_string(page.to_image(resolution=dpi).original)
+            ocr = True
+        tables: List[List[List[Optional[str]]]] = page.extract_tables() if extract_tables and not ocr else []
+        forms = _form_fields(page, text) if extract_forms else {}
+        return {
+            "page": page_number,
+            "width": float(page.width),
+            "height": float(page.height),
+            "text": text,
+            "tables": tables,
+            "forms": forms,
+            "ocr": ocr,
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+    finally:
+        # Parsed layout objects are cached per page; drop them
+        page.flush_cache()
+
+
+# Parent side -----------------------------------------------------------------
+
+async def stream_pages(
+    inference,
+    path: str,
+    pages: int,
+    extract_tables: bool = True,
+    extract_forms: bool = True,
+    in_flight: int = DOCUMENT_PAGES_IN_FLIGHT,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze ``pages`` pages of the PDF at ``path`` through the inference pool,
+    yielding each page's result as it completes (not necessarily in page
+    order), then a summary. The file is removed when the stream ends.
+    """
+    started = time.perf_counter()
+    next_page, failed = 1, 0
+    running: Dict[asyncio.Task, int] = {}
+    try:
+        yield {"type": "document", "pages": pages}
+        while next_page <= pages or running:
+            while next_page <= pages and len(running) < max(1, in_flight):
+                task = asyncio.create_task(inference.run(
+                    "document_intelligence", analyze_page, path, next_page, extract_tables, extract_forms
+                ))
+                running[task] = next_page
+                next_page += 1
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=running.get):
+                page_number = running.pop(task)
+                try:
+                    result = {"type": "page", **task.result()}
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Page {page_number} of {path} failed: {e}")
+                    result = {"type": "page", "page": page_number, "error": str(e)}
+                yield result
+
+        yield {
+            "type": "summary",
+            "pages": pages,
+            "failed": failed,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        remove_document(path)
@@ -0,0 +1,478 @@
+"""
+Streaming event-log ingestion for process mining.
+
+An uploaded log (CSV) is parsed in chunks of rows as it arrives. Each chunk
+becomes columns: case and activity names dictionary-encoded to int32 codes,
+and timestamps as int64 nanoseconds since the epoch (UTC). The
+directly-follows graph, per-activity durations and start/end activities are
+updated from each chunk before it is dropped. Retained state is one matrix
+per activity pair plus a few integers per case, however many events the log
+holds. When a directory is given, the columns are also appended there, so a
+workspace can later map the full log without re-parsing it.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import queue
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EVENT_LOG_CHUNK_ROWS = int(os.getenv("AI_ENGINE_EVENT_LOG_CHUNK_ROWS", "200000"))
+# Body chunks buffered between the request and the parser thread
+EVENT_LOG_READ_AHEAD = int(os.getenv("AI_ENGINE_EVENT_LOG_READ_AHEAD", "16"))
+UPLOAD_READ_BYTES = 1024 * 1024
+
+# Column names used by common exports (pm4py/XES CSV, ERP extracts)
+COLUMN_ALIASES = {
+    "case": ["case_id", "case:concept:name", "CaseID", "Case ID", "case"],
+    "activity": ["activity", "concept:name", "Activity", "event", "Event"],
+    "timestamp": ["timestamp", "time:timestamp", "Timestamp", "CompleteTimestamp", "time"],
+}
+
+# Column files written when the log is kept on disk
+CASE_FILE = "case.i32"
+ACTIVITY_FILE = "activity.i32"
+TIMESTAMP_FILE = "timestamp.i64"
+# One JSON string per line, appended as new values appear
+CASE_DICTIONARY_FILE = "cases.jsonl"
+ACTIVITY_DICTIONARY_FILE = "activities.jsonl"
+
+NO_ACTIVITY = -1
+
+
+class EventLogError(ValueError):
+    """The upload is not a usable event log"""
+
+
+class Dictionary:
+    """Value <-> dense int32 code mapping, in order of first appearance"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+    def encode(self, uniques: Sequence[str]) -> np.ndarray:
+        """Global codes for a chunk's distinct values"""
+        return np.fromiter((self.code(value) for value in uniques), dtype=np.int32, count=len(uniques))
+
+    def truncate(self, size: int) -> None:
+        """Forget the values from code ``size`` on"""
+        for value in self.values[size:]:
+            del self._codes[value]
+        del self.values[size:]
+
+    @staticmethod
+    def truncate_file(path: str, size: int) -> None:
+        """Cut a dictionary file back to its first ``size`` values"""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            kept = 0
+            for _ in range(size):
+                line = f.readline()
+                if not line:
+                    return
+                kept += len(line)
+            f.truncate(kept)
+
+    def save(self, path: str, start: int = 0) -> None:
+        """Append the values from code ``start`` on to a dictionary file"""
+        with open(path, "a") as f:
+            f.writelines(json.dumps(value) + "\n" for value in self.values[start:])
+
+    @classmethod
+    def load(cls, path: str) -> "Dictionary":
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(json.loads(line) for line in f if line.strip())
+
+
+def _grow(array: np.ndarray, size: int, fill) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _grow_square(matrix: np.ndarray, size: int) -> np.ndarray:
+    if size <= matrix.shape[0]:
+        return matrix
+    capacity = max(size, 2 * matrix.shape[0])
+    grown = np.zeros((capacity, capacity), dtype=matrix.dtype)
+    grown[:matrix.shape[0], :matrix.shape[1]] = matrix
+    return grown
+
+
+class EventLogBuilder:
+    """
+    Incremental columnar event log with its directly-follows graph.
+
+    Events of a case are linked in timestamp order within a chunk and in
+    arrival order across chunks; an event older than its case's previous one
+    is still linked but counted in ``out_of_order``. An activity's duration is
+    the time until the next event of the same case.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        cases: Optional[Dictionary] = None,
+        activities: Optional[Dictionary] = None,
+    ):
+        self.directory = directory
+        # Passing existing dictionaries keeps codes stable when appending to a log
+        self.cases = cases if cases is not None else Dictionary()
+        self.activities = activities if activities is not None else Dictionary()
+        self._saved = (len(self.cases), len(self.activities))
+        self.events = 0
+        self.skipped = 0
+        self.out_of_order = 0
+        self.started = time.perf_counter()
+
+        # Per case
+        self._last_activity = np.full(0, NO_ACTIVITY, dtype=np.int32)
+        self._first_time = np.zeros(0, dtype=np.int64)
+        self._last_time = np.zeros(0, dtype=np.int64)
+        self._case_events = np.zeros(0, dtype=np.int64)
+        # Per activity and activity pair
+        self._activity_count = np.zeros(0, dtype=np.int64)
+        self._start_count = np.zeros(0, dtype=np.int64)
+        self._duration_count = np.zeros(0, dtype=np.int64)
+        self._duration_sum = np.zeros(0, dtype=np.float64)
+        self._duration_max = np.zeros(0, dtype=np.float64)
+        self._follows_count = np.zeros((0, 0), dtype=np.int64)
+        self._follows_seconds = np.zeros((0, 0), dtype=np.float64)
+
+        self._files = []
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._files = [open(os.path.join(directory, name), "ab") for name in (CASE_FILE, ACTIVITY_FILE, TIMESTAMP_FILE)]
+
+    def add_chunk(self, cases: Sequence[str], activities: Sequence[str], timestamps: np.ndarray) -> None:
+        """Add a chunk of events given as names and int64 nanosecond timestamps"""
+        import pandas as pd
+
+        case_codes, case_uniques = pd.factorize(np.asarray(cases, dtype=object))
+        activity_codes, activity_uniques = pd.factorize(np.asarray(activities, dtype=object))
+        self.add_encoded(
+            self.cases.encode(case_uniques)[case_codes],
+            self.activities.encode(activity_uniques)[activity_codes],
+            np.asarray(timestamps, dtype=np.int64),
+        )
+
+    def add_encoded(self, case: np.ndarray, activity: np.ndarray, timestamp: np.ndarray) -> None:
+        """Add a chunk of already encoded events (codes from ``cases``/``activities``)"""
+        if len(case) == 0:
+            return
+        case = case.astype(np.int32, copy=False)
+        activity = activity.astype(np.int32, copy=False)
+        timestamp = timestamp.astype(np.int64, copy=False)
+        for f, column in zip(self._files, (case, activity, timestamp)):
+            f.write(column.tobytes())
+
+        n_cases, n_activities = len(self.cases), len(self.activities)
+        self._last_activity = _grow(self._last_activity, n_cases, NO_ACTIVITY)
+        self._first_time = _grow(self._first_time, n_cases, 0)
+        self._last_time = _grow(self._last_time, n_cases, 0)
+        self._case_events = _grow(self._case_events, n_cases, 0)
+        for name in ("_activity_count", "_start_count", "_duration_count", "_duration_sum", "_duration_max"):
+            setattr(self, name, _grow(getattr(self, name), n_activities, 0))
+        self._follows_count = _grow_square(self._follows_count, n_activities)
+        self._follows_seconds = _grow_square(self._follows_seconds, n_activities)
+
+        # Group the chunk by case, in time order within each case (lexsort is stable)
+        order = np.lexsort((timestamp, case))
+        case, activity, timestamp = case[order], activity[order], timestamp[order]
+        same = case[1:] == case[:-1]
+        first = np.concatenate(([True], ~same))
+        last = np.concatenate((~same, [True]))
+
+        # Links inside the chunk
+        sources = [activity[:-1][same]]
+        targets = [activity[1:][same]]
+        seconds = [(timestamp[1:][same] - timestamp[:-1][same]) / 1e9]
+
+        # Links from each case's last event in earlier chunks
+        first_case, first_activity, first_time = case[first], activity[first], timestamp[first]
+        previous = self._last_activity[first_case]
+        continued = previous != NO_ACTIVITY
+        gap = first_time[continued] - self._last_time[first_case[continued]]
+        self.out_of_order += int(np.count_nonzero(gap < 0))
+        sources.append(previous[continued])
+        targets.append(first_activity[continued])
+        seconds.append(gap / 1e9)
+
+        new = ~continued
+        self._first_time[first_case[new]] = first_time[new]
+        self._start_count += np.bincount(first_activity[new], minlength=len(self._start_count))
+
+        source, target, duration = np.concatenate(sources), np.concatenate(targets), np.concatenate(seconds)
+        size = self._follows_count.shape[0]
+        pair = source.astype(np.int64) * size + target
+        self._follows_count += np.bincount(pair, minlength=size * size).reshape(size, size)
+        self._follows_seconds += np.bincount(pair, weights=duration, minlength=size * size).reshape(size, size)
+        self._duration_count += np.bincount(source, minlength=len(self._duration_count))
+        self._duration_sum += np.bincount(source, weights=duration, minlength=len(self._duration_sum))
+        np.maximum.at(self._duration_max, source, duration)
+
+        self._activity_count += np.bincount(activity, minlength=len(self._activity_count))
+        self._case_events += np.bincount(case, minlength=len(self._case_events))
+        self._last_activity[case[last]] = activity[last]
+        self._last_time[case[last]] = timestamp[last]
+        self.events += len(case)
+
+    def close(self) -> None:
+        for f in self._files:
+            f.close()
+        self._files = []
+        if self.directory is not None:
+            self.cases.save(os.path.join(self.directory, CASE_DICTIONARY_FILE), self._saved[0])
+            self.activities.save(os.path.join(self.directory, ACTIVITY_DICTIONARY_FILE), self._saved[1])
+            self._saved = (len(self.cases), len(self.activities))
+
+    def summary(self, top_edges: Optional[int] = None) -> Dict[str, Any]:
+        """Directly-follows graph, activity statistics and case statistics so far"""
+        n_cases, names = len(self.cases), self.activities.values
+        n = len(names)
+        counts = self._follows_count[:n, :n]
+        sources, targets = np.nonzero(counts)
+        edge_counts = counts[sources, targets]
+        order = np.argsort(-edge_counts, kind="stable")[:top_edges]
+        edges = [
+            {
+                "source": names[s],
+                "target": names[t],
+                "count": int(c),
+                "mean_seconds": round(float(self._follows_seconds[s, t] / c), 3),
+            }
+            for s, t, c in zip(sources[order], targets[order], edge_counts[order])
+        ]
+
+        activities = []
+        for code, name in enumerate(names):
+            timed = int(self._duration_count[code])
+            activities.append({
+                "activity": name,
+                "count": int(self._activity_count[code]),
+                "mean_seconds": round(float(self._duration_sum[code] / timed), 3) if timed else None,
+                "max_seconds": round(float(self._duration_max[code]), 3) if timed else None,
+            })
+
+        end_count = np.bincount(self._last_activity[:n_cases], minlength=n) if n_cases else np.zeros(n, np.int64)
+        case_seconds = (self._last_time[:n_cases] - self._first_time[:n_cases]) / 1e9
+        return {
+            "events": self.events,
+            "cases": n_cases,
+            "skipped_rows": self.skipped,
+            "out_of_order_events": self.out_of_order,
+            "activities": activities,
+            "directly_follows": edges,
+            "start_activities": {names[i]: int(c) for i, c in enumerate(self._start_count[:n]) if c},
+            "end_activities": {names[i]: int(c) for i, c in enumerate(end_count) if c},
+            "case_duration_seconds": {
+                "mean": round(float(case_seconds.mean()), 3),
+                "median": round(float(np.median(case_seconds)), 3),
+                "max": round(float(case_seconds.max()), 3),
+            } if n_cases else None,
+            "events_per_case": round(self.events / n_cases, 3) if n_cases else None,
+            "seconds": round(time.perf_counter() - self.started, 3),
+        }
+
+
+# Parsing ---------------------------------------------------------------------
+
+class _FeedReader(io.RawIOBase):
+    """Blocking file object over byte chunks handed over from the event loop"""
+
+    def __init__(self, read_ahead: int = EVENT_LOG_READ_AHEAD):
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(max(1, read_ahead))
+        self._chunk = memoryview(b"")
+        self._eof = False
+        self.finished = False
+        self.aborted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            if self.aborted:
+                raise EventLogError("Event log upload was interrupted")
+            if self._eof:
+                return 0
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+                return 0
+            self._chunk = memoryview(chunk)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def put(self, chunk: Optional[bytes]) -> None:
+        """Called from a helper thread; gives up once the parser has stopped reading"""
+        while not self.finished:
+            try:
+                self._queue.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    async def feed(self, chunk: Optional[bytes]) -> None:
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            await asyncio.to_thread(self.put, chunk)
+
+    def abort(self) -> None:
+        self.aborted = True
+        try:
+            # Wakes a parser waiting on an empty queue
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+def _resolve_column(columns: Sequence[str], requested: Optional[str], kind: str) -> str:
+    if requested:
+        if requested not in columns:
+            raise EventLogError(f"Column '{requested}' not found; columns are {list(columns)}")
+        return requested
+    for alias in COLUMN_ALIASES[kind]:
+        if alias in columns:
+            return alias
+    raise EventLogError(f"No {kind} column found; pass it explicitly. Columns are {list(columns)}")
+
+
+def _parse_timestamps(values) -> np.ndarray:
+    """int64 nanoseconds since the epoch; unparseable values become NaT"""
+    import pandas as pd
+
+    parsed = pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], utc=True, errors="coerce", format="mixed")
+    return parsed
+
+
+def parse_csv(
+    stream,
+    builder: EventLogBuilder,
+    case_column: Optional[str] = None,
+    activity_column: Optional[str] = None,
+    timestamp_column: Optional[str] = None,
+    delimiter: str = ",",
+    chunk_rows: int = EVENT_LOG_CHUNK_ROWS,
+) -> None:
+    """Parse a CSV event log from a binary file object into ``builder``, chunk by chunk"""
+    import pandas as pd
+
+    # Header read by hand: pandas would buffer past it and lose the rows
+    try:
+        line = stream.readline().decode("utf-8-sig").rstrip("\r\n")
+    except UnicodeDecodeError as e:
+        raise EventLogError(f"Event log is not UTF-8 encoded: {e}")
+    if not line:
+        raise EventLogError("Empty event log")
+    header = next(csv.reader([line], delimiter=delimiter))
+    columns = [
+        _resolve_column(header, case_column, "case"),
+        _resolve_column(header, activity_column, "activity"),
+        _resolve_column(header, timestamp_column, "timestamp"),
+    ]
+    try:
+        chunks = pd.read_csv(
+            stream, sep=delimiter, names=header, header=None, usecols=columns,
+            dtype=str, encoding="utf-8", chunksize=max(1, chunk_rows),
+        )
+        for frame in chunks:
+            _add_frame(builder, frame, columns)
+    # Malformed rows (e.g. an unterminated quote) and non-UTF-8 bodies are the client's error
+    except pd.errors.ParserError as e:
+        raise EventLogError(f"Malformed CSV event log: {e}")
+    except UnicodeDecodeError as e:
+        raise EventLogError(f"Event log is not UTF-8 encoded: {e}")
+
+
+def _add_frame(builder: EventLogBuilder, frame, columns: List[str]) -> None:
+    times = _parse_timestamps(frame[columns[2]])
+    valid = frame[columns[0]].notna() & frame[columns[1]].notna() & times.notna()
+    builder.skipped += int((~valid).sum())
+    builder.add_chunk(
+        frame[columns[0]][valid].to_numpy(),
+        frame[columns[1]][valid].to_numpy(),
+        times[valid].dt.tz_convert(None).to_numpy(dtype="datetime64[ns]").view(np.int64),
+    )
+
+
+async def ingest_event_log(
+    chunks: AsyncIterator[bytes],
+    builder: EventLogBuilder,
+    parse: Callable[..., None] = parse_csv,
+    **options,
+) -> EventLogBuilder:
+    """
+    Feed an async stream of body chunks through ``parse`` into ``builder``.
+    Parsing and graph updates run in a worker thread while the body is still
+    arriving; at most EVENT_LOG_READ_AHEAD chunks are buffered in between.
+    """
+    reader = _FeedReader()
+    stream = io.BufferedReader(reader, UPLOAD_READ_BYTES)
+
+    def run() -> None:
+        try:
+            parse(stream, builder, **options)
+        finally:
+            reader.finished = True
+
+    parsing = asyncio.create_task(asyncio.to_thread(run))
+    try:
+        async for chunk in chunks:
+            if parsing.done():
+                break
+            if chunk:
+                await reader.feed(chunk)
+        await reader.feed(None)
+        await parsing
+    finally:
+        if not parsing.done():
+            reader.abort()
+            await asyncio.gather(parsing, return_exceptions=True)
+        builder.close()
+    return builder
+
+
+async def upload_chunks(upload, size: int = UPLOAD_READ_BYTES) -> AsyncIterator[bytes]:
+    """Read an UploadFile in fixed-size chunks"""
+    while True:
+        chunk = await upload.read(size)
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,723 @@
+"""
+Persistent, indexed event-log workspaces.
+
+A log is uploaded once into a workspace directory: the encoded columns
+written by EventLogBuilder plus index arrays, memory-mapped when queried:
+
+- ``case_order`` / ``case_offsets``: event ids grouped by case, in time order
+- ``activity_order`` / ``activity_offsets``: event ids grouped by activity
+- ``time_order``: event ids in time order
+- ``next_activity`` / ``duration``: each event's successor in its case, kept
+  as columns next to the event columns
+- ``case_start`` / ``case_end`` / ``case_variant``: per-case aggregates, and
+  the variant table (distinct activity sequences, ``variant_activities`` /
+  ``variant_offsets``) with their case counts
+- ``bucket_*``: per time bucket and activity event counts and durations
+- ``follows_*``: the directly-follows graph
+
+Filter, variant and bottleneck queries read these instead of the rows.
+Appending events re-derives only the cases the new events belong to; new ids
+are merged into the sorted orders by binary search rather than re-sorting.
+The successor columns are extended and patched in place for the affected
+cases; the other indexes are saved as a new ``.npy`` generation that
+meta.json is switched to.
+
+An append that fails leaves the workspace as it was: columns and case and
+activity dictionaries are cut back to the sizes recorded in meta.json, and
+patched successor links are restored from an undo file. Appends and deletes
+hold a file lock, so any number of worker processes can share the directory;
+each reloads a workspace when meta.json points at a generation it has not
+seen. A query racing an append in another worker may see the successor links
+of that append before its events.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.event_log import (
+    ACTIVITY_DICTIONARY_FILE, ACTIVITY_FILE, CASE_DICTIONARY_FILE, CASE_FILE, TIMESTAMP_FILE,
+    Dictionary, EventLogBuilder, ingest_event_log,
+)
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+WORKSPACE_DIR = os.getenv("AI_ENGINE_WORKSPACE_DIR", os.path.join(tempfile.gettempdir(), "ai-engine-workspaces"))
+WORKSPACE_BUCKET_SECONDS = int(os.getenv("AI_ENGINE_WORKSPACE_BUCKET_SECONDS", "86400"))
+
+META_FILE = "meta.json"
+LOCK_FILE = "append.lock"
+NEXT_ACTIVITY_FILE = "next_activity.i32"
+DURATION_FILE = "duration.i64"
+UNDO_FILE = "successors.undo.npz"
+NO_ACTIVITY = -1
+
+_WORKSPACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class WorkspaceNotFound(LookupError):
+    pass
+
+
+def _exclusive(path: str):
+    """Take a workspace's cross-process lock; it is released when the returned file is closed"""
+    try:
+        held = open(os.path.join(path, LOCK_FILE), "a")
+    except FileNotFoundError:
+        raise WorkspaceNotFound(f"Workspace {os.path.basename(path)} not found") from None
+    try:
+        fcntl.flock(held, fcntl.LOCK_EX)
+    except BaseException:
+        held.close()
+        raise
+    return held
+
+
+def to_nanoseconds(value: Optional[datetime]) -> Optional[int]:
+    """Epoch nanoseconds of a datetime; naive values are taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 10**9 + delta.microseconds * 1000
+
+
+def _gather(order: np.ndarray, offsets: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenated ``order`` slices of ``groups``, with the group of each element"""
+    starts = offsets[groups]
+    lengths = offsets[groups + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=groups.dtype)
+    shift = starts - np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = np.repeat(shift, lengths) + np.arange(total)
+    return np.asarray(order[positions], dtype=np.int64), np.repeat(groups, lengths)
+
+
+def _merge(
+    order: np.ndarray,
+    offsets: np.ndarray,
+    n_groups: int,
+    new_ids: np.ndarray,
+    new_groups: np.ndarray,
+    timestamps: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Insert ``new_ids`` into ``order`` (ids grouped by group, in time order
+    within a group) without re-sorting it: each new id's position is found by a
+    vectorized binary search within its group's slice.
+    """
+    sort = np.lexsort((timestamps[new_ids], new_groups))
+    new_ids, new_groups = new_ids[sort], new_groups[sort]
+    times = timestamps[new_ids]
+
+    offsets = np.concatenate((offsets, np.full(n_groups + 1 - len(offsets), offsets[-1], dtype=np.int64)))
+    low, high = offsets[new_groups].copy(), offsets[new_groups + 1].copy()
+    while True:
+        active = low < high
+        if not active.any():
+            break
+        middle = (low + high) // 2
+        after = active & (timestamps[order[np.where(active, middle, 0)]] <= times)
+        low = np.where(after, middle + 1, low)
+        high = np.where(active & ~after, middle, high)
+
+    merged = np.insert(np.asarray(order, dtype=np.int64), low, new_ids)
+    counts = np.diff(offsets) + np.bincount(new_groups, minlength=n_groups)
+    return merged, np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+
+class EventLogWorkspace:
+    """One persisted event log and its indexes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.id = os.path.basename(path)
+        self.lock = asyncio.Lock()
+        # Held while ``state`` is swapped, by this process's appends or reloads
+        self._swap = threading.Lock()
+        self.cases = Dictionary()
+        self.activities = Dictionary()
+        # (meta, index) as of the last refresh; replaced as a whole so queries
+        # never pair new metadata with old indexes
+        meta = {
+            "events": 0, "cases": 0, "activities": 0,
+            "bucket_seconds": WORKSPACE_BUCKET_SECONDS, "bucket_origin": 0, "index": None,
+        }
+        self.state: Tuple[Dict[str, Any], Dict[str, np.ndarray]] = (meta, {})
+        self._variant_keys: Dict[bytes, int] = {}
+        self.variants: List[List[int]] = []
+        self.reload()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the first upload has been indexed"""
+        return bool(self.state[1])
+
+    # Storage ------------------------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(META_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _load(self, meta: Dict[str, Any]) -> None:
+        directory = self._file(meta["index"])
+        index = {
+            name[:-4]: np.load(os.path.join(directory, name), mmap_mode="r")
+            for name in os.listdir(directory) if name.endswith(".npy")
+        }
+        index["next_activity"], index["duration"] = self._successors(meta["events"])
+        cases = Dictionary.load(self._file(CASE_DICTIONARY_FILE))
+        activities = Dictionary.load(self._file(ACTIVITY_DICTIONARY_FILE))
+        # Values saved by an append that never got indexed
+        cases.truncate(meta["cases"])
+        activities.truncate(meta["activities"])
+        variant_activities, offsets = np.asarray(index["variant_activities"]), index["variant_offsets"]
+        variants = [variant_activities[offsets[i]:offsets[i + 1]].tolist() for i in range(len(offsets) - 1)]
+        # Dictionaries before state: queries take the state first, and only
+        # ever look up codes it knows
+        self.cases, self.activities = cases, activities
+        self.variants = variants
+        self._variant_keys = {np.asarray(v, dtype=np.int32).tobytes(): i for i, v in enumerate(variants)}
+        self.state = (meta, index)
+
+    def reload(self) -> None:
+        """Pick up appends made by other workers; repair one that died while patching successor links"""
+        while True:
+            if not os.path.isdir(self.path):
+                raise WorkspaceNotFound(f"Workspace {self.id} not found")
+            if os.path.exists(self._file(UNDO_FILE)) and not self.lock.locked():
+                # Waits for an append in another worker to finish
+                held = _exclusive(self.path)
+                try:
+                    self._recover()
+                finally:
+                    held.close()
+                return
+            meta = self._meta()
+            if meta is None or meta["index"] == self.state[0]["index"]:
+                return
+            try:
+                with self._swap:
+                    self._load(meta)
+                return
+            except FileNotFoundError:
+                # That generation was replaced by a newer one meanwhile
+                continue
+
+    def _recover(self) -> None:
+        """Under the file lock: load the latest generation and undo whatever a failed append left behind"""
+        if not os.path.isdir(self.path):
+            raise WorkspaceNotFound(f"Workspace {self.id} not found")
+        meta = self._meta()
+        if meta is not None and meta["index"] != self.state[0]["index"]:
+            with self._swap:
+                self._load(meta)
+        self._truncate(self.state[0])
+
+    def _column(self, name: str, dtype, events: int, mode: str = "r") -> np.ndarray:
+        if events == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode=mode, shape=(events,))
+
+    def _columns(self, events: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            self._column(CASE_FILE, np.int32, events),
+            self._column(ACTIVITY_FILE, np.int32, events),
+            self._column(TIMESTAMP_FILE, np.int64, events),
+        )
+
+    def _successors(self, events: int, mode: str = "r") -> Tuple[np.ndarray, np.ndarray]:
+        return self._column(NEXT_ACTIVITY_FILE, np.int32, events, mode), self._column(DURATION_FILE, np.int64, events, mode)
+
+    def _truncate(self, meta: Dict[str, Any]) -> None:
+        """Drop column rows and dictionary values past the indexed ones, left by a failed append"""
+        events = meta["events"]
+        self._undo(events)
+        for name, itemsize in (
+            (CASE_FILE, 4), (ACTIVITY_FILE, 4), (TIMESTAMP_FILE, 8), (NEXT_ACTIVITY_FILE, 4), (DURATION_FILE, 8),
+        ):
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > events * itemsize:
+                os.truncate(path, events * itemsize)
+        Dictionary.truncate_file(self._file(CASE_DICTIONARY_FILE), meta["cases"])
+        Dictionary.truncate_file(self._file(ACTIVITY_DICTIONARY_FILE), meta["activities"])
+
+    def _undo(self, events: int) -> None:
+        """Restore the successor links an append patched, unless meta.json already moved past them"""
+        path = self._file(UNDO_FILE)
+        if not os.path.exists(path):
+            return
+        with np.load(path) as undo:
+            if int(undo["events"]) == events and len(undo["ids"]):
+                next_activity, duration = self._successors(events, mode="r+")
+                next_activity[undo["ids"]] = undo["next_activity"]
+                duration[undo["ids"]] = undo["duration"]
+                next_activity.flush()
+                duration.flush()
+        os.remove(path)
+
+    def _rollback(self, meta: Dict[str, Any], variants: int) -> None:
+        """Undo a failed append in memory and on disk"""
+        self.cases.truncate(meta["cases"])
+        self.activities.truncate(meta["activities"])
+        for variant in self.variants[variants:]:
+            del self._variant_keys[np.asarray(variant, dtype=np.int32).tobytes()]
+        del self.variants[variants:]
+        self._truncate(meta)
+
+    def _save(self, meta: Dict[str, Any], index: Dict[str, np.ndarray]) -> None:
+        """
+        Write the indexes as a new generation directory, then switch meta.json
+        to it. A crash at any point leaves the previous generation in use.
+        """
+        directory = meta["index"] = f"index-{meta['events']}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self._file(directory))
+        for name, array in index.items():
+            np.save(os.path.join(self._file(directory), f"{name}.npy"), array)
+        with open(self._file(META_FILE) + ".tmp", "w") as f:
+            json.dump(meta, f)
+        loaded = {name: np.load(os.path.join(self._file(directory), f"{name}.npy"), mmap_mode="r") for name in index}
+        loaded["next_activity"], loaded["duration"] = self._successors(meta["events"])
+
+        previous = self.state[0]["index"]
+        with self._swap:
+            os.replace(self._file(META_FILE) + ".tmp", self._file(META_FILE))
+            self.state = (meta, loaded)
+        if previous:
+            # Open mappings of the old files stay valid after unlinking
+            shutil.rmtree(self._file(previous), ignore_errors=True)
+
+    # Appending ----------------------------------------------------------------
+
+    async def append(self, chunks: AsyncIterator[bytes], **options) -> Dict[str, Any]:
+        """Parse a CSV log stream into the workspace and refresh the indexes"""
+        async with self.lock:
+            held = await asyncio.to_thread(_exclusive, self.path)
+            try:
+                # Another worker may have appended since this one last looked
+                await asyncio.to_thread(self._recover)
+                meta = self.state[0]
+                indexed, variants = meta["events"], len(self.variants)
+                builder = EventLogBuilder(self.path, cases=self.cases, activities=self.activities)
+                try:
+                    await ingest_event_log(chunks, builder, **options)
+                    started = time.perf_counter()
+                    await asyncio.to_thread(self._refresh, indexed, indexed + builder.events)
+                except BaseException:
+                    # Cases and activities first seen in this upload must not
+                    # survive it as cases without events
+                    self._rollback(meta, variants)
+                    raise
+            finally:
+                held.close()
+            return {
+                **self.summary(),
+                "appended_events": builder.events,
+                "skipped_rows": builder.skipped,
+                "index_seconds": round(time.perf_counter() - started, 3),
+            }
+
+    def _grow_successors(self, old_events: int, events: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Extend the successor columns with unlinked new events and map them for writing"""
+        for name, fill, dtype in ((NEXT_ACTIVITY_FILE, NO_ACTIVITY, np.int32), (DURATION_FILE, -1, np.int64)):
+            with open(self._file(name), "ab") as f:
+                f.write(np.full(events - old_events, fill, dtype=dtype).tobytes())
+        return self._successors(events, mode="r+")
+
+    def _save_undo(self, old_events: int, ids: np.ndarray, next_activity: np.ndarray, duration: np.ndarray) -> None:
+        """Record the successor links about to be overwritten, for ``_undo``"""
+        with open(self._file(UNDO_FILE) + ".tmp", "wb") as f:
+            np.savez(f, events=old_events, ids=ids, next_activity=next_activity[ids], duration=duration[ids])
+        os.replace(self._file(UNDO_FILE) + ".tmp", self._file(UNDO_FILE))
+
+    def _refresh(self, old_events: int, events: int) -> None:
+        if events == old_events:
+            return
+        case, activity, timestamp = self._columns(events)
+        n_cases, n_activities = len(self.cases), len(self.activities)
+        meta, old = self.state
+        old_cases = len(old["case_start"]) if old else 0
+        bucket_ns = int(meta["bucket_seconds"]) * 10**9
+        new_ids = np.arange(old_events, events, dtype=np.int64)
+        affected = np.unique(case[old_events:events]).astype(np.int64)
+
+        def grown(name: str, size: int, fill, dtype) -> np.ndarray:
+            array = np.full(size, fill, dtype=dtype)
+            if name in old:
+                array[:len(old[name])] = old[name]
+            return array
+
+        def grown_square(name: str, dtype) -> np.ndarray:
+            matrix = np.zeros((n_activities, n_activities), dtype=dtype)
+            if name in old:
+                size = old[name].shape[0]
+                matrix[:size, :size] = old[name]
+            return matrix
+
+        next_activity, duration = self._grow_successors(old_events, events)
+        case_start = grown("case_start", n_cases, 0, np.int64)
+        case_end = grown("case_end", n_cases, 0, np.int64)
+        case_variant = grown("case_variant", n_cases, -1, np.int32)
+        variant_cases = grown("variant_cases", len(self.variants), 0, np.int64)
+        follows_count = grown_square("follows_count", np.int64)
+        follows_seconds = grown_square("follows_seconds", np.float64)
+
+        # Time buckets cover every event; extend them at either end as needed
+        new_buckets = timestamp[old_events:events] // bucket_ns
+        origin = int(meta["bucket_origin"]) if old else int(new_buckets.min())
+        low = min(origin, int(new_buckets.min()))
+        high = max(origin + (old["bucket_count"].shape[0] if old else 0), int(new_buckets.max()) + 1)
+        buckets = {}
+        for name, dtype in (("bucket_count", np.int64), ("bucket_seconds", np.float64), ("bucket_timed", np.int64)):
+            buckets[name] = np.zeros((high - low, n_activities), dtype=dtype)
+            if name in old:
+                previous = old[name]
+                buckets[name][origin - low:origin - low + previous.shape[0], :previous.shape[1]] = previous
+        origin = low
+
+        def contributions(ids: np.ndarray, sign: int) -> None:
+            """Add (or with sign=-1 remove) the links of events ``ids`` to the graph and buckets"""
+            linked = ids[next_activity[ids] != NO_ACTIVITY]
+            source, target = activity[linked], next_activity[linked]
+            seconds = duration[linked] / 1e9
+            np.add.at(follows_count, (source, target), sign)
+            np.add.at(follows_seconds, (source, target), sign * seconds)
+            bucket = timestamp[linked] // bucket_ns - origin
+            np.add.at(buckets["bucket_seconds"], (bucket, source), sign * seconds)
+            np.add.at(buckets["bucket_timed"], (bucket, source), sign)
+
+        # Take the affected cases' old links out
+        existing = affected[affected < old_cases]
+        if old and len(existing):
+            old_ids, _ = _gather(old["case_order"], old["case_offsets"], existing)
+            contributions(old_ids, -1)
+            np.subtract.at(variant_cases, case_variant[existing], 1)
+
+        # Merge the new events into the sorted orders
+        empty = np.zeros(1, dtype=np.int64)
+        case_order, case_offsets = _merge(
+            old.get("case_order", np.zeros(0, np.int64)), old.get("case_offsets", empty), n_cases,
+            new_ids, case[old_events:events].astype(np.int64), timestamp,
+        )
+        activity_order, activity_offsets = _merge(
+            old.get("activity_order", np.zeros(0, np.int64)), old.get("activity_offsets", empty), n_activities,
+            new_ids, activity[old_events:events].astype(np.int64), timestamp,
+        )
+        time_order, _ = _merge(
+            old.get("time_order", np.zeros(0, np.int64)), np.array([0, old_events], dtype=np.int64), 1,
+            new_ids, np.zeros(len(new_ids), dtype=np.int64), timestamp,
+        )
+        np.add.at(buckets["bucket_count"], (new_buckets - origin, activity[old_events:events]), 1)
+
+        # Re-derive the affected cases: successors, bounds, variants
+        ids, owner = _gather(case_order, case_offsets, affected)
+        self._save_undo(old_events, ids[ids < old_events], next_activity, duration)
+        same = owner[1:] == owner[:-1]
+        next_activity[ids[:-1][same]] = activity[ids[1:][same]]
+        duration[ids[:-1][same]] = timestamp[ids[1:][same]] - timestamp[ids[:-1][same]]
+        last = np.concatenate((~same, [True]))
+        next_activity[ids[last]] = NO_ACTIVITY
+        duration[ids[last]] = -1
+        next_activity.flush()
+        duration.flush()
+        contributions(ids, 1)
+
+        starts = case_offsets[affected]
+        ends = case_offsets[affected + 1]
+        case_start[affected] = timestamp[case_order[starts]]
+        case_end[affected] = timestamp[case_order[ends - 1]]
+        traces = activity[ids]
+        bounds = np.concatenate(([0], np.cumsum(ends - starts)))
+        variant_of = np.empty(len(affected), dtype=np.int32)
+        for position in range(len(affected)):
+            key = traces[bounds[position]:bounds[position + 1]].tobytes()
+            variant = self._variant_keys.get(key)
+            if variant is None:
+                variant = self._variant_keys[key] = len(self.variants)
+                self.variants.append(np.frombuffer(key, dtype=np.int32).tolist())
+            variant_of[position] = variant
+        case_variant[affected] = variant_of
+        variant_cases = np.concatenate((variant_cases, np.zeros(len(self.variants) - len(variant_cases), np.int64)))
+        np.add.at(variant_cases, variant_of, 1)
+        # The variant table only ever grows; extend the stored one
+        variant_activities = old.get("variant_activities", np.zeros(0, np.int32))
+        variant_offsets = old.get("variant_offsets", np.zeros(1, np.int64))
+        added = self.variants[len(variant_offsets) - 1:]
+        if added:
+            variant_activities = np.concatenate([variant_activities] + [np.asarray(v, np.int32) for v in added])
+            variant_offsets = np.concatenate((
+                variant_offsets, variant_offsets[-1] + np.cumsum([len(v) for v in added], dtype=np.int64)
+            ))
+
+        meta = {**meta, "events": events, "cases": n_cases, "activities": n_activities, "bucket_origin": origin}
+        self._save(meta, {
+            "case_order": case_order, "case_offsets": case_offsets,
+            "activity_order": activity_order, "activity_offsets": activity_offsets,
+            "time_order": time_order, "time_sorted": timestamp[time_order],
+            "case_start": case_start, "case_end": case_end,
+            "case_variant": case_variant, "variant_cases": variant_cases,
+            "variant_activities": variant_activities, "variant_offsets": variant_offsets,
+            "follows_count": follows_count, "follows_seconds": follows_seconds,
+            **buckets,
+        })
+        os.remove(self._file(UNDO_FILE))
+
+    # Queries ------------------------------------------------------------------
+
+    def case_mask(
+        self,
+        state,
+        activities: Optional[Sequence[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        variant: Optional[int] = None,
+        min_seconds: Optional[float] = None,
+        max_seconds: Optional[float] = None,
+    ) -> np.ndarray:
+        """Cases containing all ``activities``, started in [start, end), of ``variant``, within the duration bounds"""
+        meta, index = state
+        case_start, case_end = index["case_start"], index["case_end"]
+        mask = np.ones(len(case_start), dtype=bool)
+        if activities:
+            case_column, _, _ = self._columns(meta["events"])
+            for name in activities:
+                code = self.activities.lookup(name)
+                if code is None or code + 1 >= len(index["activity_offsets"]):
+                    return np.zeros(len(case_start), dtype=bool)
+                events = index["activity_order"][index["activity_offsets"][code]:index["activity_offsets"][code + 1]]
+                contains = np.zeros(len(case_start), dtype=bool)
+                contains[case_column[events]] = True
+                mask &= contains
+        if start is not None:
+            mask &= case_start >= to_nanoseconds(start)
+        if end is not None:
+            mask &= case_start < to_nanoseconds(end)
+        if variant is not None:
+            mask &= index["case_variant"] == variant
+        if min_seconds is not None or max_seconds is not None:
+            seconds = (case_end - case_start) / 1e9
+            if min_seconds is not None:
+                mask &= seconds >= min_seconds
+            if max_seconds is not None:
+                mask &= seconds <= max_seconds
+        return mask
+
+    def filter_cases(self, limit: int = 100, top_variants: int = 10, **filters) -> Dict[str, Any]:
+        started = time.perf_counter()
+        state = self.state
+        index = state[1]
+        mask = self.case_mask(state, **filters)
+        selected = np.flatnonzero(mask)
+        seconds = (index["case_end"][selected] - index["case_start"][selected]) / 1e9
+        events = np.diff(index["case_offsets"])[selected]
+        return {
+            "cases": int(len(selected)),
+            "events": int(events.sum()),
+            "case_duration_seconds": {
+                "mean": round(float(seconds.mean()), 3),
+                "median": round(float(np.median(seconds)), 3),
+                "max": round(float(seconds.max()), 3),
+            } if len(selected) else None,
+            "variants": self._variant_rows(index["case_variant"][selected], seconds, top_variants),
+            "case_ids": [self.cases.values[c] for c in selected[:limit]],
+            "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def variant_table(self, top: int = 20, **filters) -> Dict[str, Any]:
+        started = time.perf_counter()
+        state = self.state
+        index = state[1]
+        if any(value is not None for value in filters.values()):
+            selected = np.flatnonzero(self.case_mask(state, **filters))
+            variants = index["case_variant"][selected]
+            seconds = (index["case_end"][selected] - index["case_start"][selected]) / 1e9
+        else:
+            variants = index["case_variant"]
+            seconds = (index["case_end"] - index["case_start"]) / 1e9
+        return {
+            "total_variants": int(np.count_nonzero(np.bincount(variants))) if len(variants) else 0,
+            "cases": int(len(variants)),
+            "variants": self._variant_rows(variants, seconds, top),
+            "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _variant_rows(self, variants: np.ndarray, seconds: np.ndarray, top: int) -> List[Dict[str, Any]]:
+        if len(variants) == 0:
+            return []
+        counts = np.bincount(variants, minlength=len(self.variants))
+        totals = np.bincount(variants, weights=seconds, minlength=len(self.variants))
+        names = self.activities.values
+        rows = []
+        for variant in np.argsort(-counts, kind="stable")[:top]:
+            if counts[variant] == 0:
+                break
+            rows.append({
+                "variant": int(variant),
+                "activities": [names[code] for code in self.variants[variant]],
+                "cases": int(counts[variant]),
+                "share": round(float(counts[variant] / len(variants)), 4),
+                "mean_seconds": round(float(totals[variant] / counts[variant]), 3),
+            })
+        return rows
+
+    def bottlenecks(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        top: int = 10,
+    ) -> Dict[str, Any]:
+        """Activities and transitions with the longest mean waiting time, over the log or a time window"""
+        started = time.perf_counter()
+        meta, index = self.state
+        names = self.activities.values
+        if start is None and end is None:
+            timed, total = index["bucket_timed"].sum(axis=0), index["bucket_seconds"].sum(axis=0)
+            counts, seconds = index["follows_count"], index["follows_seconds"]
+        else:
+            # Whole buckets for activities, exact events for transitions
+            bucket_ns = int(meta["bucket_seconds"]) * 10**9
+            origin = int(meta["bucket_origin"])
+            first = 0 if start is None else max(0, to_nanoseconds(start) // bucket_ns - origin)
+            last = None if end is None else max(0, -(-to_nanoseconds(end) // bucket_ns) - origin)
+            timed = index["bucket_timed"][first:last].sum(axis=0)
+            total = index["bucket_seconds"][first:last].sum(axis=0)
+
+            _, activity, _ = self._columns(meta["events"])
+            ordered = index["time_sorted"]
+            low = 0 if start is None else int(np.searchsorted(ordered, to_nanoseconds(start), "left"))
+            high = len(ordered) if end is None else int(np.searchsorted(ordered, to_nanoseconds(end), "left"))
+            ids = np.asarray(index["time_order"][low:high])
+            ids = ids[index["next_activity"][ids] != NO_ACTIVITY]
+            size = len(names)
+            pair = activity[ids].astype(np.int64) * size + index["next_activity"][ids]
+            counts = np.bincount(pair, minlength=size * size).reshape(size, size)
+            seconds = np.bincount(pair, weights=index["duration"][ids] / 1e9, minlength=size * size).reshape(size, size)
+
+        activity_rows = [
+            {"activity": names[code], "events": int(timed[code]), "mean_seconds": round(float(total[code] / timed[code]), 3)}
+            for code in np.flatnonzero(timed)
+        ]
+        activity_rows.sort(key=lambda row: -row["mean_seconds"])
+        sources, targets = np.nonzero(counts)
+        transition_rows = [
+            {
+                "source": names[s], "target": names[t], "count": int(counts[s, t]),
+                "mean_seconds": round(float(seconds[s, t] / counts[s, t]), 3),
+            }
+            for s, t in zip(sources, targets)
+        ]
+        transition_rows.sort(key=lambda row: -row["mean_seconds"])
+        return {
+            "activities": activity_rows[:top],
+            "transitions": transition_rows[:top],
+            "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def analyze(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        top: int = 10,
+    ) -> Dict[str, Any]:
+        """Process analysis from the indexes: summary, variants and bottlenecks, optionally for a time window"""
+        started = time.perf_counter()
+        return {
+            **self.summary(),
+            "variants": self.variant_table(top=top, start=start, end=end),
+            "bottlenecks": self.bottlenecks(start=start, end=end, top=top),
+            "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        meta, index = self.state
+        counts = index["bucket_count"].sum(axis=0) if index else np.zeros(0, np.int64)
+        return {
+            "workspace_id": self.id,
+            "events": int(meta["events"]),
+            "cases": int(len(index["case_start"])) if index else 0,
+            "activities": {self.activities.values[c]: int(n) for c, n in enumerate(counts) if n},
+            "variants": int(np.count_nonzero(index["variant_cases"])) if index else 0,
+            "first_event": str(np.datetime64(int(index["case_start"].min()), "ns")) if index else None,
+            "last_event": str(np.datetime64(int(index["case_end"].max()), "ns")) if index else None,
+            "bucket_seconds": int(meta["bucket_seconds"]),
+        }
+
+
+class WorkspaceManager:
+    """Workspaces under one root directory, opened on first use and reloaded when another worker changed them"""
+
+    def __init__(self, root: str = WORKSPACE_DIR):
+        self.root = root
+        self._open: Dict[str, EventLogWorkspace] = {}
+
+    def create(self) -> EventLogWorkspace:
+        workspace_id = uuid.uuid4().hex
+        path = os.path.join(self.root, workspace_id)
+        os.makedirs(path)
+        workspace = self._open[workspace_id] = EventLogWorkspace(path)
+        return workspace
+
+    def get(self, workspace_id: str) -> EventLogWorkspace:
+        """Blocking: may load the workspace's indexes"""
+        workspace = self._open.get(workspace_id)
+        if workspace is not None:
+            try:
+                workspace.reload()
+            except WorkspaceNotFound:
+                # Deleted by another worker
+                self._open.pop(workspace_id, None)
+                raise
+            return workspace
+        path = os.path.join(self.root, workspace_id)
+        if not _WORKSPACE_ID.match(workspace_id) or not os.path.exists(os.path.join(path, META_FILE)):
+            raise WorkspaceNotFound(f"Workspace {workspace_id} not found")
+        return self._open.setdefault(workspace_id, EventLogWorkspace(path))
+
+    async def delete(self, workspace_id: str) -> None:
+        workspace = self._open.pop(workspace_id, None)
+        if workspace is None and not _WORKSPACE_ID.match(workspace_id):
+            raise WorkspaceNotFound(f"Workspace {workspace_id} not found")
+        path = os.path.join(self.root, workspace_id)
+        if not os.path.isdir(path):
+            raise WorkspaceNotFound(f"Workspace {workspace_id} not found")
+        if workspace is not None:
+            # Let a running append finish first
+            async with workspace.lock:
+                workspace.state = (workspace.state[0], {})
+        await asyncio.to_thread(self._remove, path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        """Delete a workspace directory once no worker is appending to it"""
+        held = _exclusive(path)
+        try:
+            # Without meta.json other workers treat it as gone even if the
+            # rest of the removal fails
+            if os.path.exists(os.path.join(path, META_FILE)):
+                os.remove(os.path.join(path, META_FILE))
+            shutil.rmtree(path, ignore_errors=True)
+        finally:
+            held.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"root": self.root, "open": len(self._open)}
@@ -0,0 +1,196 @@
+"""
+Binary image ingestion.
+
+Request bodies are read chunk by chunk into a single preallocated buffer
+(small uploads) or a temporary file that is memory-mapped afterwards (large
+scans), and decoded straight from that buffer into a NumPy array. There is no
+base64 step and no intermediate ``bytes`` copy of the upload.
+"""
+
+import asyncio
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+from fastapi import HTTPException, Request, UploadFile
+
+from src.utils.logger import setup_logger
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - fall back to Pillow when OpenCV is absent
+    cv2 = None
+
+logger = setup_logger(__name__)
+
+SPOOL_MAX_MEMORY = int(os.getenv("AI_ENGINE_SPOOL_MAX_MEMORY", str(8 * 1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv("AI_ENGINE_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+
+
+class ImageBuffer:
+    """
+    Upload bytes held in memory or in a spooled temporary file.
+
+    ``view`` exposes the contents as a memoryview without copying; for a
+    spooled file it is backed by an mmap of the file.
+    """
+
+    def __init__(self, max_memory: int = SPOOL_MAX_MEMORY):
+        self.max_memory = max_memory
+        self.size = 0
+        self._memory = bytearray()
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+
+    @property
+    def spooled(self) -> bool:
+        return self._file is not None
+
+    def reserve(self, size: int) -> None:
+        """Preallocate for a body of known length so chunks are written in place"""
+        if size > self.max_memory:
+            self._file = tempfile.TemporaryFile()
+        else:
+            self._memory = bytearray(size)
+
+    def write(self, chunk: bytes) -> None:
+        end = self.size + len(chunk)
+        if self._file is None and end > self.max_memory:
+            # Roll over to disk once the upload outgrows the memory budget
+            self._file = tempfile.TemporaryFile()
+            self._file.write(memoryview(self._memory)[:self.size])
+            self._memory = bytearray()
+        if self._file is not None:
+            self._file.write(chunk)
+        elif end <= len(self._memory):
+            self._memory[self.size:end] = chunk
+        else:
+            del self._memory[self.size:]
+            self._memory += chunk
+        self.size = end
+
+    @property
+    def view(self) -> memoryview:
+        if self._file is None:
+            return memoryview(self._memory)[:self.size]
+        if self._mmap is None:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), self.size, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = bytearray()
+
+    def __enter__(self) -> "ImageBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def read_body(request: Request, max_bytes: int = MAX_UPLOAD_BYTES) -> ImageBuffer:
+    """Stream the raw request body into an ImageBuffer"""
+    buffer = ImageBuffer()
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit():
+        if int(declared) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+        buffer.reserve(int(declared))
+
+    try:
+        async for chunk in request.stream():
+            if buffer.size + len(chunk) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+            buffer.write(chunk)
+    except BaseException:
+        buffer.close()
+        raise
+
+    if buffer.size == 0:
+        buffer.close()
+        raise HTTPException(status_code=400, detail="Empty request body")
+    return buffer
+
+
+def decode_image(data, grayscale: bool = False) -> np.ndarray:
+    """
+    Decode an encoded image (PNG, JPEG, TIFF, ...) from any buffer-protocol
+    object. The returned frame is marked read-only so services can share it
+    without defensive copies.
+    """
+    encoded = np.frombuffer(data, dtype=np.uint8)
+    if cv2 is not None:
+        frame = cv2.imdecode(encoded, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+    else:
+        import io
+        from PIL import Image
+
+        with Image.open(io.BytesIO(encoded)) as image:
+            # Match OpenCV's BGR channel order
+            frame = np.asarray(image.convert("L" if grayscale else "RGB"))
+            if not grayscale:
+                frame = frame[:, :, ::-1]
+    del encoded
+    if frame is None:
+        raise ValueError("Unsupported or corrupt image data")
+    frame = np.ascontiguousarray(frame)
+    frame.flags.writeable = False
+    return frame
+
+
+async def decode_request_image(request: Request, grayscale: bool = False) -> np.ndarray:
+    """Read a raw image body and decode it off the event loop"""
+    with await read_body(request) as buffer:
+        view = buffer.view
+        try:
+            return await asyncio.to_thread(decode_image, view, grayscale)
+        except ValueError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        finally:
+            view.release()
+
+
+def _upload_view(upload: UploadFile):
+    """Zero-copy view of an UploadFile's spooled contents, when the backing store allows it"""
+    spool = upload.file
+    inner = getattr(spool, "_file", None)
+    if getattr(spool, "_rolled", False) and hasattr(inner, "fileno"):
+        size = os.fstat(inner.fileno()).st_size
+        return mmap.mmap(inner.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+    if hasattr(inner, "getbuffer"):
+        return inner.getbuffer()
+    spool.seek(0)
+    data = spool.read()
+    spool.seek(0)
+    return data
+
+
+@contextmanager
+def upload_view(upload: UploadFile) -> Iterator[object]:
+    """The upload's spooled contents as a buffer, released on exit; the file position is unchanged"""
+    data = _upload_view(upload)
+    try:
+        yield data
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+        elif isinstance(data, memoryview):
+            data.release()
+
+
+async def decode_upload(upload: UploadFile, grayscale: bool = False) -> np.ndarray:
+    """Decode a multipart upload without reading it into a bytes object first"""
+    with upload_view(upload) as data:
+        try:
+            return await asyncio.to_thread(decode_image, data, grayscale)
+        except ValueError as e:
+            raise HTTPException(status_code=415, detail=str(e))
@@ -0,0 +1,412 @@
+"""
+Process pool for CPU-bound inference.
+
+OpenCV, Tesseract, EasyOCR and torch work blocks whatever thread runs it, so
+the heavy service methods are executed in worker processes instead of on the
+event loop. Each worker constructs and initializes its own copy of the
+offloaded services once, at start-up, and keeps it for the life of the
+process. The parent never loads those models: its service registry holds a
+WorkerServiceHandle per offloaded service, which only tracks whether the
+workers loaded it. NumPy images are handed over through shared memory rather than
+pickled, every service has its own concurrency limit, and a call whose client
+disconnects is cancelled if it has not started yet (a running call is left to
+finish, holding its slot, but its result is discarded).
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, Request
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+INFERENCE_WORKERS = int(os.getenv("AI_ENGINE_INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PROCESS_SERVICES = [
+    s.strip() for s in os.getenv(
+        "AI_ENGINE_PROCESS_SERVICES", "computer_vision,ocr,document_intelligence"
+    ).split(",") if s.strip()
+]
+DEFAULT_CONCURRENCY = int(os.getenv("AI_ENGINE_DEFAULT_CONCURRENCY", str(max(INFERENCE_WORKERS, 1))))
+MP_START_METHOD = os.getenv("AI_ENGINE_MP_START_METHOD", "spawn")
+DISCONNECT_POLL_SECONDS = float(os.getenv("AI_ENGINE_DISCONNECT_POLL_SECONDS", "0.25"))
+
+
+def _concurrency_limit(name: str) -> int:
+    """AI_ENGINE_CONCURRENCY_<SERVICE>, e.g. AI_ENGINE_CONCURRENCY_OCR=2"""
+    return int(os.getenv(f"AI_ENGINE_CONCURRENCY_{name.upper()}", str(DEFAULT_CONCURRENCY)))
+
+
+class ClientDisconnected(HTTPException):
+    """The client went away before its inference call completed"""
+
+    def __init__(self):
+        super().__init__(status_code=499, detail="Client disconnected")
+
+
+# Worker process state ------------------------------------------------------
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_services: Dict[str, Any] = {}
+_worker_errors: Dict[str, str] = {}
+
+
+def _init_worker(specs: Dict[str, str]) -> None:
+    """Build and initialize every offloaded service once per worker process"""
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    for name, spec in specs.items():
+        module_name, _, class_name = spec.partition(":")
+        try:
+            service = getattr(importlib.import_module(module_name), class_name)()
+            _worker_loop.run_until_complete(service.initialize())
+            _worker_services[name] = service
+        except Exception as e:
+            # Keep the worker alive; calls to this service report the error
+            _worker_errors[name] = str(e)
+            logger.error(f"Worker {os.getpid()} failed to initialize {name}: {e}")
+
+
+def _worker_status() -> Dict[str, Any]:
+    return {"pid": os.getpid(), "services": sorted(_worker_services), "errors": dict(_worker_errors)}
+
+
+def _invoke(name: str, method: Any, args: list, kwargs: Dict[str, Any], shared: Dict[Any, Tuple[str, tuple, str]]) -> Any:
+    service = _worker_services.get(name)
+    if service is None and not callable(method):
+        raise RuntimeError(f"{name} service unavailable in worker: {_worker_errors.get(name, 'not loaded')}")
+
+    segments = []
+    try:
+        for key, (segment_name, shape, dtype) in shared.items():
+            segment = shared_memory.SharedMemory(name=segment_name)
+            segments.append(segment)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+            array.flags.writeable = False
+            # Integer keys are positional arguments
+            if isinstance(key, int):
+                args[key] = array
+            else:
+                kwargs[key] = array
+        if callable(method):
+            return method(*args, **kwargs)
+        return _worker_loop.run_until_complete(getattr(service, method)(*args, **kwargs))
+    finally:
+        # Views into the segments must be gone before they can be closed
+        args.clear()
+        kwargs.clear()
+        for segment in segments:
+            segment.close()
+
+
+# Parent side ----------------------------------------------------------------
+
+class WorkerServiceHandle:
+    """
+    Parent-side stand-in for a service whose model lives in the worker
+    processes: it initializes once the workers have started and reports their
+    health, but holds no model itself.
+    """
+
+    def __init__(self, pool: "InferencePool", name: str):
+        self.pool = pool
+        self.name = name
+
+    def _loaded_by(self) -> list:
+        return [pid for pid, status in self.pool.worker_status.items() if self.name in status["services"]]
+
+    def _errors(self) -> Dict[int, str]:
+        return {
+            pid: status["errors"][self.name]
+            for pid, status in self.pool.worker_status.items()
+            if self.name in status["errors"]
+        }
+
+    async def initialize(self) -> None:
+        await self.pool.wait_ready()
+        if not self._loaded_by():
+            errors = sorted(set(self._errors().values()))
+            raise RuntimeError(f"no inference worker loaded {self.name}: {'; '.join(errors) or 'no workers started'}")
+
+    async def health_check(self) -> Dict[str, Any]:
+        loaded = self._loaded_by()
+        return {
+            "status": "healthy" if loaded and self.pool.ready else "unhealthy",
+            "workers": len(loaded),
+            "errors": self._errors(),
+        }
+
+    async def shutdown(self) -> None:
+        # The models go away with the worker processes
+        pass
+
+
+class InferencePool:
+    """Runs service methods in worker processes under per-service limits"""
+
+    def __init__(
+        self,
+        service_classes: Dict[str, type],
+        workers: int = INFERENCE_WORKERS,
+        process_services: Iterable[str] = PROCESS_SERVICES,
+        start_method: str = MP_START_METHOD,
+    ):
+        self.workers = workers
+        self.start_method = start_method
+        self.specs = {
+            name: f"{cls.__module__}:{cls.__qualname__}"
+            for name, cls in service_classes.items()
+            if name in set(process_services)
+        }
+        self.limits = {name: _concurrency_limit(name) for name in service_classes}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warmup: Optional[asyncio.Task] = None
+        self.worker_status: Dict[int, Dict[str, Any]] = {}
+        self.ready = False
+        self.calls: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.cancelled = 0
+        self.discarded = 0
+        self.restarts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and bool(self.specs)
+
+    def offloaded(self, name: str) -> bool:
+        return self.enabled and name in self.specs
+
+    def service_factories(self, service_classes: Dict[str, type]) -> Dict[str, Callable[[], Any]]:
+        """
+        Service registry factories: offloaded services get a WorkerServiceHandle,
+        so their models are loaded in the workers only, not also in the parent
+        """
+        return {
+            name: (lambda name=name: WorkerServiceHandle(self, name)) if self.offloaded(name) else cls
+            for name, cls in service_classes.items()
+        }
+
+    async def wait_ready(self) -> None:
+        """Wait until the workers have started (after a restart, the new ones)"""
+        while not self.ready:
+            warmup = self._warmup
+            if warmup is None:
+                raise RuntimeError("Inference pool is not running")
+            await asyncio.shield(warmup)
+            if warmup is self._warmup and not self.ready:
+                raise RuntimeError("Inference pool failed to start")
+
+    def start(self) -> None:
+        """Create the pool and preload models in every worker in the background"""
+        if not self.enabled:
+            logger.info("Inference process pool disabled; services run in-process")
+            return
+        self._create_executor()
+        self._warmup = asyncio.create_task(self._warm())
+
+    async def shutdown(self) -> None:
+        if self._warmup is not None and not self._warmup.done():
+            self._warmup.cancel()
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        self.ready = False
+
+    async def call(
+        self,
+        name: str,
+        service: Any,
+        method: str,
+        *args: Any,
+        request: Optional[Request] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Run ``service.method(*args, **kwargs)`` in a worker process (or in-process when
+        ``name`` is not offloaded), within the service's concurrency limit. If
+        ``request`` is given the call is abandoned when that client disconnects.
+        """
+        try:
+            return await run_until_disconnected(self._call(name, service, method, args, kwargs), request)
+        except ClientDisconnected:
+            logger.info(f"Client disconnected, cancelled {name}.{_label(method)}")
+            self.cancelled += 1
+            raise
+
+    async def run(
+        self,
+        name: str,
+        function: Callable[..., Any],
+        *args: Any,
+        request: Optional[Request] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Run a plain module-level function in ``name``'s worker processes and
+        under its concurrency limit (in a thread when ``name`` is not offloaded)
+        """
+        return await self.call(name, None, function, *args, request=request, **kwargs)
+
+    async def _call(self, name: str, service: Any, method: Any, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        slots = self._slots.get(name)
+        if slots is None:
+            slots = self._slots[name] = asyncio.Semaphore(self.limits.get(name, DEFAULT_CONCURRENCY))
+        await slots.acquire()
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.in_flight[name] = self.in_flight.get(name, 0) + 1
+
+        def release() -> None:
+            self.in_flight[name] -= 1
+            slots.release()
+
+        if not self.offloaded(name) or self._executor is None:
+            try:
+                if callable(method):
+                    return await asyncio.to_thread(method, *args, **kwargs)
+                return await getattr(service, method)(*args, **kwargs)
+            finally:
+                release()
+
+        segments, plain_args, plain_kwargs, shared = _share_arrays(args, kwargs)
+        loop = asyncio.get_running_loop()
+
+        def finished(_future) -> None:
+            # Runs when the worker is done (or the call was cancelled before
+            # it started): only then are the slot and shared memory released
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+            release()
+
+        executor = self._executor
+        try:
+            future = executor.submit(_invoke, name, method, plain_args, plain_kwargs, shared)
+        except RuntimeError as e:
+            finished(None)
+            self._restart(executor, e)
+            raise RuntimeError(f"Inference pool unavailable: {e}")
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(finished, f))
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel():
+                self.discarded += 1
+            raise
+        except BrokenProcessPool as e:
+            self._restart(executor, e)
+            raise RuntimeError(f"Inference worker crashed during {name}.{_label(method)}")
+
+    def _create_executor(self) -> None:
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.specs,),
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor, error: Exception) -> None:
+        """Replace a broken pool (e.g. a worker killed by the OOM killer)"""
+        if broken is not self._executor:
+            # Shut down, or already replaced by a concurrent failure
+            return
+        logger.error(f"Inference pool broken, restarting: {error}")
+        self.ready = False
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.restarts += 1
+        self.worker_status = {}
+        self._create_executor()
+        self._warmup = asyncio.create_task(self._warm())
+
+    async def _warm(self) -> None:
+        """Start every worker up front so model loading is not paid by the first requests"""
+        started = time.time()
+        executor = self._executor
+        futures = [asyncio.wrap_future(executor.submit(_worker_status)) for _ in range(self.workers)]
+        for result in await asyncio.gather(*futures, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error(f"Inference worker failed to start: {result}")
+            else:
+                self.worker_status[result["pid"]] = result
+        self.ready = executor is self._executor
+        logger.info(f"Inference pool warm in {time.time() - started:.1f}s ({len(self.worker_status)} workers)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "workers": self.workers,
+            "start_method": self.start_method,
+            "offloaded_services": sorted(self.specs) if self.enabled else [],
+            "concurrency_limits": self.limits,
+            "calls": self.calls,
+            "in_flight": {name: n for name, n in self.in_flight.items() if n},
+            "cancelled": self.cancelled,
+            "discarded_results": self.discarded,
+            "restarts": self.restarts,
+            "worker_errors": {
+                pid: status["errors"] for pid, status in self.worker_status.items() if status["errors"]
+            },
+        }
+
+
+def _label(method: Any) -> str:
+    return getattr(method, "__name__", str(method))
+
+
+def _share_arrays(args: tuple, kwargs: Dict[str, Any]):
+    """Move ndarray arguments into shared memory segments; everything else is pickled"""
+    segments, plain_args, plain_kwargs, shared = [], list(args), dict(kwargs), {}
+    try:
+        for key, value in list(enumerate(args)) + list(kwargs.items()):
+            if isinstance(value, np.ndarray) and value.nbytes:
+                segment = shared_memory.SharedMemory(create=True, size=value.nbytes)
+                segments.append(segment)
+                np.ndarray(value.shape, dtype=value.dtype, buffer=segment.buf)[...] = value
+                shared[key] = (segment.name, value.shape, value.dtype.str)
+                if isinstance(key, int):
+                    plain_args[key] = None
+                else:
+                    del plain_kwargs[key]
+    except Exception:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+        raise
+    return segments, plain_args, plain_kwargs, shared
+
+
+async def run_until_disconnected(awaitable: Awaitable[Any], request: Optional[Request]) -> Any:
+    """Await ``awaitable``, cancelling it and raising ClientDisconnected if the client goes away"""
+    task = asyncio.ensure_future(awaitable)
+    if request is None:
+        return await task
+
+    watcher = asyncio.create_task(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if not task.done():
+        task.cancel()
+        raise ClientDisconnected()
+    return task.result()
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
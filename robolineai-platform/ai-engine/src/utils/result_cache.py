@@ -0,0 +1,399 @@
+"""
+Content-addressed cache for OCR and vision results.
+
+Results are keyed by a hash of the input content plus the request parameters
+that affect the output, and kept in a bounded in-memory LRU in front of a
+size-capped directory on disk. Concurrent misses for the same key share one
+computation. In perceptual mode, decoded images are also indexed by a 64-bit
+DCT perceptual hash, so a near-identical screenshot (a moved cursor, a
+blinking caret, recompression noise) can reuse a stored result. Candidates are
+found through banded lookups on the hash and then checked by Hamming distance.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+from src.utils.inference_pool import ClientDisconnected
+from src.utils.logger import setup_logger
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - perceptual hashing needs OpenCV
+    cv2 = None
+
+logger = setup_logger(__name__)
+
+RESULT_CACHE_ENABLED = os.getenv("AI_ENGINE_RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MEMORY_ITEMS = int(os.getenv("AI_ENGINE_RESULT_CACHE_MEMORY_ITEMS", "2048"))
+RESULT_CACHE_MEMORY_MB = float(os.getenv("AI_ENGINE_RESULT_CACHE_MEMORY_MB", "64"))
+RESULT_CACHE_DIR = os.getenv(
+    "AI_ENGINE_RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ai-engine-result-cache")
+)
+RESULT_CACHE_DISK_MB = float(os.getenv("AI_ENGINE_RESULT_CACHE_DISK_MB", "1024"))
+RESULT_CACHE_PERCEPTUAL = os.getenv("AI_ENGINE_RESULT_CACHE_PERCEPTUAL", "false").lower() == "true"
+RESULT_CACHE_PHASH_DISTANCE = int(os.getenv("AI_ENGINE_RESULT_CACHE_PHASH_DISTANCE", "4"))
+
+# The 64-bit hash is split into bands; two hashes within distance d < BANDS
+# are guaranteed to agree exactly on at least one band
+PHASH_BANDS = 8
+_BAND_BITS = 64 // PHASH_BANDS
+
+CACHE_LOOKUPS = Counter(
+    'ai_engine_result_cache_lookups_total', 'Result cache lookups', ['namespace', 'result']
+)
+CACHE_BYTES_SAVED = Counter(
+    'ai_engine_result_cache_input_bytes_saved_total', 'Input bytes not reprocessed thanks to cache hits',
+    ['namespace']
+)
+CACHE_SECONDS_SAVED = Counter(
+    'ai_engine_result_cache_compute_seconds_saved_total', 'Compute time avoided by cache hits', ['namespace']
+)
+CACHE_HIT_RATIO = Gauge('ai_engine_result_cache_hit_ratio', 'Result cache hit ratio', ['namespace'])
+CACHE_SIZE_BYTES = Gauge('ai_engine_result_cache_size_bytes', 'Result cache size', ['tier'])
+
+
+def content_digest(data: Any) -> str:
+    """Hash of the raw input: an ndarray's pixels and geometry, or encoded bytes/str"""
+    h = hashlib.blake2b(digest_size=20)
+    if isinstance(data, np.ndarray):
+        h.update(f"{data.shape}{data.dtype.str}".encode())
+        h.update(np.ascontiguousarray(data).data)
+    elif isinstance(data, str):
+        h.update(data.encode())
+    else:
+        h.update(data)
+    return h.hexdigest()
+
+
+def params_digest(params: Dict[str, Any]) -> str:
+    canonical = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """64-bit DCT hash: low frequencies of a 32x32 grayscale thumbnail against their median"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(thumb)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def _input_size(data: Any) -> int:
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    return len(data)
+
+
+class _Entry:
+    __slots__ = ("payload", "compute_seconds", "phash")
+
+    def __init__(self, payload: bytes, compute_seconds: float, phash: Optional[int]):
+        self.payload = payload
+        self.compute_seconds = compute_seconds
+        self.phash = phash
+
+
+class ResultCache:
+    """Two-tier (memory LRU over disk) result cache with single-flight misses"""
+
+    def __init__(
+        self,
+        enabled: bool = RESULT_CACHE_ENABLED,
+        memory_items: int = RESULT_CACHE_MEMORY_ITEMS,
+        memory_mb: float = RESULT_CACHE_MEMORY_MB,
+        directory: Optional[str] = RESULT_CACHE_DIR,
+        disk_mb: float = RESULT_CACHE_DISK_MB,
+        perceptual: bool = RESULT_CACHE_PERCEPTUAL,
+        phash_distance: int = RESULT_CACHE_PHASH_DISTANCE,
+    ):
+        self.enabled = enabled
+        self.memory_items = memory_items
+        self.memory_bytes = int(memory_mb * 1024 * 1024)
+        self.directory = directory if disk_mb > 0 else None
+        self.disk_bytes = int(disk_mb * 1024 * 1024)
+        self.perceptual = perceptual and cv2 is not None
+        self.phash_distance = min(phash_distance, PHASH_BANDS - 1)
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory_size = 0
+        # key -> (file size, file name), least recently used first
+        self._disk: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._disk_size = 0
+        # (namespace/params, band index, band value) -> keys
+        self._bands: Dict[Tuple[str, int, int], Set[str]] = defaultdict(set)
+        self._phashes: Dict[str, int] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    async def open(self) -> None:
+        """Index entries left on disk by a previous run"""
+        if not self.enabled or self.directory is None:
+            return
+        await asyncio.to_thread(self._scan_disk)
+        logger.info(f"Result cache: {len(self._disk)} entries ({self._disk_size} bytes) on disk")
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        data: Any,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached result for ``data`` + ``params``, computing and storing it on a miss"""
+        if not self.enabled:
+            return await compute()
+
+        scope = f"{namespace}:{params_digest(params)}"
+        key = f"{scope}:{content_digest(data)}"
+        phash = perceptual_hash(data) if self.perceptual and isinstance(data, np.ndarray) else None
+
+        while True:
+            entry, result = await self._lookup(key, scope, phash)
+            if entry is not None:
+                self._record(namespace, hit=True, data=data, entry=entry)
+                return result
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                break
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller computing this result went away; try again ourselves
+                continue
+            self._record(namespace, hit=True, data=data)
+            return result
+
+        self._record(namespace, hit=False, data=data)
+        pending = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        try:
+            result = await compute()
+        except (asyncio.CancelledError, ClientDisconnected):
+            pending.cancel()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            # Waiters re-raise it; nobody else needs to retrieve it
+            pending.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+        pending.set_result(result)
+        await self._store(key, scope, phash, result, time.perf_counter() - started)
+        return result
+
+    async def _lookup(self, key: str, scope: str, phash: Optional[int]) -> Tuple[Optional[_Entry], Any]:
+        found = key if key in self._memory or key in self._disk else None
+        if found is None and phash is not None:
+            found = self._nearest(scope, phash)
+        if found is None:
+            return None, None
+
+        entry = self._memory.get(found)
+        if entry is not None:
+            self._memory.move_to_end(found)
+        else:
+            location = self._disk.get(found)
+            if location is None:
+                return None, None
+            _, name = location
+            self._disk.move_to_end(found)
+            payload = await asyncio.to_thread(self._read_file, name)
+            if payload is None:
+                self._forget_disk(found)
+                return None, None
+            _, phash, millis, _ = name.rsplit(".", 3)
+            entry = _Entry(payload, int(millis) / 1000, None if phash == "-" else int(phash, 16))
+            self._remember(found, entry)
+        return entry, json.loads(entry.payload)
+
+    def _nearest(self, scope: str, phash: int) -> Optional[str]:
+        best, best_distance = None, self.phash_distance + 1
+        candidates = set()
+        for band in range(PHASH_BANDS):
+            value = (phash >> (band * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)
+            candidates |= self._bands.get((scope, band, value), set())
+        for candidate in candidates:
+            distance = bin(self._phashes[candidate] ^ phash).count("1")
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    async def _store(self, key: str, scope: str, phash: Optional[int], result: Any, seconds: float) -> None:
+        try:
+            payload = json.dumps(result, default=str).encode()
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Result for {scope} is not cacheable: {e}")
+            return
+        entry = _Entry(payload, seconds, phash)
+        self._remember(key, entry)
+        if phash is not None:
+            self._index(key, scope, phash)
+        if self.directory is not None and len(payload) <= self.disk_bytes:
+            name = self._file_name(key, entry)
+            try:
+                await asyncio.to_thread(self._write_file, name, payload)
+            except OSError as e:
+                logger.error(f"Result cache disk write failed: {e}")
+                return
+            self._forget_disk(key)
+            self._disk[key] = (len(payload), name)
+            self._disk_size += len(payload)
+            evicted = []
+            while self._disk_size > self.disk_bytes:
+                old_key = next(iter(self._disk))
+                evicted.append(self._disk[old_key][1])
+                self._forget_disk(old_key)
+            if evicted:
+                await asyncio.to_thread(self._remove_files, evicted)
+            CACHE_SIZE_BYTES.labels(tier="disk").set(self._disk_size)
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        if len(entry.payload) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous.payload)
+        self._memory[key] = entry
+        self._memory_size += len(entry.payload)
+        while len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes:
+            old_key, old = self._memory.popitem(last=False)
+            self._memory_size -= len(old.payload)
+            if old_key not in self._disk:
+                self._unindex(old_key)
+        CACHE_SIZE_BYTES.labels(tier="memory").set(self._memory_size)
+
+    def _forget_disk(self, key: str) -> None:
+        location = self._disk.pop(key, None)
+        if location is not None:
+            self._disk_size -= location[0]
+            if key not in self._memory:
+                self._unindex(key)
+
+    def _index(self, key: str, scope: str, phash: int) -> None:
+        self._phashes[key] = phash
+        for band in range(PHASH_BANDS):
+            value = (phash >> (band * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)
+            self._bands[(scope, band, value)].add(key)
+
+    def _unindex(self, key: str) -> None:
+        phash = self._phashes.pop(key, None)
+        if phash is None:
+            return
+        scope = key.rsplit(":", 1)[0]
+        for band in range(PHASH_BANDS):
+            value = (phash >> (band * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)
+            keys = self._bands.get((scope, band, value))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[(scope, band, value)]
+
+    # Disk tier; file access runs in worker threads, bookkeeping on the loop
+
+    def _file_name(self, key: str, entry: _Entry) -> str:
+        # namespace:params:content -> flat file name; the perceptual hash and
+        # compute time ride along so the index can be rebuilt from a listing
+        name = key.replace(":", "_")
+        phash = f"{entry.phash:016x}" if entry.phash is not None else "-"
+        return f"{name}.{phash}.{int(entry.compute_seconds * 1000)}.json"
+
+    def _write_file(self, name: str, payload: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(payload)
+        os.replace(temporary, path)
+
+    def _read_file(self, name: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _remove_files(self, names) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _scan_disk(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                self._remove_files([name])
+                continue
+            if not name.endswith(".json"):
+                continue
+            stat = os.stat(path)
+            found.append((stat.st_mtime, name, stat.st_size))
+
+        for _, name, size in sorted(found):
+            try:
+                stem, phash, _, _ = name.rsplit(".", 3)
+                namespace, params, content = stem.rsplit("_", 2)
+            except ValueError:
+                continue
+            key = f"{namespace}:{params}:{content}"
+            self._disk[key] = (size, name)
+            self._disk_size += size
+            if phash != "-":
+                self._index(key, f"{namespace}:{params}", int(phash, 16))
+        CACHE_SIZE_BYTES.labels(tier="disk").set(self._disk_size)
+
+    # ------------------------------------------------------------------------
+
+    def _record(self, namespace: str, hit: bool, data: Any, entry: Optional[_Entry] = None) -> None:
+        if hit:
+            self.hits[namespace] += 1
+            CACHE_LOOKUPS.labels(namespace=namespace, result="hit").inc()
+            CACHE_BYTES_SAVED.labels(namespace=namespace).inc(_input_size(data))
+            if entry is not None:
+                CACHE_SECONDS_SAVED.labels(namespace=namespace).inc(entry.compute_seconds)
+        else:
+            self.misses[namespace] += 1
+            CACHE_LOOKUPS.labels(namespace=namespace, result="miss").inc()
+        total = self.hits[namespace] + self.misses[namespace]
+        CACHE_HIT_RATIO.labels(namespace=namespace).set(self.hits[namespace] / total)
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {
+            "enabled": self.enabled,
+            "perceptual": self.perceptual,
+            "memory": {"entries": len(self._memory), "bytes": self._memory_size, "max_bytes": self.memory_bytes},
+            "disk": {
+                "directory": self.directory,
+                "entries": len(self._disk),
+                "bytes": self._disk_size,
+                "max_bytes": self.disk_bytes if self.directory else 0,
+            },
+            "namespaces": {
+                ns: {
+                    "hits": self.hits[ns],
+                    "misses": self.misses[ns],
+                    "hit_ratio": round(self.hits[ns] / (self.hits[ns] + self.misses[ns]), 4),
+                }
+                for ns in namespaces
+            },
+            "in_flight": len(self._in_flight),
+        }
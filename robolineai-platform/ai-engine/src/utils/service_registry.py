@@ -0,0 +1,163 @@
+"""
+Service registry with concurrent, lazy initialization.
+
+Eager services start initializing together in the background as soon as the
+app starts; lazy services initialize on their first request. Each service
+tracks its own state so readiness can be reported, and traffic routed, per
+service instead of waiting for the slowest model to load.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LAZY_SERVICES = [s.strip() for s in os.getenv("AI_ENGINE_LAZY_SERVICES", "").split(",") if s.strip()]
+INIT_RETRY_SECONDS = float(os.getenv("AI_ENGINE_INIT_RETRY_SECONDS", "30"))
+
+PENDING = "pending"
+INITIALIZING = "initializing"
+READY = "ready"
+FAILED = "failed"
+
+
+class ServiceUnavailable(Exception):
+    """Raised when a service is not (yet) able to take requests"""
+
+    def __init__(self, name: str, state: str, error: Optional[str] = None):
+        self.name = name
+        self.state = state
+        self.error = error
+        super().__init__(f"{name} service is {state}" + (f": {error}" if error else ""))
+
+
+class ServiceEntry:
+    def __init__(self, name: str, factory: Callable[[], Any], lazy: bool):
+        self.name = name
+        self.factory = factory
+        self.lazy = lazy
+        self.service: Any = None
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.started_at: Optional[float] = None
+        self.init_seconds: Optional[float] = None
+        self.failed_at: Optional[float] = None
+
+
+class ServiceRegistry:
+    """Owns the engine's services and their initialization lifecycle"""
+
+    def __init__(
+        self,
+        factories: Dict[str, Callable[[], Any]],
+        lazy: Iterable[str] = LAZY_SERVICES,
+        retry_seconds: float = INIT_RETRY_SECONDS,
+    ):
+        lazy = set(lazy)
+        self._entries = {
+            name: ServiceEntry(name, factory, name in lazy)
+            for name, factory in factories.items()
+        }
+        self.retry_seconds = retry_seconds
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def start(self) -> None:
+        """Begin initializing every eager service concurrently; does not wait"""
+        for entry in self._entries.values():
+            if not entry.lazy:
+                self._begin(entry)
+
+    async def wait_ready(self, names: Optional[Iterable[str]] = None) -> None:
+        """Wait for the given (default: all eager) services to finish initializing"""
+        names = list(names) if names is not None else [n for n, e in self._entries.items() if not e.lazy]
+        tasks = [self._begin(self._entries[name]) for name in names]
+        await asyncio.gather(*[t for t in tasks if t is not None], return_exceptions=True)
+
+    async def get(self, name: str) -> Any:
+        """Return the initialized service, initializing a lazy one on first use"""
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.service
+        if entry.state == FAILED and time.time() - entry.failed_at < self.retry_seconds:
+            raise ServiceUnavailable(name, FAILED, entry.error)
+
+        task = self._begin(entry)
+        # Shielded so a disconnecting caller does not abort a shared model load
+        await asyncio.shield(task)
+        if entry.state != READY:
+            raise ServiceUnavailable(name, entry.state, entry.error)
+        return entry.service
+
+    def ready_services(self) -> Dict[str, Any]:
+        return {name: e.service for name, e in self._entries.items() if e.state == READY}
+
+    def is_ready(self, name: str) -> bool:
+        """Whether ``name`` can take traffic: loaded, or lazy and not known to be broken"""
+        entry = self._entries[name]
+        return entry.state == READY or (entry.lazy and entry.state == PENDING)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "state": entry.state,
+                "lazy": entry.lazy,
+                "ready": self.is_ready(name),
+                "init_seconds": round(entry.init_seconds, 3) if entry.init_seconds is not None else None,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    async def shutdown(self) -> None:
+        for entry in self._entries.values():
+            if entry.task is not None and not entry.task.done():
+                entry.task.cancel()
+
+        async def stop(entry: ServiceEntry) -> None:
+            logger.info(f"Shutting down {entry.name} service...")
+            try:
+                await entry.service.shutdown()
+            except Exception as e:
+                logger.error(f"Error shutting down {entry.name} service: {e}")
+
+        await asyncio.gather(*[
+            stop(entry) for entry in self._entries.values() if entry.state == READY
+        ])
+
+    def _begin(self, entry: ServiceEntry) -> Optional[asyncio.Task]:
+        if entry.state == READY:
+            return None
+        if entry.task is None or entry.task.done():
+            entry.state = INITIALIZING
+            entry.error = None
+            entry.task = asyncio.create_task(self._initialize(entry))
+        return entry.task
+
+    async def _initialize(self, entry: ServiceEntry) -> None:
+        logger.info(f"Initializing {entry.name} service...")
+        entry.started_at = time.time()
+        try:
+            if entry.service is None:
+                entry.service = entry.factory()
+            await entry.service.initialize()
+        except asyncio.CancelledError:
+            entry.state = FAILED
+            entry.error = "initialization cancelled"
+            entry.failed_at = time.time()
+            raise
+        except Exception as e:
+            entry.state = FAILED
+            entry.error = str(e)
+            entry.failed_at = time.time()
+            logger.error(f"❌ Failed to initialize {entry.name} service: {e}")
+            return
+        entry.init_seconds = time.time() - entry.started_at
+        entry.state = READY
+        logger.info(f"✅ {entry.name} service initialized in {entry.init_seconds:.1f}s")
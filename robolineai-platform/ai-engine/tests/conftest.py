@@ -0,0 +1,24 @@
+"""
+Shared setup for the AI engine unit tests.
+
+Tests import the engine modules by their in-engine paths (``src.utils.*``).
+``src.utils.logger`` ships with the deployed engine image; when it is not on
+the path the standard library logger is used instead.
+"""
+
+import importlib
+import logging
+import os
+import sys
+import types
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ENGINE_DIR not in sys.path:
+    sys.path.insert(0, ENGINE_DIR)
+
+try:
+    importlib.import_module("src.utils.logger")
+except ImportError:
+    _logger_module = types.ModuleType("src.utils.logger")
+    _logger_module.setup_logger = logging.getLogger
+    sys.modules["src.utils.logger"] = _logger_module
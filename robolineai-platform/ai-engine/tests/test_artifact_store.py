@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.artifact_store import ArtifactStore
+
+
+def test_concurrent_callers_share_one_build():
+    store = ArtifactStore(ttl_seconds=60, max_mb=1)
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"text": "parsed"}
+
+    async def run():
+        return await asyncio.gather(*(store.get_or_build("doc", "parse", build) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert results == [{"text": "parsed"}] * 5
+    assert len(calls) == 1
+    assert store.get("doc", "parse") == {"text": "parsed"}
+    assert store.stats()["builds"] == 1
+
+
+def test_failed_build_reaches_every_caller_and_is_not_stored():
+    store = ArtifactStore(ttl_seconds=60, max_mb=1)
+
+    async def build():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("unreadable document")
+
+    async def run():
+        return await asyncio.gather(
+            *(store.get_or_build("doc", "parse", build) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert store.get("doc", "parse") is None
+    assert store.stats()["building"] == 0
+
+
+def test_cancelled_builder_hands_the_build_to_a_waiter():
+    store = ArtifactStore(ttl_seconds=60, max_mb=1)
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "parsed"
+
+    async def run():
+        first = asyncio.create_task(store.get_or_build("doc", "parse", slow))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(store.get_or_build("doc", "parse", fast))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "parsed"
+    assert store.get("doc", "parse") == "parsed"
+
+
+def test_documents_expire_after_their_ttl():
+    store = ArtifactStore(ttl_seconds=0.01, max_mb=1)
+    store.put("doc", "parse", "parsed")
+    assert store.get("doc", "parse") == "parsed"
+    time.sleep(0.02)
+    assert store.get("doc", "parse") is None
+    assert store.stats()["expired"] == 1
+    assert store.stats()["bytes"] == 0
+
+
+def test_least_recently_used_documents_are_evicted_over_budget():
+    store = ArtifactStore(ttl_seconds=60, max_mb=1)
+    half = "x" * (512 * 1024)
+    store.put("a", "parse", half)
+    store.put("b", "parse", half)
+    store.get("a", "parse")
+    store.put("c", "parse", half)
+    assert store.get("b", "parse") is None
+    assert store.get("a", "parse") == half
+    assert store.get("c", "parse") == half
+    assert store.stats()["evicted"] == 1
+    assert store.stats()["bytes"] <= store.max_bytes
+
+
+def test_replacing_an_artifact_keeps_the_size_accounting():
+    store = ArtifactStore(ttl_seconds=60, max_mb=1)
+    store.put("doc", "parse", "a" * 100)
+    store.put("doc", "parse", "b" * 40)
+    store.put("doc", "entities:all", "c" * 10)
+    assert store.stats()["bytes"] == 50
+
+
+def test_artifacts_larger_than_the_store_are_not_kept():
+    store = ArtifactStore(ttl_seconds=60, max_mb=0.001)
+    store.put("doc", "parse", "x" * 2048)
+    assert store.get("doc", "parse") is None
+    assert store.stats()["documents"] == 0
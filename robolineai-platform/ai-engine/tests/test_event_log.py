@@ -0,0 +1,93 @@
+import asyncio
+import io
+
+import numpy as np
+import pytest
+
+from src.utils.event_log import EventLogBuilder, EventLogError, ingest_event_log, parse_csv
+
+CSV = b"""case_id,activity,timestamp
+c1,receive,2024-01-01T00:00:00Z
+c1,review,2024-01-01T00:01:00Z
+c2,receive,2024-01-01T00:00:00Z
+c1,approve,2024-01-01T00:03:00Z
+c2,review,2024-01-01T00:02:00Z
+c2,reject,2024-01-01T00:02:30Z
+c3,receive,not a time
+"""
+
+
+def _edges(summary):
+    return {(e["source"], e["target"]): (e["count"], e["mean_seconds"]) for e in summary["directly_follows"]}
+
+
+def _activity(summary, name):
+    return next(a for a in summary["activities"] if a["activity"] == name)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 100])
+def test_directly_follows_graph_does_not_depend_on_chunking(chunk_rows):
+    builder = EventLogBuilder()
+    parse_csv(io.BytesIO(CSV), builder, chunk_rows=chunk_rows)
+    summary = builder.summary()
+
+    assert summary["events"] == 6
+    assert summary["cases"] == 2
+    assert summary["skipped_rows"] == 1
+    assert _edges(summary) == {
+        ("receive", "review"): (2, 90.0),
+        ("review", "approve"): (1, 120.0),
+        ("review", "reject"): (1, 30.0),
+    }
+    assert summary["start_activities"] == {"receive": 2}
+    assert summary["end_activities"] == {"approve": 1, "reject": 1}
+    assert summary["case_duration_seconds"] == {"mean": 165.0, "median": 165.0, "max": 180.0}
+    assert _activity(summary, "review") == {
+        "activity": "review", "count": 2, "mean_seconds": 75.0, "max_seconds": 120.0,
+    }
+    assert _activity(summary, "approve")["mean_seconds"] is None
+
+
+def test_events_out_of_order_across_chunks_are_counted():
+    builder = EventLogBuilder()
+    builder.add_chunk(["c1"], ["b"], np.array([2_000_000_000]))
+    builder.add_chunk(["c1"], ["a"], np.array([1_000_000_000]))
+    summary = builder.summary()
+    assert summary["out_of_order_events"] == 1
+    assert _edges(summary) == {("b", "a"): (1, -1.0)}
+
+
+def test_missing_columns_are_reported():
+    with pytest.raises(EventLogError):
+        parse_csv(io.BytesIO(b"id,step,when\n1,a,2024-01-01\n"), EventLogBuilder())
+    builder = EventLogBuilder()
+    parse_csv(
+        io.BytesIO(b"id,step,when\n1,a,2024-01-01\n"), builder,
+        case_column="id", activity_column="step", timestamp_column="when",
+    )
+    assert builder.summary()["events"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    # Unterminated quote
+    b'case_id,activity,timestamp\nc1,"receive,2024-01-01T00:00:00Z\nc1,review,2024-01-01T00:01:00Z\n',
+    # Latin-1 activity name
+    b"case_id,activity,timestamp\nc1,r\xe9ception,2024-01-01T00:00:00Z\n",
+    # Latin-1 header
+    b"case_id,activit\xe9,timestamp\nc1,receive,2024-01-01T00:00:00Z\n",
+])
+def test_malformed_bodies_are_event_log_errors(body):
+    with pytest.raises(EventLogError):
+        parse_csv(io.BytesIO(body), EventLogBuilder())
+
+
+def test_ingest_streams_body_chunks_into_the_builder(tmp_path):
+    async def body():
+        for start in range(0, len(CSV), 7):
+            yield CSV[start:start + 7]
+
+    builder = asyncio.run(ingest_event_log(body(), EventLogBuilder(str(tmp_path)), chunk_rows=2))
+    assert builder.summary()["events"] == 6
+    case = np.fromfile(tmp_path / "case.i32", dtype=np.int32)
+    assert len(case) == 6
+    assert (tmp_path / "activities.jsonl").read_text().splitlines() == ['"receive"', '"review"', '"approve"', '"reject"']
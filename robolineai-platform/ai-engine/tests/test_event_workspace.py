@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.utils.event_log import EventLogError
+from src.utils.event_workspace import EventLogWorkspace, WorkspaceManager, WorkspaceNotFound
+
+CSV = b"""case_id,activity,timestamp
+c1,receive,2024-01-01T00:00:00Z
+c1,review,2024-01-01T00:01:00Z
+c2,receive,2024-01-01T00:00:00Z
+c2,reject,2024-01-01T00:02:30Z
+"""
+
+# New cases and an activity, then an unterminated quote two chunks later
+MALFORMED = b"""case_id,activity,timestamp
+c3,receive,2024-01-02T00:00:00Z
+c4,escalate,2024-01-02T00:01:00Z
+c4,"review,2024-01-02T00:02:00Z
+c4,approve,2024-01-02T00:03:00Z
+"""
+
+
+async def _body(data: bytes):
+    yield data
+
+
+def _append(workspace: EventLogWorkspace, data: bytes):
+    return asyncio.run(workspace.append(_body(data), chunk_rows=1))
+
+
+def test_failed_append_leaves_the_workspace_unchanged(tmp_path):
+    workspace = EventLogWorkspace(str(tmp_path))
+    _append(workspace, CSV)
+    before = workspace.summary()
+    variants = workspace.variant_table()
+
+    with pytest.raises(EventLogError):
+        _append(workspace, MALFORMED)
+
+    for reopened in (workspace, EventLogWorkspace(str(tmp_path))):
+        assert reopened.summary() == before
+        assert reopened.cases.values == ["c1", "c2"]
+        assert reopened.filter_cases()["case_ids"] == ["c1", "c2"]
+        assert reopened.variant_table()["variants"] == variants["variants"]
+
+    _append(workspace, CSV.replace(b"c1", b"c5").replace(b"c2", b"c6"))
+    assert workspace.summary()["cases"] == 4
+    assert workspace.cases.values == ["c1", "c2", "c5", "c6"]
+
+
+LATER = b"""case_id,activity,timestamp
+c1,approve,2024-01-01T00:05:00Z
+c3,receive,2024-01-01T00:04:00Z
+c3,approve,2024-01-01T00:06:00Z
+"""
+
+
+def _successors(workspace: EventLogWorkspace):
+    index = workspace.state[1]
+    return np.array(index["next_activity"]).tolist(), np.array(index["duration"]).tolist()
+
+
+def test_failed_refresh_restores_patched_successor_links(tmp_path, monkeypatch):
+    workspace = EventLogWorkspace(str(tmp_path))
+    _append(workspace, CSV)
+    before = _successors(workspace), workspace.bottlenecks(start=datetime(2024, 1, 1))
+
+    def crash(meta, index):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(workspace, "_save", crash)
+    with pytest.raises(OSError):
+        _append(workspace, LATER)
+    monkeypatch.undo()
+
+    reopened = EventLogWorkspace(str(tmp_path))
+    for current in (workspace, reopened):
+        after = _successors(current), current.bottlenecks(start=datetime(2024, 1, 1))
+        assert after[0] == before[0]
+        assert after[1]["transitions"] == before[1]["transitions"]
+    assert not (tmp_path / "successors.undo.npz").exists()
+
+
+def test_workers_see_each_others_appends(tmp_path):
+    first, second = WorkspaceManager(str(tmp_path)), WorkspaceManager(str(tmp_path))
+    workspace = first.create()
+    _append(workspace, CSV)
+
+    other = second.get(workspace.id)
+    assert other.summary()["events"] == 4
+    _append(other, LATER)
+    assert first.get(workspace.id).summary() == other.summary()
+    assert _successors(workspace) == _successors(other)
+    assert "c3" in workspace.filter_cases()["case_ids"]
+
+    asyncio.run(second.delete(workspace.id))
+    with pytest.raises(WorkspaceNotFound):
+        first.get(workspace.id)
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from src.utils.inference_pool import InferencePool, WorkerServiceHandle
+from src.utils.service_registry import ServiceRegistry, ServiceUnavailable
+
+
+class HeavyService:
+    constructed = 0
+
+    def __init__(self):
+        HeavyService.constructed += 1
+
+    async def initialize(self):
+        pass
+
+    async def health_check(self):
+        return {"status": "healthy"}
+
+    async def shutdown(self):
+        pass
+
+
+class LightService(HeavyService):
+    pass
+
+
+def _pool(monkeypatch, worker_status):
+    pool = InferencePool({"vision": HeavyService, "nlp": LightService}, workers=2, process_services=["vision"])
+
+    async def warm():
+        await asyncio.sleep(0.01)
+        pool.worker_status = worker_status
+        pool.ready = True
+
+    monkeypatch.setattr(pool, "_create_executor", lambda: None)
+    monkeypatch.setattr(pool, "_warm", warm)
+    return pool
+
+
+def test_offloaded_services_are_not_loaded_in_the_parent(monkeypatch):
+    HeavyService.constructed = 0
+    pool = _pool(monkeypatch, {
+        1: {"pid": 1, "services": ["vision"], "errors": {}},
+        2: {"pid": 2, "services": ["vision"], "errors": {}},
+    })
+    registry = ServiceRegistry(pool.service_factories({"vision": HeavyService, "nlp": LightService}))
+
+    async def run():
+        pool.start()
+        registry.start()
+        await registry.wait_ready()
+        vision = await registry.get("vision")
+        return vision, await vision.health_check(), await registry.get("nlp")
+
+    vision, health, nlp = asyncio.run(run())
+    assert isinstance(vision, WorkerServiceHandle)
+    assert health == {"status": "healthy", "workers": 2, "errors": {}}
+    assert isinstance(nlp, LightService)
+    # Only the in-process service was built in the parent
+    assert HeavyService.constructed == 1
+
+
+def test_handle_fails_when_no_worker_loaded_the_service(monkeypatch):
+    pool = _pool(monkeypatch, {1: {"pid": 1, "services": [], "errors": {"vision": "weights missing"}}})
+    registry = ServiceRegistry(pool.service_factories({"vision": HeavyService}))
+
+    async def run():
+        pool.start()
+        registry.start()
+        await registry.wait_ready()
+        await registry.get("vision")
+
+    with pytest.raises(ServiceUnavailable, match="weights missing"):
+        asyncio.run(run())